@@ -38,12 +38,19 @@ class SubjectSelectionForm(forms.Form):
         widget=forms.CheckboxSelectMultiple,
         required=False
     )
+    # Blank: rows already in the project are skipped; a column: rows update the subjects with the same value in it
+    key_column = forms.ChoiceField(required=False, label="Match existing subjects on")
 
     def __init__(self, *args, **kwargs):
-        subjects = kwargs.pop("subjects", [])
+        # [(row position in the upload, row)] of the rows on offer
+        rows = kwargs.pop("rows", [])
+        columns = kwargs.pop("columns", [])
         super().__init__(*args, **kwargs)
         self.fields["subjects"].choices = [
-            (i, f"Row {i+1}") for i, _ in enumerate(subjects)
+            (i, f"Row {i+1}") for i, _ in rows
+        ]
+        self.fields["key_column"].choices = [("", "Whole row (skip rows already added)")] + [
+            (column, f"{column} (update subjects with the same {column})") for column in columns
         ]
 
 
@@ -0,0 +1,185 @@
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from django.db import connection
+from openpyxl import Workbook
+
+from core.utils.excel.file_reader import FileReader
+from core.utils.excel.sheet_data import SheetData
+from core.utils.excel.sheet_grid import SheetGrid
+
+TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "utils", "excel", "excel_templates", "metadataTemplate6.xlsm"
+)
+
+# Values that show up again and again across group columns of real sheets
+SAMPLE_VALUES = [
+    "Homo sapiens", "HeLa", "Trypsin", "Lys-C", "Female", "Male", "N/A", "UNKNOWN",
+    "Liver", "Epithelial", "50 mM ammonium bicarbonate", "DDA", "Orbitrap Exploris 480",
+    "0.1% formic acid in water", "80% acetonitrile", "Vanquish Neo", "-80C",
+    "Samples were lysed and digested overnight", "Tryspin", "Bufer", 120000, 2.5, 30,
+]
+
+
+def make_typo(word: str, rng: random.Random) -> str:
+    """word with one or two random deletes, inserts, replaces or adjacent transposes."""
+    letters = list(word)
+    for _ in range(rng.choice([1, 2])):
+        position = rng.randrange(len(letters)) if letters else 0
+        operation = rng.randrange(4)
+        if operation == 0 and len(letters) > 1:
+            del letters[position]
+        elif operation == 1:
+            letters.insert(position, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        elif operation == 2 and letters:
+            letters[position] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        elif len(letters) > 1:
+            position = min(position, len(letters) - 2)
+            letters[position], letters[position + 1] = letters[position + 1], letters[position]
+    return "".join(letters)
+
+
+def group_names(count: int) -> List[str]:
+    return [f"Group {i + 1}" for i in range(count)]
+
+
+_template_labels: Dict[int, str] = {}
+
+
+def label_text(row: int) -> str:
+    """The template's label for a DataEntry row; blank (custom) rows get a made-up one."""
+    if not _template_labels:
+        grid = SheetGrid.from_workbook(TEMPLATE_PATH, "DataEntry", range(1, 90), min_col=2, max_col=2)
+        _template_labels.update({r: grid.value(r, 2) for r in range(1, 90) if grid.value(r, 2)})
+    return _template_labels.get(row) or f"Custom Label {row}: "
+
+
+def build_synthetic_workbook(path: str, groups: List[str], seed: int = 0) -> str:
+    """Write a DataEntry sheet laid out like metadataTemplate6 with every group column filled."""
+    rng = random.Random(seed)
+    reader = FileReader()
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("DataEntry")
+    label_rows = set()
+    for start, end in [reader.sample_id_range, reader.sample_prep_range,
+                       reader.lc_param_range, reader.ms_param_range]:
+        label_rows.update(range(start, end + 1))
+
+    for row in range(1, max(label_rows) + 1):
+        if row == 1:
+            ws.append(["Synthetic Project"])
+        elif row == reader.group_name_row:
+            ws.append([None, None] + list(groups))
+        elif row in label_rows:
+            ws.append([None, label_text(row)] + [rng.choice(SAMPLE_VALUES) for _ in groups])
+        else:
+            ws.append([])
+
+    wb.create_sheet("Source")
+    wb.save(path)
+    return path
+
+
+def synthetic_project_data(groups: List[str], seed: int = 0) -> SheetData:
+    """FileReader-shaped result for a synthetic sheet with these groups."""
+    rng = random.Random(seed)
+    reader = FileReader()
+    sections = [
+        (reader.sample_id_range, "Sample ID"),
+        (reader.sample_prep_range, "Sample Prep"),
+        (reader.lc_param_range, "LC Param"),
+        (reader.ms_param_range, "MS Param"),
+    ]
+    rows = [(row, category) for (start, end), category in sections for row in range(start, end + 1)]
+    sheet = SheetData(
+        labels=[label_text(row) for row, _ in rows],
+        categories=[category for _, category in rows],
+        rows=[row for row, _ in rows],
+    )
+    for group in groups:
+        sheet.add_group(group, [rng.choice(SAMPLE_VALUES) for _ in rows])
+    return sheet
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Create a throwaway copy of the schema and point the default connection at it.
+    SQLite test databases live in memory by default, which would hide the per-commit
+    fsync cost most of these benchmarks are about, so SQLite gets a temporary file.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == "sqlite":
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(directory, "benchmark.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+class QueryCounter:
+    """connection.execute_wrapper that counts statements (CaptureQueriesContext caps its log at 9000)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        yield counter
+
+
+@contextmanager
+def synthetic_workbooks(group_counts: List[int]):
+    """Yield [(group count, groups, path)] for temporary synthetic workbooks."""
+    with tempfile.TemporaryDirectory() as directory:
+        books = []
+        for count in group_counts:
+            groups = group_names(count)
+            path = os.path.join(directory, f"synthetic-{count}.xlsx")
+            books.append((count, groups, build_synthetic_workbook(path, groups)))
+        yield books
+
+
+def best_of(repeat: int, func: Callable) -> Tuple[float, object]:
+    """Run func repeat times and return (fastest seconds, last result)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def parse_counts(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def table_bytes(cursor, tables):
+    """Bytes of the b-trees (tables and their indexes) behind these tables, via SQLite's dbstat."""
+    placeholders = ", ".join(["%s"] * len(tables))
+    cursor.execute(
+        f"SELECT COALESCE(SUM(d.pgsize), 0) FROM dbstat d JOIN sqlite_master m ON m.name = d.name "
+        f"WHERE m.tbl_name IN ({placeholders})",
+        tables
+    )
+    return cursor.fetchone()[0]
+
+
+def format_mib(size: int) -> str:
+    return f"{size / 2 ** 20:>9.1f} MiB"
@@ -0,0 +1,60 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core.management.benchmarks import (
+    benchmark_database, count_queries, group_names, parse_counts, synthetic_project_data
+)
+from core.models import GroupData, GroupSubData, ProjectData
+from core.utils.project_import import intern_categories, intern_labels, save_project_data
+
+
+def save_per_cell(project, data):
+    """upload_excel_confirm before the bulk path: one autocommitted INSERT per group and per cell."""
+    category_ids = intern_categories(data.categories)
+    label_ids = intern_labels(data.labels)
+    for group_name, categories in data.to_nested().items():
+        group_instance = GroupData.objects.create(project=project, group_name=group_name)
+        for category_name, labels in categories.items():
+            for label, value in labels.items():
+                GroupSubData.objects.create(
+                    group=group_instance, category_id=category_ids[category_name],
+                    label_id=label_ids[label], value=value
+                )
+
+
+class Command(BaseCommand):
+    help = "Compare per-cell saves with save_project_data (latency and query count) on a throwaway database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", default="5,50,200", help="Comma-separated group counts")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            owner = User.objects.create(username="benchmark")
+            self.stdout.write(f"{'groups':>7}{'cells':>8}{'per-cell s':>12}{'queries':>9}{'bulk s':>10}{'queries':>9}{'speedup':>9}")
+
+            for count in parse_counts(options["groups"]):
+                groups = group_names(count)
+                data = synthetic_project_data(groups)
+                cells = len(data.groups) * len(data.labels)
+
+                results = []
+                for save in (save_per_cell, save_project_data):
+                    project = ProjectData.objects.create(
+                        owner=owner, project_name=f"{save.__name__} {count}",
+                        number_of_groups=count, group_names="\t".join(groups)
+                    )
+                    with count_queries() as queries:
+                        start = time.perf_counter()
+                        save(project, data)
+                        elapsed = time.perf_counter() - start
+                    if GroupSubData.objects.filter(group__project=project).count() != cells:
+                        raise RuntimeError(f"{save.__name__} wrote the wrong number of rows")
+                    results.append((elapsed, queries.count))
+
+                (slow, slow_queries), (fast, fast_queries) = results
+                self.stdout.write(
+                    f"{count:>7}{cells:>8}{slow:>12.3f}{slow_queries:>9}{fast:>10.3f}{fast_queries:>9}{slow / fast:>8.1f}x"
+                )
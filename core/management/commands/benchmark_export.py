@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.benchmarks import benchmark_database, parse_counts, SAMPLE_VALUES
+from core.models import ProjectData, Subject
+from core.utils.export import export_chunks, export_formats
+
+COLUMNS = ["sample", "sex", "tissue", "enzyme", "instrument", "amount", "notes"]
+
+
+def consume(make_chunks):
+    """(bytes written, seconds, peak traced bytes) of draining make_chunks()."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = sum(len(chunk) for chunk in make_chunks())
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, seconds, peak
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream subject exports of growing projects and report peak Python memory next to "
+        "loading the same rows into a list; streamed peaks should stay flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subjects", default="10000,50000,200000", help="Comma-separated subject counts")
+
+    def handle(self, *args, **options):
+        counts = parse_counts(options["subjects"])
+        formats = export_formats()
+        peaks = {file_format: [] for file_format in formats}
+
+        with benchmark_database():
+            owner = User.objects.create(username="benchmark")
+            header = f"{'subjects':>9}{'list MiB':>10}"
+            for file_format in formats:
+                header += f"{file_format + ' MiB':>14}{file_format + ' MB':>12}{'rows/s':>10}"
+            self.stdout.write(header)
+
+            for count in counts:
+                project = ProjectData.objects.create(
+                    project_name=f"Benchmark {count}", owner=owner, number_of_groups=0
+                )
+                project.add_subject_columns(COLUMNS)
+                Subject.objects.bulk_create(
+                    [
+                        Subject(project=project, metadata={
+                            column: SAMPLE_VALUES[(i + j) % len(SAMPLE_VALUES)] for j, column in enumerate(COLUMNS)
+                        })
+                        for i in range(count)
+                    ],
+                    batch_size=2000
+                )
+                if project.subject_column_names() != COLUMNS:
+                    raise CommandError(f"Unexpected export columns: {project.subject_column_names()}")
+
+                # What rendering every subject (e.g. into a template) holds at once
+                _, _, list_peak = consume(lambda: [list(Subject.objects.filter(project=project))])
+                line = f"{count:>9}{list_peak / 2 ** 20:>10.1f}"
+                for file_format in formats:
+                    size, seconds, peak = consume(lambda: export_chunks(project, "subjects", file_format))
+                    peaks[file_format].append(peak)
+                    line += f"{peak / 2 ** 20:>14.1f}{size / 1e6:>12.1f}{count / seconds:>10.0f}"
+                self.stdout.write(line)
+
+        for file_format, values in peaks.items():
+            if len(values) > 1 and values[-1] > 2 * values[0] + 2 ** 20:
+                raise CommandError(f"{file_format} export memory grew with project size: {values}")
+        self.stdout.write(self.style.SUCCESS("Export memory stays flat across project sizes"))
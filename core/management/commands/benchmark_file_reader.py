@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import load_workbook
+
+from core.management.benchmarks import best_of, parse_counts, synthetic_workbooks
+from core.utils.excel.file_reader import FileReader
+from core.utils.excel.sheet_grid import SheetGrid
+
+
+class Command(BaseCommand):
+    help = "Compare openpyxl read-only random access with the streaming SheetGrid reader."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", default="5,50,500", help="Comma-separated group counts")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--openpyxl-max-groups", type=int, default=50,
+            help="Skip the openpyxl path above this many groups (it grows quadratically)"
+        )
+
+    def handle(self, *args, **options):
+        reader = FileReader()
+        sections = [reader.sample_id_range, reader.sample_prep_range,
+                    reader.lc_param_range, reader.ms_param_range]
+        rows = {reader.group_name_row}
+        for start, end in sections:
+            rows.update(range(start, end + 1))
+        label_rows = sorted(rows - {reader.group_name_row})
+
+        def read_openpyxl(path, groups):
+            ws = load_workbook(path, read_only=True)["DataEntry"]
+            cols = range(3, 3 + len(groups))
+            header = [ws.cell(reader.group_name_row, c).value for c in cols]
+            labels = [ws.cell(r, 2).value for r in label_rows]
+            values = [[ws.cell(r, c).value for r in label_rows] for c in cols]
+            return header, labels, values
+
+        def read_grid(path, groups):
+            grid = SheetGrid.from_workbook(path, "DataEntry", rows, min_col=2, max_col=2 + len(groups))
+            cols = range(3, 3 + len(groups))
+            header = [grid.value(reader.group_name_row, c) for c in cols]
+            labels = [grid.value(r, 2) for r in label_rows]
+            values = [[grid.value(r, c) for r in label_rows] for c in cols]
+            return header, labels, values
+
+        self.stdout.write(f"{'groups':>8} {'openpyxl (s)':>14} {'grid (s)':>10} {'speedup':>9}")
+        with synthetic_workbooks(parse_counts(options["groups"])) as books:
+            for count, groups, path in books:
+                new_time, new = best_of(options["repeat"], lambda: read_grid(path, groups))
+                if count > options["openpyxl_max_groups"]:
+                    self.stdout.write(f"{count:>8} {'skipped':>14} {new_time:>10.4f} {'-':>9}")
+                    continue
+                old_time, old = best_of(options["repeat"], lambda: read_openpyxl(path, groups))
+                if old != new:
+                    raise CommandError(f"SheetGrid values differ from openpyxl for {count} groups")
+                self.stdout.write(
+                    f"{count:>8} {old_time:>14.4f} {new_time:>10.4f} {old_time / new_time:>8.1f}x"
+                )
@@ -0,0 +1,54 @@
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.benchmarks import best_of, group_names, parse_counts, synthetic_workbooks
+from core.utils.excel.excel_file_generation import ENGINE_OPENPYXL, ENGINE_XML, ExcelFileGenerator
+from core.utils.excel.file_reader import FileReader
+from core.utils.excel.project_data import FileReaderProjectData
+
+
+class Command(BaseCommand):
+    help = (
+        "Show generation time (both engines), file size and parse time against the number of groups; "
+        "per-group columns should stay roughly flat if everything scales linearly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", default="25,50,100,250,500", help="Comma-separated group counts")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        engines = {engine: ExcelFileGenerator(engine=engine) for engine in (ENGINE_OPENPYXL, ENGINE_XML)}
+        reader = FileReader()
+        counts = parse_counts(options["groups"])
+
+        self.stdout.write(
+            f"{'groups':>7}{'openpyxl ms':>13}{'xml ms':>9}{'xlsm KiB':>10}{'parse ms':>10}"
+            f"   per group: {'openpyxl':>9}{'xml':>7}{'KiB':>7}{'parse':>7}"
+        )
+        with synthetic_workbooks(counts) as books:
+            for count, groups, filled_path in books:
+                project_data = FileReaderProjectData("Scaling", "benchmark", "", groups)
+                timings = {}
+                for engine, generator in engines.items():
+                    timings[engine], workbook = best_of(
+                        options["repeat"], lambda: generator.make_new_workbook_from_template(project_data)
+                    )
+                    # The blank sheet must read back with every group in place
+                    if reader.read_project_data(io.BytesIO(workbook.getvalue())).get_groups() != groups:
+                        raise CommandError(f"{engine} workbook with {count} groups doesn't read back")
+                size = len(workbook.getvalue()) / 1024
+
+                parse_time, resp = best_of(
+                    options["repeat"], lambda: reader.get_file_reader_response(project_data, filled_path)
+                )
+                if not resp.success or resp.data.groups != group_names(count):
+                    raise CommandError(f"Parsing {count} groups failed: {resp.message}")
+
+                self.stdout.write(
+                    f"{count:>7}{timings[ENGINE_OPENPYXL] * 1000:>13.1f}{timings[ENGINE_XML] * 1000:>9.2f}"
+                    f"{size:>10.1f}{parse_time * 1000:>10.1f}"
+                    f"   {'':>11}{timings[ENGINE_OPENPYXL] * 1000 / count:>9.2f}"
+                    f"{timings[ENGINE_XML] * 1000 / count:>7.3f}{size / count:>7.2f}{parse_time * 1000 / count:>7.2f}"
+                )
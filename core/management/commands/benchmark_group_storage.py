@@ -0,0 +1,137 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.management.benchmarks import (
+    benchmark_database, format_mib, group_names, synthetic_project_data, table_bytes
+)
+from core.models import GroupData, GroupSubData, ProjectData
+from core.utils.project_import import intern_categories, intern_labels, project_with_group_data
+
+# GroupSubData as created by 0001_initial, before categories and labels were interned
+LEGACY_TABLE = "benchmark_legacy_groupsubdata"
+LEGACY_DDL = [
+    f'CREATE TABLE "{LEGACY_TABLE}" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, '
+    f'"category" varchar(200) NOT NULL, "label" text NOT NULL, "value" text NULL, '
+    f'"group_id" bigint NOT NULL REFERENCES "core_groupdata" ("id") DEFERRABLE INITIALLY DEFERRED)',
+    f'CREATE INDEX "{LEGACY_TABLE}_group_id" ON "{LEGACY_TABLE}" ("group_id")',
+]
+
+LEGACY_QUERY = (
+    f'SELECT s."category", s."label", s."value" FROM "{LEGACY_TABLE}" s '
+    f'JOIN "core_groupdata" g ON g."id" = s."group_id" WHERE g."project_id" = %s ORDER BY g."id", s."id"'
+)
+INTERNED_QUERY = (
+    'SELECT c."name", l."text", s."value" FROM "core_groupsubdata" s '
+    'JOIN "core_groupdata" g ON g."id" = s."group_id" '
+    'JOIN "core_datacategory" c ON c."id" = s."category_id" '
+    'JOIN "core_datalabel" l ON l."id" = s."label_id" '
+    'WHERE g."project_id" = %s ORDER BY g."id", s."id"'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare GroupSubData storage with text categories/labels against the interned layout: "
+        "table + index size and project detail (about page) query time on synthetic projects."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=10000)
+        parser.add_argument("--groups", type=int, default=3, help="Groups per project")
+        parser.add_argument("--samples", type=int, default=200, help="Projects to time the detail query on")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Sizes are read from SQLite's dbstat table; run this against SQLite.")
+
+        rng = random.Random(options["seed"])
+        groups = group_names(options["groups"])
+
+        with benchmark_database():
+            start = time.perf_counter()
+            project_ids = self.populate(options["projects"], groups, options["seed"])
+            self.stdout.write(
+                f"Populated {options['projects']} projects x {len(groups)} groups "
+                f"({GroupSubData.objects.count()} rows per layout) in {time.perf_counter() - start:.1f}s"
+            )
+
+            with connection.cursor() as cursor:
+                legacy = table_bytes(cursor, [LEGACY_TABLE])
+                interned = table_bytes(cursor, ["core_groupsubdata", "core_datacategory", "core_datalabel"])
+            self.stdout.write(f"Text columns:     {format_mib(legacy)}")
+            self.stdout.write(f"Interned lookups: {format_mib(interned)}  ({interned / legacy:.0%} of text columns)")
+
+            samples = rng.sample(project_ids, min(options["samples"], len(project_ids)))
+            timings = [
+                ("text columns, SQL", lambda p: self.run_sql(LEGACY_QUERY, p)),
+                ("interned, SQL", lambda p: self.run_sql(INTERNED_QUERY, p)),
+                ("interned, ORM prefetch", self.run_orm),
+            ]
+            for name, fetch in timings:
+                start = time.perf_counter()
+                rows = sum(fetch(p) for p in samples)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"{name:<24}{elapsed / len(samples) * 1000:>8.2f} ms/project ({rows} rows)")
+
+    def populate(self, project_count, groups, seed):
+        owner = User.objects.create(username="benchmark")
+        data = synthetic_project_data(groups, seed)
+        cells = [
+            (group_index, category, label, None if value is None else str(value))
+            for group_index, values in enumerate(data.values)
+            for category, label, value in zip(data.categories, data.labels, values)
+        ]
+        category_ids = intern_categories(category for _, category, _, _ in cells)
+        label_ids = intern_labels(label for _, _, label, _ in cells)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            for statement in LEGACY_DDL:
+                cursor.execute(statement)
+
+            ProjectData.objects.bulk_create(
+                [ProjectData(owner=owner, project_name=f"Project {i}", number_of_groups=len(groups),
+                             group_names="\t".join(groups)) for i in range(project_count)],
+                batch_size=1000
+            )
+            project_ids = list(ProjectData.objects.order_by("id").values_list("id", flat=True))
+            GroupData.objects.bulk_create(
+                [GroupData(project_id=p, group_name=g) for p in project_ids for g in groups], batch_size=1000
+            )
+            group_ids = list(GroupData.objects.order_by("id").values_list("id", flat=True))
+
+            # Raw executemany keeps populating millions of rows quick; it isn't what's measured
+            for i in range(0, len(project_ids)):
+                project_groups = group_ids[i * len(groups):(i + 1) * len(groups)]
+                cursor.executemany(
+                    f'INSERT INTO "{LEGACY_TABLE}" ("category", "label", "value", "group_id") VALUES (%s, %s, %s, %s)',
+                    [(category, label, value, project_groups[g]) for g, category, label, value in cells]
+                )
+                cursor.executemany(
+                    'INSERT INTO "core_groupsubdata" ("category_id", "label_id", "value", "group_id") '
+                    'VALUES (%s, %s, %s, %s)',
+                    [(category_ids[category], label_ids[label], value, project_groups[g])
+                     for g, category, label, value in cells]
+                )
+        return project_ids
+
+    @staticmethod
+    def run_sql(query, project_id):
+        with connection.cursor() as cursor:
+            cursor.execute(query, [project_id])
+            return len(cursor.fetchall())
+
+    @staticmethod
+    def run_orm(project_id):
+        """What the about page does: walk project.group_data.all and their group_sub_data."""
+        project = project_with_group_data().get(id=project_id)
+        rows = 0
+        for group in project.group_data.all():
+            for sub in group.group_sub_data.all():
+                str(sub.category), str(sub.label), sub.value
+                rows += 1
+        return rows
@@ -0,0 +1,115 @@
+import json
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.management.benchmarks import (
+    SAMPLE_VALUES, benchmark_database, best_of, group_names, parse_counts, synthetic_project_data
+)
+from core.models import IndependentVariable, ProjectData
+from core.utils.project_import import intern_labels, label_text, projects_varying
+
+# ProjectData.independent_variable as it was before 0007: one JSON blob per project
+LEGACY_TABLE = "benchmark_legacy_independent_variable"
+LEGACY_DDL = (
+    f'CREATE TABLE "{LEGACY_TABLE}" ("project_id" integer NOT NULL PRIMARY KEY, '
+    f'"independent_variable" text NOT NULL CHECK (JSON_VALID("independent_variable")))'
+)
+LEGACY_QUERY = (
+    f'SELECT "project_id" FROM "{LEGACY_TABLE}" '
+    f'WHERE JSON_TYPE("independent_variable", %s) IS NOT NULL'
+)
+
+
+def walk_tree(nested):
+    """The old get_independent_variables: a set per label, built by walking every group's tree."""
+    ind_vars = {}
+    groups = list(nested)
+    for category, labels in nested[groups[0]].items():
+        for label in labels:
+            distinct = set(nested[group][category][label] for group in groups)
+            if len(distinct) > 1:
+                ind_vars[label] = list(distinct)
+    return ind_vars
+
+
+class Command(BaseCommand):
+    help = (
+        "Time independent-variable detection (tree walk vs column-wise over SheetData) and the "
+        "'which projects vary X' query (JSON scan vs IndependentVariable index)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", default="5,50,500", help="Comma-separated group counts")
+        parser.add_argument("--projects", type=int, default=20000)
+        parser.add_argument("--labels", type=int, default=5, help="Independent variables per project")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("The JSON scan baseline uses SQLite's JSON functions; run this against SQLite.")
+
+        self.stdout.write(f"{'groups':>7}{'tree walk s':>14}{'column-wise s':>15}")
+        for count in parse_counts(options["groups"]):
+            sheet = synthetic_project_data(group_names(count))
+            nested = sheet.to_nested()
+            if walk_tree(nested).keys() != sheet.independent_variables().keys():
+                raise CommandError("Tree walk and column-wise detection disagree")
+            walk_time, _ = best_of(options["repeat"], lambda: walk_tree(nested))
+            column_time, _ = best_of(options["repeat"], sheet.independent_variables)
+            self.stdout.write(f"{count:>7}{walk_time:>14.5f}{column_time:>15.5f}")
+
+        with benchmark_database():
+            labels = self.populate(options["projects"], options["labels"], options["seed"])
+            probe = labels[0]
+            self.stdout.write(f"\nWhich projects vary {probe.strip()!r}, over {options['projects']} projects:")
+
+            json_path = "$." + json.dumps(probe)
+            scan_time, scan_rows = best_of(options["repeat"], lambda: self.run_sql(json_path))
+            index_time, index_rows = best_of(
+                options["repeat"], lambda: list(projects_varying(probe).values_list("id", flat=True))
+            )
+            if sorted(scan_rows) != sorted(index_rows):
+                raise CommandError("JSON scan and indexed query disagree")
+            self.stdout.write(f"JSON scan       {scan_time * 1000:>9.2f} ms ({len(scan_rows)} projects)")
+            self.stdout.write(f"indexed table   {index_time * 1000:>9.2f} ms ({len(index_rows)} projects)")
+
+    def populate(self, project_count, per_project, seed):
+        rng = random.Random(seed)
+        labels = [label_text(label) for label in synthetic_project_data(group_names(1)).labels]
+        label_ids = intern_labels(labels)
+        owner = User.objects.create(username="benchmark")
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(LEGACY_DDL)
+            ProjectData.objects.bulk_create(
+                [ProjectData(owner=owner, project_name=f"Project {i}", number_of_groups=3, group_names="")
+                 for i in range(project_count)],
+                batch_size=1000
+            )
+            rows, legacy = [], []
+            for project_id in ProjectData.objects.order_by("id").values_list("id", flat=True):
+                variables = {
+                    label: [str(v) for v in rng.sample(SAMPLE_VALUES, 3)]
+                    for label in rng.sample(labels, per_project)
+                }
+                legacy.append((project_id, json.dumps(variables)))
+                rows.extend(
+                    IndependentVariable(project_id=project_id, label_id=label_ids[label], values=values,
+                                        distinct_count=len(values))
+                    for label, values in variables.items()
+                )
+            cursor.executemany(
+                f'INSERT INTO "{LEGACY_TABLE}" ("project_id", "independent_variable") VALUES (%s, %s)', legacy
+            )
+            IndependentVariable.objects.bulk_create(rows, batch_size=1000)
+        return labels
+
+    @staticmethod
+    def run_sql(json_path):
+        with connection.cursor() as cursor:
+            cursor.execute(LEGACY_QUERY, [json_path])
+            return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.benchmarks import (
+    benchmark_database, best_of, count_queries, group_names, parse_counts, synthetic_project_data
+)
+from core.models import ProjectData
+from core.utils.excel.excel_file_generation import ENGINE_OPENPYXL, ENGINE_XML, ExcelFileGenerator
+from core.utils.excel.file_reader import FileReader
+from core.utils.excel.project_data import FileReaderProjectData
+from core.utils.project_import import save_project_data
+from core.utils.project_workbook import filled_workbook, stored_group_values
+
+
+def read_back(buffer, groups):
+    """{(group, label): value} of a generated workbook, parsed with FileReader."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "filled.xlsm")
+        with open(path, "wb") as f:
+            f.write(buffer.getvalue())
+        resp = FileReader().get_file_reader_response(FileReaderProjectData("", "", "", groups), path)
+    if not resp.success:
+        raise CommandError(resp.message)
+    sheet = resp.data
+    return {
+        (group, str(label).strip()): value
+        for group, row in zip(sheet.groups, sheet.values)
+        for label, value in zip(sheet.labels, row)
+        if value is not None
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time regenerating a filled workbook from a stored project (one query, one pass over the cells) "
+        "with both engines, and check FileReader reads back exactly the stored values."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", default="10,100", help="Comma-separated group counts")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        engines = [ExcelFileGenerator(engine=ENGINE_OPENPYXL), ExcelFileGenerator(engine=ENGINE_XML)]
+
+        with benchmark_database():
+            owner = User.objects.create(username="benchmark")
+            self.stdout.write(f"{'groups':>7}{'queries':>9}{'openpyxl ms':>13}{'xml ms':>9}")
+            for count in parse_counts(options["groups"]):
+                groups = group_names(count)
+                project = ProjectData.objects.create(
+                    project_name=f"Benchmark {count}", owner=owner, number_of_groups=count
+                )
+                save_project_data(project, synthetic_project_data(groups))
+                project = ProjectData.objects.select_related("owner").get(id=project.id)
+
+                with count_queries() as counter:
+                    _, cells = stored_group_values(project)
+                expected = {
+                    (groups[group_index], label.strip()): value
+                    for group_index, _, label, value in cells
+                    if value is not None
+                }
+
+                timings = []
+                for generator in engines:
+                    seconds, buffer = best_of(options["repeat"], lambda: filled_workbook(project, generator))
+                    got = read_back(buffer, groups)
+                    if got != expected:
+                        diff = sorted(set(got.items()) ^ set(expected.items()), key=str)[:5]
+                        raise CommandError(f"{generator.engine} workbook differs from the stored values: {diff}")
+                    timings.append(seconds)
+
+                self.stdout.write(f"{count:>7}{counter.count:>9}{timings[0] * 1000:>13.1f}{timings[1] * 1000:>9.1f}")
+                if counter.count != 1:
+                    raise CommandError(f"Expected one query for the stored values, got {counter.count}")
+
+        self.stdout.write(self.style.SUCCESS("Both engines round-trip the stored values"))
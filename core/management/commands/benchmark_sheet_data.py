@@ -0,0 +1,83 @@
+import json
+import pickle
+import tracemalloc
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.management.benchmarks import best_of, group_names, parse_counts, synthetic_project_data
+
+
+def build_nested(sheet):
+    """FileReader's old layout: {Group: {Category: {Label: Value}}} of defaultdicts with lambda factories."""
+    data = defaultdict(lambda: defaultdict(dict))
+    for group, values in zip(sheet.groups, sheet.values):
+        cat_lab_val = defaultdict(dict)
+        for category, label, value in zip(sheet.categories, sheet.labels, values):
+            cat_lab_val[category][label] = value
+        data[group] = cat_lab_val
+    return data
+
+
+def make_json_safe(obj):
+    """The recursion every preview went through before it could be serialized."""
+    if isinstance(obj, dict):
+        return {k: make_json_safe(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [make_json_safe(v) for v in obj]
+    return obj
+
+
+def peak_kib(func) -> float:
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak / 1024
+
+
+class Command(BaseCommand):
+    help = "Compare nested-defaultdict parse results with SheetData: peak memory, JSON time and size."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", default="50,500,2000", help="Comma-separated group counts")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'groups':>7}{'nested KiB':>12}{'matrix KiB':>12}{'nested json s':>15}{'matrix json s':>15}"
+            f"{'nested bytes':>14}{'matrix bytes':>14}  pickles"
+        )
+        for count in parse_counts(options["groups"]):
+            source = synthetic_project_data(group_names(count))
+            nested = build_nested(source)
+            sheet = synthetic_project_data(group_names(count))
+
+            if sheet.to_nested() != make_json_safe(nested):
+                raise CommandError("SheetData and the nested layout disagree")
+
+            # Peak while building the result and serializing it, as one preview does
+            nested_peak = peak_kib(lambda: json.dumps(make_json_safe(build_nested(source)), cls=DjangoJSONEncoder))
+            matrix_peak = peak_kib(lambda: json.dumps(synthetic_project_data(group_names(count)).to_json(),
+                                                      cls=DjangoJSONEncoder))
+
+            nested_time, nested_json = best_of(
+                options["repeat"], lambda: json.dumps(make_json_safe(nested), cls=DjangoJSONEncoder)
+            )
+            matrix_time, matrix_json = best_of(
+                options["repeat"], lambda: json.dumps(sheet.to_json(), cls=DjangoJSONEncoder)
+            )
+
+            try:
+                pickle.dumps(nested)
+                nested_pickles = "yes"
+            except (pickle.PicklingError, AttributeError):
+                nested_pickles = "no"
+            pickle.loads(pickle.dumps(sheet))
+
+            self.stdout.write(
+                f"{count:>7}{nested_peak:>12.0f}{matrix_peak:>12.0f}{nested_time:>15.4f}{matrix_time:>15.4f}"
+                f"{len(nested_json):>14}{len(matrix_json):>14}  nested={nested_pickles} matrix=yes"
+            )
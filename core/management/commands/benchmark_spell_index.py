@@ -0,0 +1,42 @@
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+from spellchecker import SpellChecker
+
+from core.management.benchmarks import SAMPLE_VALUES, make_typo
+from core.utils.excel.file_reader import get_spell_index
+
+
+class Command(BaseCommand):
+    help = "Report SpellChecker.correction and SymSpellIndex throughput in words per second (parity is in core.tests)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--words", type=int, default=200, help="Number of sample words")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        spell = SpellChecker()
+        index = get_spell_index()
+
+        # Half correctly spelled sheet words, half one/two-edit typos of dictionary words
+        sheet_words = [w for v in SAMPLE_VALUES for w in re.sub(r'[^A-Za-z ]+', ' ', str(v)).split()]
+        dictionary_words = [index.word(i) for i in rng.sample(range(index.word_count), options["words"] // 2)]
+        words = [rng.choice(sheet_words) for _ in range(options["words"] - len(dictionary_words))]
+        words += [make_typo(w, rng) for w in dictionary_words]
+
+        start = time.perf_counter()
+        for w in words:
+            spell.correction(w)
+        spell_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for w in words:
+            index.correction(w)
+        index_time = time.perf_counter() - start
+
+        self.stdout.write(f"SpellChecker: {len(words) / spell_time:>10.1f} words/s")
+        self.stdout.write(f"SymSpellIndex: {len(words) / index_time:>9.1f} words/s")
+        self.stdout.write(self.style.SUCCESS(f"SymSpellIndex is {spell_time / index_time:.0f}x faster"))
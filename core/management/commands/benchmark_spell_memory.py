@@ -0,0 +1,94 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.excel.file_reader import get_spell_index
+from core.utils.excel.spell_index import INDEX_PATH
+
+# Runs in a fresh interpreter: load one spell backend, correct a few words,
+# report memory, then stay alive until the parent closes stdin so every worker
+# is measured while the others are still mapped.
+WORKER = r"""
+import json, sys
+
+def memory():
+    stats = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                stats[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": stats.get("Rss", 0),
+        "pss": stats.get("Pss", 0),
+        "uss": stats.get("Private_Clean", 0) + stats.get("Private_Dirty", 0),
+    }
+
+mode, path = sys.argv[1], sys.argv[2]
+words = ["Tripsin", "Femal", "sampel", "protien", "digestoin"]
+if mode == "spellchecker":
+    from spellchecker import SpellChecker
+    baseline = memory()
+    checker = SpellChecker()
+else:
+    from core.utils.excel.spell_index import SymSpellIndex
+    baseline = memory()
+    checker = SymSpellIndex.load(path)
+corrections = [checker.correction(w) for w in words]
+print(json.dumps({"baseline": baseline, "loaded": memory(), "corrections": corrections}), flush=True)
+sys.stdin.read()
+"""
+
+
+def format_kib(kib: int) -> str:
+    return f"{kib / 1024:>8.1f} MiB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-worker memory of a SpellChecker() load against the shared "
+        "memory-mapped spell index, with several workers alive at once (Linux only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent worker processes per backend")
+
+    def handle(self, *args, **options):
+        try:
+            open("/proc/self/smaps_rollup").close()
+        except OSError:
+            raise CommandError("Needs /proc/self/smaps_rollup (Linux 4.14+)")
+
+        # Make sure the compiled index exists before the workers map it
+        get_spell_index()
+
+        results = {}
+        for mode in ("spellchecker", "mmap index"):
+            workers = [
+                subprocess.Popen(
+                    [sys.executable, "-c", WORKER, mode, INDEX_PATH],
+                    cwd=settings.BASE_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+                )
+                for _ in range(options["workers"])
+            ]
+            reports = [json.loads(worker.stdout.readline()) for worker in workers]
+            for worker in workers:
+                worker.stdin.close()
+                worker.wait()
+            results[mode] = reports
+
+        corrections = {mode: reports[0]["corrections"] for mode, reports in results.items()}
+        self.stdout.write(f"Corrections: {corrections}")
+        self.stdout.write(f"{'backend':<14}{'RSS':>12}{'PSS':>12}{'USS':>12}   (growth per worker, {options['workers']} alive)")
+        for mode, reports in results.items():
+            growth = {
+                key: sum(r["loaded"][key] - r["baseline"][key] for r in reports) // len(reports)
+                for key in ("rss", "pss", "uss")
+            }
+            self.stdout.write(
+                f"{mode:<14}{format_kib(growth['rss'])}{format_kib(growth['pss'])}{format_kib(growth['uss'])}"
+            )
+        self.stdout.write("USS is memory private to each worker; mapped index pages are shared and counted in PSS.")
@@ -0,0 +1,72 @@
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Trim
+from django.test.utils import override_settings
+
+from core.management.benchmarks import SAMPLE_VALUES, benchmark_database, best_of, count_queries
+from core.models import ProjectData, Subject
+from core.utils.subject_dedup import duplicate_rows
+from core.utils.subject_query import column_text
+
+COLUMNS = ["Sample Identifier", "Patient", "Tissue", "Volume (uL)", "Notes"]
+
+
+def rowwise_duplicates(project: ProjectData, rows):
+    """Duplicate check as it would be done without row hashes: one lookup per uploaded row on its values."""
+    positions = project.subject_column_positions(COLUMNS)
+    duplicates = set()
+    for position, data in rows:
+        subjects = Subject.objects.filter(project=project)
+        for index, (column, value) in enumerate(data.items()):
+            subjects = subjects.alias(**{f"c{index}": Trim(column_text(positions[index]))}).filter(
+                **{f"c{index}": value.strip()}
+            )
+        if subjects.exists():
+            duplicates.add(position)
+    return duplicates
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare flagging an upload's rows that are already stored as subjects one lookup per row "
+        "against hashed rows checked with one indexed set-membership query per chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subjects", type=int, default=20000)
+        parser.add_argument("--upload", type=int, default=1000)
+        parser.add_argument("--overlap", type=float, default=0.5, help="Share of uploaded rows already stored")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        def row(i):
+            return {"Sample Identifier": f"S{i}", **{c: str(rng.choice(SAMPLE_VALUES)) for c in COLUMNS[1:]}}
+
+        stored = [row(i) for i in range(options["subjects"])]
+        overlap = int(options["upload"] * options["overlap"])
+        upload = rng.sample(stored, overlap) + [row(options["subjects"] + i) for i in range(options["upload"] - overlap)]
+        rows = list(enumerate(upload))
+
+        with override_settings(DEBUG=False), benchmark_database():
+            owner = User.objects.create(username="benchmark")
+            project = ProjectData.objects.create(project_name="Benchmark", owner=owner, number_of_groups=0)
+            project.add_subject_columns(COLUMNS)
+            Subject.objects.bulk_create([Subject(project=project, metadata=data) for data in stored], batch_size=2000)
+
+            # A single run: each row scans the project's subjects
+            rowwise_time, rowwise = best_of(1, lambda: rowwise_duplicates(project, rows))
+            hashed_time, hashed = best_of(options["repeat"], lambda: duplicate_rows(project, rows))
+            if rowwise != hashed or len(hashed) != overlap:
+                raise CommandError("Hashed duplicate check doesn't match the row-by-row one")
+            with count_queries() as queries:
+                duplicate_rows(project, rows)
+
+        self.stdout.write(f"{options['upload']} uploaded rows against {options['subjects']} subjects, {overlap} already stored")
+        self.stdout.write(f"{'row by row':<14}{rowwise_time * 1000:>9.1f} ms   {len(rows)} queries")
+        self.stdout.write(f"{'row hashes':<14}{hashed_time * 1000:>9.1f} ms   {queries.count} queries")
+        self.stdout.write(self.style.SUCCESS(f"Hashed check is {rowwise_time / hashed_time:.0f}x faster"))
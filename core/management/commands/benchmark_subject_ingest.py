@@ -0,0 +1,102 @@
+import csv
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core.management.benchmarks import SAMPLE_VALUES, benchmark_database, parse_counts
+from core.models import ProjectData, StagedUpload, Subject
+from core.utils.staging import pending_rows, promote_rows, stage_csv
+
+COLUMNS = ["sample", "sex", "tissue", "enzyme", "instrument", "amount", "notes"]
+
+
+def write_csv(path: str, count: int) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in range(count):
+            writer.writerow([f"S{i}"] + [SAMPLE_VALUES[(i + j) % len(SAMPLE_VALUES)] for j in range(len(COLUMNS) - 1)])
+
+
+def timed(func):
+    """(seconds, result) of func()."""
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def traced(func) -> int:
+    """Peak traced bytes of func(); tracing slows Python down, so this is a separate run."""
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def read_whole(path: str):
+    """The old path: read and decode the whole upload, then list(csv.DictReader(...))."""
+    with open(path, "rb") as f:
+        return list(csv.DictReader(io.StringIO(f.read().decode("utf-8"))))
+
+
+class Command(BaseCommand):
+    help = (
+        "Stage subject CSVs of growing size into StagedRow and promote every row to Subject; "
+        "reports time and peak Python memory next to reading the whole file into a list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", default="10000,100000", help="Comma-separated CSV row counts")
+
+    def handle(self, *args, **options):
+        peaks = []
+        # DEBUG keeps the SQL of every INSERT batch in connection.queries, which would be measured too
+        with override_settings(DEBUG=False), benchmark_database(), tempfile.TemporaryDirectory() as directory:
+            owner = User.objects.create(username="benchmark")
+            self.stdout.write(
+                f"{'rows':>8}{'list MiB':>10}{'stage s':>9}{'stage MiB':>11}{'promote s':>11}{'promote MiB':>13}"
+            )
+            for count in parse_counts(options["rows"]):
+                path = os.path.join(directory, f"subjects-{count}.csv")
+                write_csv(path, count)
+                projects = [
+                    ProjectData.objects.create(project_name=f"Benchmark {count}", owner=owner, number_of_groups=0)
+                    for _ in range(2)
+                ]
+
+                def stage(project):
+                    with open(path, "rb") as f:
+                        return stage_csv(owner, project, StagedUpload.KIND_SUBJECT_CSV, f)
+
+                def promote(project, staged):
+                    project.add_subject_columns(staged.payload["columns"])
+                    return promote_rows(staged, None, Subject, lambda data: Subject(project=project, metadata=data))
+
+                list_peak = traced(lambda: read_whole(path))
+                stage_time, staged = timed(lambda: stage(projects[0]))
+                promote_time, added = timed(lambda: promote(projects[0], staged))
+                if staged.payload != {"columns": COLUMNS, "rows": count} or added != count:
+                    raise CommandError(f"Staged {staged.payload}, promoted {added} of {count} rows")
+                if Subject.objects.filter(project=projects[0]).count() != count or next(pending_rows(staged), None):
+                    raise CommandError("Promoted subjects don't match the staged rows")
+
+                traced_upload = []
+                stage_peak = traced(lambda: traced_upload.append(stage(projects[1])))
+                promote_peak = traced(lambda: promote(projects[1], traced_upload[0]))
+                peaks.append(max(stage_peak, promote_peak))
+
+                self.stdout.write(
+                    f"{count:>8}{list_peak / 2 ** 20:>10.1f}{stage_time:>9.2f}{stage_peak / 2 ** 20:>11.1f}"
+                    f"{promote_time:>11.2f}{promote_peak / 2 ** 20:>13.1f}"
+                )
+
+        if len(peaks) > 1 and peaks[-1] > 2 * peaks[0] + 2 ** 20:
+            raise CommandError(f"Ingest memory grew with file size: {peaks}")
+        self.stdout.write(self.style.SUCCESS("Ingest memory stays bounded across file sizes"))
@@ -0,0 +1,91 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context, Template
+from django.test.utils import override_settings
+
+from core.management.benchmarks import benchmark_database, parse_counts
+from core.models import ProjectData, Subject
+from core.utils.subject_query import column_types, subject_page
+
+# The table body subject_data.html used to render for every subject
+ROWS_TEMPLATE = (
+    "{% for subject in subjects %}<tr><td>{{ subject.id }}</td>"
+    "{% for value in subject.metadata.values %}<td>{{ value }}</td>{% endfor %}</tr>{% endfor %}"
+)
+
+
+def synthetic_subjects(project, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    project.add_subject_columns(["sample", "age", "weight", "collected", "tissue"])
+    return [
+        Subject(project=project, metadata={
+            "sample": f"S{i}",
+            "age": str(rng.randint(1, 90)) if i % 11 else "",
+            "weight": f"{rng.uniform(40, 120):.1f}",
+            "collected": f"20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "tissue": rng.choice(["Liver", "HeLa", "Epithelial", "N/A"]),
+        })
+        for i in range(count)
+    ]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the subjects page: rendering every row into the table against one server-side page "
+        "(first, typed-sorted, filtered and ten pages deep) on synthetic cohorts; checks numeric order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subjects", default="1000,10000,100000", help="Comma-separated cohort sizes")
+
+    def handle(self, *args, **options):
+        with override_settings(DEBUG=False), benchmark_database():
+            owner = User.objects.create(username="benchmark")
+            self.stdout.write(
+                f"{'subjects':>9}{'render all s':>14}{'types s':>9}{'page ms':>9}"
+                f"{'sorted ms':>11}{'filtered ms':>13}{'page 10 ms':>12}"
+            )
+            for count in parse_counts(options["subjects"]):
+                project = ProjectData.objects.create(
+                    project_name=f"Benchmark {count}", owner=owner, number_of_groups=0
+                )
+                Subject.objects.bulk_create(synthetic_subjects(project, count), batch_size=2000)
+
+                # What subject_data_page used to do: every subject into the table
+                render_time, _ = timed(lambda: Template(ROWS_TEMPLATE).render(
+                    Context({"subjects": Subject.objects.filter(project=project)})
+                ))
+                types_time, types = timed(lambda: column_types(project))
+                if types["age"] != "integer" or types["weight"] != "float" or types["collected"] != "date":
+                    raise CommandError(f"Unexpected column types: {types}")
+
+                page_time, _ = timed(lambda: subject_page(project))
+                sorted_time, page = timed(lambda: subject_page(project, sort="age"))
+                ages = [int(row["values"][1]) for row in page["rows"]]
+                if ages != sorted(ages) or ages[0] != 1:
+                    raise CommandError(f"age isn't sorted numerically: {ages[:10]}")
+                filtered_time, _ = timed(lambda: subject_page(
+                    project, sort="weight", descending=True, filters=[("age", "gte", "50"), ("tissue", "contains", "liv")]
+                ))
+
+                def tenth_page():
+                    after = None
+                    for _ in range(10):
+                        after = subject_page(project, sort="collected", after=after)["next"]
+                    return after
+                deep_time, _ = timed(tenth_page)
+
+                self.stdout.write(
+                    f"{count:>9}{render_time:>14.2f}{types_time:>9.2f}{page_time * 1000:>9.1f}"
+                    f"{sorted_time * 1000:>11.1f}{filtered_time * 1000:>13.1f}{deep_time * 100:>12.1f}"
+                )
+        self.stdout.write(self.style.SUCCESS("Typed columns sort numerically"))
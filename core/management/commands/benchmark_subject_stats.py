@@ -0,0 +1,91 @@
+import random
+import time
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core.management.benchmarks import benchmark_database, best_of, parse_counts
+from core.models import ProjectData, Subject
+from core.utils.subject_stats import column_stats, rebuild_subject_stats, record_subjects, stat_value
+
+COLUMNS = ["sex", "treatment", "age", "weight"]
+
+
+def synthetic_values(rng: random.Random):
+    return [
+        rng.choice(["M", "F"]),
+        rng.choice(["A", "B", "placebo"]),
+        rng.choice(["", str(rng.randint(18, 90))]),
+        f"{rng.uniform(40, 120):.1f}",
+    ]
+
+
+def scanned_stats(project: ProjectData):
+    """The summary as computed before statistics were kept: every subject read into Python."""
+    counts = [Counter() for _ in COLUMNS]
+    nulls = [0] * len(COLUMNS)
+    for subject in Subject.objects.filter(project=project).select_related("project"):
+        row = subject.metadata
+        for position, column in enumerate(COLUMNS):
+            text = stat_value(row.get(column))
+            if text is None:
+                nulls[position] += 1
+            else:
+                counts[position][text] += 1
+    return [(len(c), n, c.most_common(1)[0] if c else None) for c, n in zip(counts, nulls)]
+
+
+def rounded(stats):
+    """column_stats with means rounded, as summing in another order can change the last digits."""
+    for column in stats:
+        if column["numeric"]:
+            column["numeric"]["mean"] = round(column["numeric"]["mean"], 6)
+    return stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a per-column subject summary computed by scanning every Subject against the "
+        "statistics kept up to date as subjects are added, and time that upkeep per batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subjects", type=parse_counts, default=[1000, 10000, 50000])
+        parser.add_argument("--batch", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        self.stdout.write(f"{'subjects':>9}{'scan':>12}{'stats':>12}{'upkeep/batch':>16}")
+        with override_settings(DEBUG=False), benchmark_database():
+            owner = User.objects.create(username="benchmark")
+            for count in options["subjects"]:
+                project = ProjectData.objects.create(project_name=f"Benchmark {count}", owner=owner, number_of_groups=0)
+                project.add_subject_columns(COLUMNS)
+
+                upkeep = []
+                for start in range(0, count, options["batch"]):
+                    rows = [synthetic_values(rng) for _ in range(min(options["batch"], count - start))]
+                    Subject.objects.bulk_create([Subject(project=project, values=values) for values in rows])
+                    began = time.perf_counter()
+                    record_subjects(project, rows)
+                    upkeep.append(time.perf_counter() - began)
+
+                scan_time, scanned = best_of(options["repeat"], lambda: scanned_stats(project))
+                stats_time, stats = best_of(options["repeat"], lambda: column_stats(project, top=1))
+                kept = [(c["distinct"], c["nulls"], tuple(c["top"][0]) if c["top"] else None) for c in stats]
+                if kept != scanned:
+                    raise CommandError(f"Kept statistics don't match a full scan at {count} subjects")
+                kept = rounded(column_stats(project))
+                rebuild_subject_stats(project)
+                if rounded(column_stats(project)) != kept:
+                    raise CommandError(f"Rebuilt statistics differ from kept ones at {count} subjects")
+
+                self.stdout.write(
+                    f"{count:>9}{scan_time * 1000:>9.1f} ms{stats_time * 1000:>9.1f} ms"
+                    f"{sum(upkeep) / len(upkeep) * 1000:>13.1f} ms"
+                )
+        self.stdout.write(self.style.SUCCESS("Kept statistics match a full scan"))
@@ -0,0 +1,104 @@
+import json
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.management.benchmarks import SAMPLE_VALUES, benchmark_database, best_of, format_mib, table_bytes
+from core.models import ProjectData, Subject
+from core.utils.subject_query import subject_page
+
+# Subject as created by 0001_initial: every row a JSON object keyed by the CSV header
+LEGACY_TABLE = "benchmark_legacy_subject"
+LEGACY_DDL = [
+    f'CREATE TABLE "{LEGACY_TABLE}" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "metadata" text NOT NULL, '
+    f'"project_id" bigint NOT NULL REFERENCES "core_projectdata" ("id") DEFERRABLE INITIALLY DEFERRED)',
+    f'CREATE INDEX "{LEGACY_TABLE}_project_id" ON "{LEGACY_TABLE}" ("project_id")',
+]
+
+# Header names like the ones lab cohort sheets carry
+HEADER_WORDS = ["Sample", "Collection", "Patient", "Tissue", "Storage", "Digestion", "Instrument", "Batch"]
+HEADER_KINDS = ["Identifier", "Date", "Temperature (C)", "Volume (uL)", "Concentration (ng/uL)", "Notes"]
+
+
+def header(count: int):
+    names = [f"{word} {kind}" for word in HEADER_WORDS for kind in HEADER_KINDS]
+    return [names[i % len(names)] + ("" if i < len(names) else f" {i // len(names) + 1}") for i in range(count)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Subject storage as JSON objects keyed by column name against positional value lists "
+        "with a per-project column table: table + index size and subject list load time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subjects", type=int, default=20000)
+        parser.add_argument("--columns", type=int, default=40)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        columns = header(options["columns"])
+        rows = [
+            {column: str(rng.choice(SAMPLE_VALUES)) for column in columns}
+            for _ in range(options["subjects"])
+        ]
+
+        with override_settings(DEBUG=False), benchmark_database():
+            owner = User.objects.create(username="benchmark")
+            project = ProjectData.objects.create(project_name="Benchmark", owner=owner, number_of_groups=0)
+            project.add_subject_columns(columns)
+            Subject.objects.bulk_create([Subject(project=project, metadata=row) for row in rows], batch_size=2000)
+
+            with connection.cursor() as cursor:
+                for statement in LEGACY_DDL:
+                    cursor.execute(statement)
+                cursor.executemany(
+                    f'INSERT INTO "{LEGACY_TABLE}" ("metadata", "project_id") VALUES (%s, %s)',
+                    [(json.dumps(row), project.id) for row in rows]
+                )
+                legacy_size = table_bytes(cursor, [LEGACY_TABLE])
+                positional_size = table_bytes(cursor, ["core_subject", "core_subjectcolumn"])
+
+            def legacy_list():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'SELECT "id", "metadata" FROM "{LEGACY_TABLE}" WHERE "project_id" = %s ORDER BY "id"',
+                        [project.id]
+                    )
+                    return [(subject_id, json.loads(metadata)) for subject_id, metadata in cursor.fetchall()]
+
+            def positional_list():
+                names = ProjectData.objects.get(id=project.id).subject_column_names()
+                values_rows = Subject.objects.filter(project=project).order_by("id").values_list("id", "values")
+                return [
+                    (subject_id, {name: value for name, value in zip(names, values) if value is not None})
+                    for subject_id, values in values_rows
+                ]
+
+            def model_list():
+                # Through Subject.metadata, as templates read it
+                fresh = ProjectData.objects.get(id=project.id)
+                return [(subject.id, subject.metadata) for subject in fresh.subjects.order_by("id")]
+
+            legacy_time, legacy = best_of(options["repeat"], legacy_list)
+            positional_time, positional = best_of(options["repeat"], positional_list)
+            model_time, model = best_of(options["repeat"], model_list)
+            if not [row for _, row in positional] == [row for _, row in model] == [row for _, row in legacy]:
+                raise CommandError("Positional rows don't read back as the original metadata")
+            page_time, page = best_of(options["repeat"], lambda: subject_page(project))
+            if [dict(zip(columns, row["values"])) for row in page["rows"]] != rows[:len(page["rows"])]:
+                raise CommandError("Subject page doesn't match the original metadata")
+
+        self.stdout.write(f"{options['subjects']} subjects x {len(columns)} columns")
+        self.stdout.write(f"{'JSON objects':<22}{format_mib(legacy_size)}   list all {legacy_time * 1000:>8.1f} ms")
+        self.stdout.write(
+            f"{'positional + columns':<22}{format_mib(positional_size)}   list all {positional_time * 1000:>8.1f} ms"
+            f"   first page {page_time * 1000:.1f} ms"
+        )
+        self.stdout.write(f"{'  via Subject.metadata':<36}list all {model_time * 1000:>8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Positional rows take {positional_size / legacy_size:.0%} of the space"))
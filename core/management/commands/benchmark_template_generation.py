@@ -0,0 +1,99 @@
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import load_workbook
+
+from core.management.benchmarks import best_of, group_names, parse_counts
+from core.utils.excel.excel_file_generation import ENGINE_XML, TEMPLATE_FILE, ExcelFileGenerator
+from core.utils.excel.project_data import FileReaderProjectData
+
+
+def generate_on_disk(generator: ExcelFileGenerator, project_data: FileReaderProjectData, directory: str) -> str:
+    """The old path: shutil.copy2 the template, reload it from disk, edit, save back to disk."""
+    date = datetime.datetime.now().replace(microsecond=0).isoformat().replace(":", "-")
+    path = os.path.join(directory, f"{project_data.get_name()}-{date}.xlsm")
+    shutil.copy2(os.path.join(generator.input_directory_path, TEMPLATE_FILE), path)
+    wb = load_workbook(path, keep_vba=True)
+    ws = wb["DataEntry"]
+    generator.add_dropdowns(ws)
+    generator.add_project_data(ws, project_data)
+    wb.save(path)
+    return path
+
+
+def color_key(color):
+    return None if color is None else (color.type, color.value, round(color.tint or 0, 6))
+
+
+def snapshot(file, last_col: int):
+    """What a generated workbook looks like through openpyxl: DataEntry cells, styles and validations."""
+    wb = load_workbook(file, keep_vba=True)
+    ws = wb["DataEntry"]
+    cells = {}
+    for row in ws.iter_rows(min_row=1, max_row=90, max_col=last_col):
+        for cell in row:
+            cells[cell.coordinate] = (
+                cell.value,
+                cell.fill.fill_type, color_key(cell.fill.fgColor), color_key(cell.fill.bgColor),
+                tuple(getattr(cell.border, side).style for side in ("left", "right", "top", "bottom")),
+                cell.protection.locked,
+                cell.font.b, cell.font.sz,
+                cell.alignment.horizontal, cell.number_format,
+            )
+    validations = sorted(
+        (str(dv.sqref), dv.type, (dv.formula1 or "").lstrip("="), bool(dv.allow_blank))
+        for dv in ws.data_validations.dataValidation
+    )
+    source = [tuple(row) for row in wb["Source"].iter_rows(values_only=True)]
+    return cells, validations, source, wb.vba_archive is not None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time template generation: copy + reload + save on disk, cached template bytes through openpyxl "
+        "into BytesIO, and the zip/XML patching engine; checks the engines' outputs match through openpyxl."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", default="3,12,50", help="Comma-separated group counts")
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        generator = ExcelFileGenerator()
+        patcher = ExcelFileGenerator(engine=ENGINE_XML)
+
+        self.stdout.write(f"{'groups':>7}{'disk ms':>10}{'openpyxl ms':>13}{'xml ms':>9}{'openpyxl B':>12}{'xml B':>9}")
+        with tempfile.TemporaryDirectory() as directory:
+            for count in parse_counts(options["groups"]):
+                project_data = FileReaderProjectData("Benchmark & <Co>", "benchmark", "", group_names(count))
+                disk_time, _ = best_of(
+                    options["repeat"], lambda: generate_on_disk(generator, project_data, directory)
+                )
+                memory_time, buffer = best_of(
+                    options["repeat"], lambda: generator.make_new_workbook_from_template(project_data)
+                )
+                xml_time, patched = best_of(
+                    options["repeat"], lambda: patcher.make_new_workbook_from_template(project_data)
+                )
+                openpyxl_bytes, xml_bytes = buffer.getvalue(), patched.getvalue()
+
+                last_col = 3 + count
+                expected = snapshot(io.BytesIO(openpyxl_bytes), last_col)
+                got = snapshot(io.BytesIO(xml_bytes), last_col)
+                if got != expected:
+                    diff = [k for k in expected[0] if expected[0][k] != got[0].get(k)][:5]
+                    raise CommandError(f"xml engine output differs from openpyxl's ({count} groups): {diff or got[1:]}")
+                if zipfile.ZipFile(io.BytesIO(xml_bytes)).testzip() is not None:
+                    raise CommandError("xml engine wrote a corrupt zip")
+
+                self.stdout.write(
+                    f"{count:>7}{disk_time * 1000:>10.1f}{memory_time * 1000:>13.1f}{xml_time * 1000:>9.2f}"
+                    f"{len(openpyxl_bytes):>12}{len(xml_bytes):>9}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Engines agree"))
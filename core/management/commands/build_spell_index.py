@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.utils.excel.file_reader import SPELL_CACHE, TECH_TERMS
+from core.utils.excel.parse_cache import invalidate_parse_cache
+from core.utils.excel.spell_index import INDEX_PATH, SymSpellIndex
+
+
+def current_fingerprint(path: str):
+    """Fingerprint of the index already on disk, or None."""
+    try:
+        return SymSpellIndex.load(path).fingerprint
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the memory-mapped spell-correction index used by FileReader. "
+        "Run it at deploy time so workers only ever map the compiled file."
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        previous = current_fingerprint(INDEX_PATH)
+        SymSpellIndex.build_from_spellchecker(TECH_TERMS, INDEX_PATH)
+        index = SymSpellIndex.load(INDEX_PATH)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {index.word_count} words ({len(index.deletes)} deletes, "
+            f"{os.path.getsize(INDEX_PATH) / 2 ** 20:.1f} MiB) "
+            f"in {time.perf_counter() - start:.1f}s -> {INDEX_PATH}"
+        ))
+
+        # Corrections cached for an older index are never valid again; workers don't purge them themselves
+        purged = SPELL_CACHE.purge_other_namespaces()
+        if purged:
+            self.stdout.write(f"Dropped {purged} spell-check results cached for other indexes.")
+
+        # Previews parsed against another index are keyed on its fingerprint and can't be hit again
+        if previous is not None and previous != index.fingerprint:
+            removed = invalidate_parse_cache()
+            self.stdout.write(f"Index changed; dropped {removed} cached previews.")
@@ -0,0 +1,48 @@
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.bulk_import import import_workbooks
+
+
+class Command(BaseCommand):
+    help = (
+        "Import filled-in metadata workbooks (.xlsm/.xlsx) from a directory or zip as new projects. "
+        "Groups come from each sheet's group name row. Already imported workbooks are skipped, "
+        "so an interrupted run can simply be started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory (searched recursively) or zip of workbooks")
+        parser.add_argument("--owner", required=True, help="Username that will own the imported projects")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parser processes")
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(username=options["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['owner']}")
+
+        def report(result, project):
+            if project:
+                self.stdout.write(
+                    f"OK      {result['name']} -> project {project.id} ({project.number_of_groups} groups, "
+                    f"{result['typos']} possible typos, {result['seconds']:.2f}s)"
+                )
+            else:
+                self.stdout.write(self.style.ERROR(f"FAILED  {result['name']}: {result['message']}"))
+
+        try:
+            stats = import_workbooks(options["source"], owner, workers=options["workers"], report=report)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        processed = stats["imported"] + stats["failed"]
+        rate = processed / stats["seconds"] if stats["seconds"] else 0.0
+        summary = (
+            f"{stats['found']} workbook(s): {stats['imported']} imported, {stats['failed']} failed, "
+            f"{stats['skipped']} already imported or duplicate; "
+            f"{stats['seconds']:.1f}s ({rate:.1f} files/s)"
+        )
+        self.stdout.write(self.style.ERROR(summary) if stats["failed"] else self.style.SUCCESS(summary))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.excel.parse_cache import PARSE_CACHE, invalidate_parse_cache
+
+
+class Command(BaseCommand):
+    help = "Show or clear the cache of parsed Excel previews (keyed by file hash, groups and reader version)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete every cached preview")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            removed = invalidate_parse_cache()
+            self.stdout.write(self.style.SUCCESS(f"Parse cache cleared ({removed} entries)."))
+
+        stats = PARSE_CACHE.stats()
+        self.stdout.write(f"Path: {PARSE_CACHE.directory}")
+        if not stats["available"]:
+            self.stdout.write(self.style.WARNING("Cache directory is not usable; previews are not cached."))
+            return
+        self.stdout.write(f"Entries: {stats['entries']} ({stats['bytes'] / 2 ** 20:.1f} of "
+                          f"{stats['max_bytes'] / 2 ** 20:.0f} MiB)")
+        self.stdout.write(f"Hits: {stats['hits']}  Misses: {stats['misses']}  "
+                          f"Hit rate: {stats['hit_rate']:.1%}  Evictions: {stats['evictions']}")
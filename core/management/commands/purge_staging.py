@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.excel.parse_jobs import purge_old_jobs
+from core.utils.staging import purge_expired_staging
+
+
+class Command(BaseCommand):
+    help = "Delete expired upload previews (StagedUpload rows and old ParseJobs). run_parse_worker also does this periodically."
+
+    def handle(self, *args, **options):
+        uploads = purge_expired_staging()
+        jobs = purge_old_jobs()
+        self.stdout.write(self.style.SUCCESS(f"Removed {uploads} staged upload(s) and {jobs} parse job(s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import ProjectData
+from core.utils.subject_stats import rebuild_subject_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized subject column statistics of every project (or the given ones)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_ids", nargs="*", type=int)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        projects = ProjectData.objects.order_by("id")
+        if options["project_ids"]:
+            projects = projects.filter(id__in=options["project_ids"])
+            missing = set(options["project_ids"]) - set(projects.values_list("id", flat=True))
+            if missing:
+                raise CommandError(f"No project with id {', '.join(map(str, sorted(missing)))}")
+
+        total = 0
+        for project in projects:
+            total += rebuild_subject_stats(project, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Subject statistics rebuilt from {total} subjects."))
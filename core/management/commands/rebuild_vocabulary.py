@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.excel.vocabulary import rebuild_vocabulary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the learned spell-check vocabulary from every confirmed GroupSubData value."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        written = rebuild_vocabulary(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Vocabulary rebuilt with {written} project and global tokens."))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.utils.excel.parse_jobs import purge_old_jobs, run_next_job
+from core.utils.staging import purge_expired_staging
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued Excel preview parses (ParseJob rows). "
+        "Run one or more of these next to the web server; no broker is needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process the queue until empty, then exit")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument(
+            "--purge-interval", type=float, default=600.0,
+            help="Seconds between removing expired previews (see purge_staging)"
+        )
+        parser.add_argument(
+            "--spell-workers", type=int, default=1,
+            help="Processes used to spell check the distinct tokens of very large sheets"
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        last_purge = float("-inf")
+        try:
+            while True:
+                if time.monotonic() - last_purge >= options["purge_interval"]:
+                    purge_expired_staging()
+                    purge_old_jobs()
+                    last_purge = time.monotonic()
+                job = run_next_job(options["spell_workers"])
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                processed += 1
+                self.stdout.write(f"Job {job.id} ({job.project.project_name}): {job.status}")
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)"))
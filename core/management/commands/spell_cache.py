@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.excel.file_reader import SPELL_CACHE
+
+
+class Command(BaseCommand):
+    help = "Show or clear the shared spell-check result cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete every cached spell-check result")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            SPELL_CACHE.clear()
+            self.stdout.write(self.style.SUCCESS("Spell cache cleared."))
+
+        self.stdout.write(f"Path: {SPELL_CACHE.path}")
+        self.stdout.write(f"Cached words on disk: {SPELL_CACHE.disk_entries()}")
+        self.stdout.write(f"On-disk size cap (all indexes): {SPELL_CACHE.max_disk_entries}")
+        self.stdout.write(f"In-process LRU size cap: {SPELL_CACHE.max_entries}")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.excel.workbook_cache import WORKBOOK_CACHE
+
+
+class Command(BaseCommand):
+    help = "Show or clear the cache of generated starter workbooks (keyed by template, project name and groups)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete every cached workbook")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            removed = WORKBOOK_CACHE.clear()
+            self.stdout.write(self.style.SUCCESS(f"Workbook cache cleared ({removed} entries)."))
+
+        stats = WORKBOOK_CACHE.stats()
+        self.stdout.write(f"Path: {WORKBOOK_CACHE.directory}")
+        if not stats["available"]:
+            self.stdout.write(self.style.WARNING("Cache directory is not usable; workbooks are not cached."))
+            return
+        self.stdout.write(f"Entries: {stats['entries']} ({stats['bytes'] / 2 ** 20:.1f} of "
+                          f"{stats['max_bytes'] / 2 ** 20:.0f} MiB)")
+        self.stdout.write(f"Hits: {stats['hits']}  Misses: {stats['misses']}  "
+                          f"Hit rate: {stats['hit_rate']:.1%}  Evictions: {stats['evictions']}")
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VocabularyToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=200)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vocabulary', to='core.projectdata')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'token'), name='unique_project_vocabulary_token'), models.UniqueConstraint(condition=models.Q(('project__isnull', True)), fields=('token',), name='unique_global_vocabulary_token')],
+            },
+        ),
+    ]
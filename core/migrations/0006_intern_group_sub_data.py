@@ -0,0 +1,106 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def intern_strings(apps, schema_editor):
+    GroupSubData = apps.get_model("core", "GroupSubData")
+    DataCategory = apps.get_model("core", "DataCategory")
+    DataLabel = apps.get_model("core", "DataLabel")
+
+    categories = GroupSubData.objects.values_list("category", flat=True).distinct()
+    DataCategory.objects.bulk_create([DataCategory(name=name) for name in categories], batch_size=BATCH_SIZE)
+    labels = GroupSubData.objects.values_list("label", flat=True).distinct()
+    DataLabel.objects.bulk_create([DataLabel(text=text) for text in labels], batch_size=BATCH_SIZE)
+
+    # One UPDATE per distinct string rather than one per row
+    for category_id, name in DataCategory.objects.values_list("id", "name"):
+        GroupSubData.objects.filter(category=name).update(category_ref_id=category_id)
+    for label_id, text in DataLabel.objects.values_list("id", "text"):
+        GroupSubData.objects.filter(label=text).update(label_ref_id=label_id)
+
+
+def restore_strings(apps, schema_editor):
+    GroupSubData = apps.get_model("core", "GroupSubData")
+    DataCategory = apps.get_model("core", "DataCategory")
+    DataLabel = apps.get_model("core", "DataLabel")
+
+    for category_id, name in DataCategory.objects.values_list("id", "name"):
+        GroupSubData.objects.filter(category_ref_id=category_id).update(category=name)
+    for label_id, text in DataLabel.objects.values_list("id", "text"):
+        GroupSubData.objects.filter(label_ref_id=label_id).update(label=text)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_stagedupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DataLabel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='groupsubdata',
+            name='category_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, db_index=False, related_name='+', to='core.datacategory'),
+        ),
+        migrations.AddField(
+            model_name='groupsubdata',
+            name='label_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, db_index=False, related_name='+', to='core.datalabel'),
+        ),
+        # Old text columns must stay nullable while the reverse migration refills them
+        migrations.AlterField(
+            model_name='groupsubdata',
+            name='category',
+            field=models.CharField(max_length=200, null=True),
+        ),
+        migrations.AlterField(
+            model_name='groupsubdata',
+            name='label',
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(intern_strings, restore_strings),
+        migrations.RemoveField(
+            model_name='groupsubdata',
+            name='category',
+        ),
+        migrations.RemoveField(
+            model_name='groupsubdata',
+            name='label',
+        ),
+        migrations.RenameField(
+            model_name='groupsubdata',
+            old_name='category_ref',
+            new_name='category',
+        ),
+        migrations.RenameField(
+            model_name='groupsubdata',
+            old_name='label_ref',
+            new_name='label',
+        ),
+        migrations.AlterField(
+            model_name='groupsubdata',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, db_index=False, related_name='+', to='core.datacategory'),
+        ),
+        migrations.AlterField(
+            model_name='groupsubdata',
+            name='label',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, db_index=False, related_name='+', to='core.datalabel'),
+        ),
+    ]
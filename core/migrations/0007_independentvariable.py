@@ -0,0 +1,62 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def copy_to_table(apps, schema_editor):
+    ProjectData = apps.get_model("core", "ProjectData")
+    DataLabel = apps.get_model("core", "DataLabel")
+    IndependentVariable = apps.get_model("core", "IndependentVariable")
+
+    rows = []
+    for project_id, variables in ProjectData.objects.exclude(independent_variable={}).values_list(
+        "id", "independent_variable"
+    ):
+        for label, values in (variables or {}).items():
+            label_id = DataLabel.objects.get_or_create(text=label)[0].id
+            rows.append(IndependentVariable(
+                project_id=project_id, label_id=label_id, values=values, distinct_count=len(values)
+            ))
+    IndependentVariable.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def copy_to_json(apps, schema_editor):
+    ProjectData = apps.get_model("core", "ProjectData")
+    IndependentVariable = apps.get_model("core", "IndependentVariable")
+
+    variables = {}
+    for project_id, label, values in IndependentVariable.objects.order_by("id").values_list(
+        "project_id", "label__text", "values"
+    ):
+        variables.setdefault(project_id, {})[label] = values
+    for project_id, project_variables in variables.items():
+        ProjectData.objects.filter(id=project_id).update(independent_variable=project_variables)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_intern_group_sub_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndependentVariable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('values', models.JSONField(default=list)),
+                ('distinct_count', models.PositiveIntegerField()),
+                ('label', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='independent_variables', to='core.datalabel')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='independent_variables', to='core.projectdata')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'label'), name='unique_project_independent_variable')],
+            },
+        ),
+        migrations.RunPython(copy_to_table, copy_to_json),
+        migrations.RemoveField(
+            model_name='projectdata',
+            name='independent_variable',
+        ),
+    ]
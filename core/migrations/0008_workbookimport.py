@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_independentvariable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkbookImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('source', models.CharField(max_length=500)),
+                ('status', models.CharField(choices=[('done', 'Done'), ('failed', 'Failed')], max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='workbook_imports', to='core.projectdata')),
+            ],
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:37
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def split_payloads(apps, schema_editor):
+    """Subject CSV previews kept their rows in payload; move them to StagedRow."""
+    StagedUpload = apps.get_model("core", "StagedUpload")
+    StagedRow = apps.get_model("core", "StagedRow")
+
+    for staged in StagedUpload.objects.filter(kind="subject_csv"):
+        rows = staged.payload if isinstance(staged.payload, list) else []
+        StagedRow.objects.bulk_create(
+            [StagedRow(upload=staged, position=position, data=data) for position, data in enumerate(rows)],
+            batch_size=BATCH_SIZE
+        )
+        staged.payload = {"columns": list(rows[0]) if rows else [], "rows": len(rows)}
+        staged.save(update_fields=["payload"])
+
+
+def join_payloads(apps, schema_editor):
+    StagedUpload = apps.get_model("core", "StagedUpload")
+    StagedRow = apps.get_model("core", "StagedRow")
+
+    for staged in StagedUpload.objects.filter(kind="subject_csv"):
+        added = bytes(staged.added)
+        staged.payload = [
+            data for position, data in
+            StagedRow.objects.filter(upload=staged).order_by("position").values_list("position", "data")
+            if not (position >> 3 < len(added) and added[position >> 3] >> (position & 7) & 1)
+        ]
+        staged.save(update_fields=["payload"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_workbookimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stagedupload',
+            name='added',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.CreateModel(
+            name='StagedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='core.stagedupload')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('upload', 'position'), name='unique_staged_row_position')],
+            },
+        ),
+        migrations.RunPython(split_payloads, join_payloads),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def to_positional(apps, schema_editor):
+    """Lay each project's metadata dicts out on its columns, in first-seen key order."""
+    Subject = apps.get_model("core", "Subject")
+    SubjectColumn = apps.get_model("core", "SubjectColumn")
+
+    project_ids = Subject.objects.values_list("project_id", flat=True).distinct()
+    for project_id in project_ids:
+        positions = {}
+        batch = []
+        for subject in Subject.objects.filter(project_id=project_id).order_by("id").only("id", "metadata").iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            row = subject.metadata or {}
+            for name in row:
+                positions.setdefault(name, len(positions))
+            values = [None] * (max((positions[name] for name in row), default=-1) + 1)
+            for name, value in row.items():
+                values[positions[name]] = value
+            subject.values = values
+            batch.append(subject)
+            if len(batch) == BATCH_SIZE:
+                Subject.objects.bulk_update(batch, ["values"])
+                batch = []
+        Subject.objects.bulk_update(batch, ["values"])
+        SubjectColumn.objects.bulk_create(
+            [SubjectColumn(project_id=project_id, name=name, position=i) for name, i in positions.items()]
+        )
+
+
+def to_dicts(apps, schema_editor):
+    Subject = apps.get_model("core", "Subject")
+    SubjectColumn = apps.get_model("core", "SubjectColumn")
+
+    project_ids = Subject.objects.values_list("project_id", flat=True).distinct()
+    for project_id in project_ids:
+        names = list(SubjectColumn.objects.filter(project_id=project_id).order_by("position").values_list("name", flat=True))
+        batch = []
+        for subject in Subject.objects.filter(project_id=project_id).order_by("id").only("id", "values").iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            subject.metadata = {
+                name: value for name, value in zip(names, subject.values or []) if value is not None
+            }
+            batch.append(subject)
+            if len(batch) == BATCH_SIZE:
+                Subject.objects.bulk_update(batch, ["metadata"])
+                batch = []
+        Subject.objects.bulk_update(batch, ["metadata"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_stagedrow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectColumn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField()),
+                ('position', models.PositiveIntegerField()),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_columns', to='core.projectdata')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'position'), name='unique_subject_column_position'), models.UniqueConstraint(fields=('project', 'name'), name='unique_subject_column_name')],
+            },
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='values',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(to_positional, to_dicts),
+        migrations.RemoveField(
+            model_name='subject',
+            name='metadata',
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:49
+
+import django.db.models.deletion
+import re
+from collections import Counter
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# As in core.utils.subject_query.value_type
+_NUMBER = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?")
+
+
+def compute_stats(apps, schema_editor):
+    """Fill the new statistics from the subjects already stored."""
+    Subject = apps.get_model("core", "Subject")
+    SubjectColumn = apps.get_model("core", "SubjectColumn")
+    SubjectValueCount = apps.get_model("core", "SubjectValueCount")
+
+    project_ids = SubjectColumn.objects.values_list("project_id", flat=True).distinct()
+    for project_id in project_ids:
+        columns = list(SubjectColumn.objects.filter(project_id=project_id).order_by("position"))
+        counts = [Counter() for _ in columns]
+        nulls = [0] * len(columns)
+        numbers = [[] for _ in columns]
+        rows = Subject.objects.filter(project_id=project_id).values_list("values", flat=True)
+        for values in rows.iterator(chunk_size=BATCH_SIZE):
+            values = values or []
+            for position in range(len(columns)):
+                value = values[position] if position < len(values) else None
+                if value is None or not str(value).strip():
+                    nulls[position] += 1
+                    continue
+                text = str(value)
+                counts[position][text] += 1
+                if not isinstance(value, bool) and _NUMBER.fullmatch(text.strip()):
+                    numbers[position].append(float(text))
+        for column, column_counts, column_nulls, column_numbers in zip(columns, counts, nulls, numbers):
+            column.value_count = sum(column_counts.values())
+            column.null_count = column_nulls
+            column.distinct_count = len(column_counts)
+            column.numeric_count = len(column_numbers)
+            column.numeric_sum = sum(column_numbers)
+            column.numeric_min = min(column_numbers, default=None)
+            column.numeric_max = max(column_numbers, default=None)
+            SubjectValueCount.objects.bulk_create(
+                [SubjectValueCount(column=column, value=v, count=n) for v, n in column_counts.items()],
+                batch_size=BATCH_SIZE
+            )
+        SubjectColumn.objects.bulk_update(columns, [
+            "value_count", "null_count", "distinct_count",
+            "numeric_count", "numeric_sum", "numeric_min", "numeric_max",
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_subject_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subjectcolumn',
+            name='distinct_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subjectcolumn',
+            name='null_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subjectcolumn',
+            name='numeric_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subjectcolumn',
+            name='numeric_max',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='subjectcolumn',
+            name='numeric_min',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='subjectcolumn',
+            name='numeric_sum',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subjectcolumn',
+            name='value_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SubjectValueCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.TextField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('column', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='value_counts', to='core.subjectcolumn')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['column', '-count'], name='subject_value_count_top')],
+                'constraints': [models.UniqueConstraint(fields=('column', 'value'), name='unique_subject_value_count')],
+            },
+        ),
+        migrations.RunPython(compute_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:54
+
+import hashlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+# As in core.models.subject_row_hash
+def subject_row_hash(row):
+    parts = []
+    for name, value in sorted((str(name).strip(), "" if value is None else str(value).strip()) for name, value in row.items()):
+        if value:
+            parts += [name, value]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def hash_rows(apps, schema_editor):
+    Subject = apps.get_model("core", "Subject")
+    SubjectColumn = apps.get_model("core", "SubjectColumn")
+
+    project_ids = Subject.objects.values_list("project_id", flat=True).distinct()
+    for project_id in project_ids:
+        names = list(SubjectColumn.objects.filter(project_id=project_id).order_by("position").values_list("name", flat=True))
+        batch = []
+        for subject in Subject.objects.filter(project_id=project_id).order_by("id").only("id", "values").iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            subject.row_hash = subject_row_hash(dict(zip(names, subject.values or [])))
+            batch.append(subject)
+            if len(batch) == BATCH_SIZE:
+                Subject.objects.bulk_update(batch, ["row_hash"])
+                batch = []
+        Subject.objects.bulk_update(batch, ["row_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_subject_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='row_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['project', 'row_hash'], name='subject_row_hash'),
+        ),
+        migrations.RunPython(hash_rows, migrations.RunPython.noop),
+    ]
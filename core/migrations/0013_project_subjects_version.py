@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_subject_row_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectdata',
+            name='subjects_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
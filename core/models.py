@@ -1,7 +1,10 @@
+import hashlib
 import uuid
 from importlib.metadata import metadata
+from typing import List
 
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -11,8 +14,10 @@ class ProjectData(models.Model):
     description = models.TextField(blank=True)
     number_of_groups = models.PositiveIntegerField()
     group_names = models.TextField(help_text="Tab-separated group names")
-    independent_variable = models.JSONField(default=dict)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every subject write (see core.utils.subject_stats.record_subjects), so cached
+    # per-project subject summaries such as subject_query.column_types know when to refresh
+    subjects_version = models.PositiveIntegerField(default=0)
 
     def is_owner(self, user):
         return self.owner == user
@@ -28,6 +33,40 @@ class ProjectData(models.Model):
         """Owner and collaborators can edit; everyone can view."""
         return self.get_role(user) in ["owner", "collaborator"]
 
+    def subject_column_names(self) -> List[str]:
+        """Names of the project's subject columns, by position; read once per instance."""
+        names = self.__dict__.get("_subject_column_names")
+        if names is None:
+            names = self._subject_column_names = list(
+                self.subject_columns.order_by("position").values_list("name", flat=True)
+            )
+        return names
+
+    def subject_column_positions(self, names: List[str]) -> List[int]:
+        """Positions of these subject columns; raises ValueError for a column the project doesn't have."""
+        known = self.subject_column_names()
+        positions = self.__dict__.get("_subject_column_positions")
+        if positions is None or len(positions) != len(known):
+            positions = self._subject_column_positions = {name: i for i, name in enumerate(known)}
+        missing = [name for name in names if name not in positions]
+        if missing:
+            raise ValueError(f"Unknown subject columns: {missing} (see add_subject_columns)")
+        return [positions[name] for name in names]
+
+    def add_subject_columns(self, names: List[str]) -> List[str]:
+        """Add the subject columns the project doesn't have yet, at the end; returns the new names."""
+        known = self.subject_column_names()
+        new = [name for name in dict.fromkeys(names) if name not in known]
+        if new:
+            # Subjects already stored have no value in a new column
+            stored = self.subjects.count()
+            SubjectColumn.objects.bulk_create([
+                SubjectColumn(project=self, name=name, position=len(known) + i, null_count=stored)
+                for i, name in enumerate(new)
+            ])
+            known.extend(new)
+        return new
+
     def __str__(self):
         return f"{self.project_name} ({self.owner.username})"
 
@@ -57,16 +96,270 @@ class GroupData(models.Model):
         return f"{self.group_name}"
 
 
+class DataCategory(models.Model):
+    """Interned GroupSubData category name (Sample ID, Sample Prep, ...)."""
+    name = models.CharField(max_length=200, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class DataLabel(models.Model):
+    """Interned GroupSubData label text; the same few dozen repeat for every group of every project."""
+    text = models.TextField(unique=True)
+
+    def __str__(self):
+        return self.text
+
+
 class GroupSubData(models.Model):
     group = models.ForeignKey(GroupData, on_delete=models.CASCADE, related_name="group_sub_data")
-    category = models.CharField(max_length=200)
-    label = models.TextField()
+    # No FK indexes: rows are only ever read per group, and the indexes would cost
+    # more space than interning the strings saves
+    category = models.ForeignKey(DataCategory, on_delete=models.PROTECT, related_name="+", db_index=False)
+    label = models.ForeignKey(DataLabel, on_delete=models.PROTECT, related_name="+", db_index=False)
     value = models.TextField(null=True)
 
 
+class IndependentVariable(models.Model):
+    """
+    Label whose value differs between a project's groups, with its distinct values.
+    Indexed both ways: what varies in a project, and which projects vary a label.
+    """
+    project = models.ForeignKey(ProjectData, on_delete=models.CASCADE, related_name="independent_variables")
+    label = models.ForeignKey(DataLabel, on_delete=models.PROTECT, related_name="independent_variables")
+    values = models.JSONField(default=list)  # distinct values, as strings
+    distinct_count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["project", "label"], name="unique_project_independent_variable"),
+        ]
+
+    def __str__(self):
+        return f"{self.label} ({self.distinct_count} values)"
+
+
+class VocabularyToken(models.Model):
+    """
+    Token seen in confirmed GroupSubData values that the spell checker doesn't know.
+    project=None rows are the global (all projects) scope.
+    """
+    project = models.ForeignKey(
+        ProjectData, on_delete=models.CASCADE, null=True, blank=True, related_name="vocabulary"
+    )
+    token = models.CharField(max_length=200)  # stored lowercase
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["project", "token"], name="unique_project_vocabulary_token"),
+            models.UniqueConstraint(
+                fields=["token"], condition=models.Q(project__isnull=True), name="unique_global_vocabulary_token"
+            ),
+        ]
+
+    def __str__(self):
+        scope = self.project_id or "global"
+        return f"{self.token} ({scope}: {self.count})"
+
+
+class ParseJob(models.Model):
+    """
+    Uploaded workbook waiting to be parsed by `manage.py run_parse_worker`.
+    result holds the JSON preview payload (see FileReaderResponse.to_json_dict) once done.
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    project = models.ForeignKey(ProjectData, on_delete=models.CASCADE, related_name="parse_jobs")
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    file = models.FileField(upload_to="parse_jobs/", blank=True)
+    cache_key = models.CharField(max_length=64, blank=True)  # see parse_cache.parse_cache_key
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    stage = models.CharField(max_length=200, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"], name="parse_job_queue_idx")]
+
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    def __str__(self):
+        return f"Parse job {self.id} for {self.project.project_name} ({self.status})"
+
+
+class WorkbookImport(models.Model):
+    """
+    Checkpoint for `manage.py import_workbooks`: one row per workbook (by content hash).
+    Done rows are committed together with their project, so a rerun skips exactly those.
+    """
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    digest = models.CharField(max_length=64, unique=True)  # sha256 of the workbook
+    source = models.CharField(max_length=500)  # path inside the imported directory or zip
+    project = models.ForeignKey(
+        ProjectData, on_delete=models.SET_NULL, null=True, blank=True, related_name="workbook_imports"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} ({self.status})"
+
+
+class StagedUpload(models.Model):
+    """
+    Upload preview kept server-side until the user confirms it; the session only
+    carries its id. Expired rows are removed by core.utils.staging.purge_expired_staging.
+    """
+    KIND_SUBJECT_CSV = "subject_csv"
+    KIND_CHOICES = [
+        (KIND_SUBJECT_CSV, "Subject CSV"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="staged_uploads")
+    project = models.ForeignKey(ProjectData, on_delete=models.CASCADE, related_name="staged_uploads")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    # Bitmap of the StagedRows already confirmed (bit i = row i); see core.utils.staging.RowBitmap
+    added = models.BinaryField(default=b"")
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} for {self.project.project_name} (expires {self.expires_at})"
+
+
+class StagedRow(models.Model):
+    """One row of a StagedUpload (e.g. a subject CSV line), written in chunks as the upload is read."""
+    upload = models.ForeignKey(StagedUpload, on_delete=models.CASCADE, related_name="rows")
+    position = models.PositiveIntegerField()  # 0-based row number in the upload
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["upload", "position"], name="unique_staged_row_position"),
+        ]
+
+    def __str__(self):
+        return f"Row {self.position + 1} of {self.upload_id}"
+
+
+class SubjectColumn(models.Model):
+    """
+    A column of a project's subject rows; Subject.values holds one value per position.
+    The counts below are maintained by core.utils.subject_stats as subjects are added and deleted.
+    """
+    project = models.ForeignKey(ProjectData, on_delete=models.CASCADE, related_name="subject_columns")
+    name = models.TextField()
+    position = models.PositiveIntegerField()
+    value_count = models.PositiveIntegerField(default=0)  # subjects with a value here
+    null_count = models.PositiveIntegerField(default=0)  # subjects with no (or a blank) value here
+    distinct_count = models.PositiveIntegerField(default=0)  # SubjectValueCount rows
+    numeric_count = models.PositiveIntegerField(default=0)  # values that parse as numbers
+    numeric_sum = models.FloatField(default=0)
+    numeric_min = models.FloatField(null=True, blank=True)
+    numeric_max = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["project", "position"], name="unique_subject_column_position"),
+            models.UniqueConstraint(fields=["project", "name"], name="unique_subject_column_name"),
+        ]
+
+    def numeric_mean(self):
+        return self.numeric_sum / self.numeric_count if self.numeric_count else None
+
+    def __str__(self):
+        return f"{self.name} ({self.position})"
+
+
+class SubjectValueCount(models.Model):
+    """How many of a project's subjects hold each distinct value of a column."""
+    column = models.ForeignKey(SubjectColumn, on_delete=models.CASCADE, related_name="value_counts")
+    value = models.TextField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["column", "value"], name="unique_subject_value_count"),
+        ]
+        indexes = [
+            models.Index(fields=["column", "-count"], name="subject_value_count_top"),
+        ]
+
+    def __str__(self):
+        return f"{self.value}: {self.count}"
+
+
+def subject_row_hash(row: dict) -> str:
+    """
+    Hash of a subject row ({column: value}) for duplicate detection: values are compared
+    as stripped text, blanks are left out and column order doesn't matter.
+    """
+    parts = []
+    for name, value in sorted((str(name).strip(), "" if value is None else str(value).strip()) for name, value in row.items()):
+        if value:
+            parts += [name, value]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
 class Subject(models.Model):
     project = models.ForeignKey(ProjectData, on_delete=models.CASCADE, related_name="subjects")
-    metadata = models.JSONField(default=dict, blank=True)  # store CSV row
+    # The CSV row as a list laid out on the project's SubjectColumns, so header names aren't repeated per row
+    values = models.JSONField(default=list, blank=True)
+    # subject_row_hash of the row, set with it by the metadata setter; see core.utils.subject_dedup
+    row_hash = models.CharField(max_length=64, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "row_hash"], name="subject_row_hash"),
+        ]
+
+    @property
+    def metadata(self) -> dict:
+        """The row as {column: value}, like the uploaded CSV row (columns it doesn't have are left out)."""
+        return {
+            name: value
+            for name, value in zip(self.project.subject_column_names(), self.values)
+            if value is not None
+        }
+
+    @metadata.setter
+    def metadata(self, row: dict):
+        """
+        Lay the row out on the project's SubjectColumns. Only looks the columns up: they must
+        exist already (ProjectData.add_subject_columns), otherwise ValueError is raised.
+        """
+        row = row or {}
+        positions = self.project.subject_column_positions(list(row))
+        values = [None] * (max(positions) + 1 if positions else 0)
+        for position, value in zip(positions, row.values()):
+            values[position] = value
+        self.values = values
+        self.row_hash = subject_row_hash(row)
 
     def __str__(self):
         return f"Subject: {str(self.metadata)}"
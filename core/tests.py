@@ -1,3 +1,276 @@
+import io
+import os
+import random
+import re
+import tempfile
+import zipfile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+from openpyxl import load_workbook
+from spellchecker import SpellChecker
+
+from core.management.benchmarks import SAMPLE_VALUES, make_typo
+from core.models import ProjectData, ProjectMembership, Subject, SubjectColumn, VocabularyToken
+from core.utils.excel.excel_file_generation import ENGINE_OPENPYXL, ENGINE_XML, ExcelFileGenerator
+from core.utils.excel.project_data import FileReaderProjectData
+from core.utils.excel.spell_cache import SpellCache
+from core.utils.excel.spell_index import SymSpellIndex
+from core.utils.excel.vocabulary import GLOBAL_MIN_COUNT, known_vocabulary
+from core.utils.subject_dedup import SubjectIngest
+from core.utils.subject_query import TYPE_INTEGER, TYPE_STRING, column_types, subject_page
+from core.utils.subject_stats import record_subjects
+
+VBA_PART = "xl/vbaProject.bin"
+
+
+class TemplateEngineTests(TestCase):
+    """The xml engine must write the same DataEntry sheet as openpyxl, read back through openpyxl."""
+
+    @staticmethod
+    def generate(engine: str, groups, values=None) -> bytes:
+        project_data = FileReaderProjectData("Engines & <Co>", "tests", "", groups)
+        return ExcelFileGenerator(engine=engine).make_new_workbook_from_template(project_data, values).getvalue()
+
+    def assert_same_workbook(self, groups, values=None):
+        expected_bytes = self.generate(ENGINE_OPENPYXL, groups, values)
+        got_bytes = self.generate(ENGINE_XML, groups, values)
+        expected = load_workbook(io.BytesIO(expected_bytes), keep_vba=True)
+        got = load_workbook(io.BytesIO(got_bytes), keep_vba=True)
+        expected_sheet, got_sheet = expected["DataEntry"], got["DataEntry"]
+
+        # Header and group row
+        self.assertEqual(got_sheet["A1"].value, "Engines & <Co>")
+        self.assertEqual(
+            [cell.value for cell in got_sheet[8][2:2 + len(groups)]],
+            [cell.value for cell in expected_sheet[8][2:2 + len(groups)]],
+        )
+        self.assertEqual([cell.value for cell in got_sheet[8][2:2 + len(groups)]], list(groups))
+
+        # Every DataEntry value, across all group columns
+        last_col = 3 + len(groups)
+        for expected_row, got_row in zip(
+            expected_sheet.iter_rows(min_row=1, max_row=90, max_col=last_col, values_only=True),
+            got_sheet.iter_rows(min_row=1, max_row=90, max_col=last_col, values_only=True),
+        ):
+            self.assertEqual(got_row, expected_row)
+
+        # Kept VBA part, byte for byte
+        self.assertIsNotNone(got.vba_archive)
+        with zipfile.ZipFile(io.BytesIO(expected_bytes)) as expected_zip, zipfile.ZipFile(io.BytesIO(got_bytes)) as got_zip:
+            self.assertIsNone(got_zip.testzip())
+            self.assertEqual(got_zip.read(VBA_PART), expected_zip.read(VBA_PART))
+
+    def test_few_groups(self):
+        self.assert_same_workbook(["Control", "Treated", "Knockout"])
+
+    def test_hundreds_of_groups(self):
+        self.assert_same_workbook([f"Group {i + 1}" for i in range(300)])
+
+    def test_values(self):
+        groups = ["Control", "Treated"]
+        self.assert_same_workbook(groups, {10: {3: "Homo sapiens", 4: 2.5}, 20: {2: "Custom label", 3: "x"}})
+
+
+class SymSpellIndexTests(TestCase):
+    """SymSpellIndex.correction must agree with SpellChecker.correction over the same dictionary."""
+
+    DICTIONARY_WORDS = 5000
+    SKIP_TERMS = {"HeLa", "Orbitrap", "tryptic"}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        full = SpellChecker().word_frequency.dictionary
+        frequencies = dict(sorted(full.items(), key=lambda item: (-item[1], item[0]))[:cls.DICTIONARY_WORDS])
+        # Sheet words are in the dictionary too, so correctly spelled values are looked up as well
+        sheet_words = {w.lower() for v in SAMPLE_VALUES for w in re.sub(r'[^A-Za-z ]+', ' ', str(v)).split()}
+        frequencies.update({w: full[w] for w in sheet_words if w in full})
+
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, "spell_index.bin")
+        SymSpellIndex.build(frequencies, cls.SKIP_TERMS, path)
+        cls.index = SymSpellIndex.load(path)
+
+        cls.spell = SpellChecker(language=None)
+        cls.spell.word_frequency.load_json(frequencies)
+        cls.sheet_words = sorted(sheet_words)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def test_correction_parity(self):
+        rng = random.Random(0)
+        dictionary_words = [self.index.word(i) for i in rng.sample(range(self.index.word_count), 200)]
+        words = [make_typo(w, rng) for w in dictionary_words]
+        words += [rng.choice(self.sheet_words) for _ in range(100)]
+        words += [make_typo(rng.choice(self.sheet_words), rng) for _ in range(100)]
+        # Skip terms are left alone by design; SpellChecker never sees them either (see spelling_tokens)
+        skipped = {term.lower() for term in self.SKIP_TERMS}
+        words = [word for word in words if word.lower() not in skipped]
+
+        for word in words:
+            expected, got = self.spell.correction(word), self.index.correction(word)
+            if got == expected:
+                continue
+            # pyspellchecker picks among equally frequent candidates by set order
+            self.assertIn(got, self.spell.candidates(word) or (), word)
+            self.assertEqual(self.spell[got], self.spell[expected], word)
+
+    def test_skip_terms_are_not_corrected(self):
+        for term in self.SKIP_TERMS:
+            self.assertTrue(self.index.known(term))
+            self.assertEqual(self.index.correction(term), term)
+            self.assertEqual(self.index.correction(term.upper()), term.upper())
+            self.assertEqual(self.index.candidates(term), {term})
+        # Without the skip term, the same word would be corrected
+        self.assertNotEqual(self.spell.correction("orbitrap"), "orbitrap")
+
+
+class SubjectQueryTests(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create(username="owner")
+        self.project = ProjectData.objects.create(project_name="Cohort", owner=owner, number_of_groups=0)
+        self.project.add_subject_columns(["ID", "Age"])
+        subjects = [Subject(project=self.project, metadata={"ID": f"S{i}", "Age": str(20 + i)}) for i in range(5)]
+        Subject.objects.bulk_create(subjects)
+        record_subjects(self.project, [subject.values for subject in subjects])
+
+    def test_types_refresh_after_update_in_place(self):
+        self.assertEqual(column_types(self.project)["Age"], TYPE_INTEGER)
+
+        # Same subject count and ids: only the update itself can invalidate the cached types
+        ingest = SubjectIngest(self.project, key_column="ID")
+        created = ingest([Subject(project=self.project, metadata={"ID": "S2", "Age": "unknown"})])
+        self.assertEqual((created, ingest.updated), ([], 1))
+
+        self.assertEqual(column_types(self.project)["Age"], TYPE_STRING)
+        page = subject_page(self.project, filters=[("Age", "eq", "0")])
+        self.assertEqual(page["rows"], [])
+
+
+class VocabularyTests(TestCase):
+
+    def test_new_project_knows_the_owners_earlier_vocabulary(self):
+        owner, other = User.objects.create(username="owner"), User.objects.create(username="other")
+        earlier = ProjectData.objects.create(project_name="Earlier", owner=owner, number_of_groups=0)
+        elsewhere = ProjectData.objects.create(project_name="Elsewhere", owner=other, number_of_groups=0)
+        VocabularyToken.objects.create(project=earlier, token="tryspin", count=1)
+        VocabularyToken.objects.create(project=elsewhere, token="bufer", count=1)
+        VocabularyToken.objects.create(project=None, token="hela", count=GLOBAL_MIN_COUNT)
+        VocabularyToken.objects.create(project=None, token="rare", count=GLOBAL_MIN_COUNT - 1)
+
+        # Pending project, as previews see it: nothing confirmed in it yet
+        pending = ProjectData.objects.create(project_name="Pending", owner=owner, number_of_groups=0)
+        self.assertEqual(known_vocabulary(pending), {"tryspin", "hela"})
+        self.assertEqual(known_vocabulary(), {"hela"})
+
+
+class AboutPageTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create(username="owner")
+        self.project = ProjectData.objects.create(project_name="Cohort", owner=self.owner, number_of_groups=0)
+        self.url = reverse("project_about", args=[self.project.id])
+        self.export_url = reverse("export_project_data", args=[self.project.id, "groups", "csv"])
+
+    def test_export_buttons_need_a_role(self):
+        viewer = User.objects.create(username="viewer")
+        self.client.force_login(viewer)
+        self.assertNotContains(self.client.get(self.url), self.export_url)
+
+        ProjectMembership.objects.create(user=viewer, project=self.project, role="collaborator")
+        self.assertContains(self.client.get(self.url), self.export_url)
+
+    def test_owner_sees_export_buttons(self):
+        self.client.force_login(self.owner)
+        self.assertContains(self.client.get(self.url), self.export_url)
+
+
+class DownloadWorkbookTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create(username="owner")
+        self.project = ProjectData.objects.create(project_name="Cohort", owner=self.owner, number_of_groups=0)
+        self.url = reverse("download_project_workbook", args=[self.project.id])
+        self.about_url = reverse("project_about", args=[self.project.id])
+
+    def test_non_member_is_refused(self):
+        self.client.force_login(User.objects.create(username="viewer"))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertNotContains(self.client.get(self.about_url), self.url)
+
+    def test_owner_downloads(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Disposition"].startswith("attachment"))
+        self.assertContains(self.client.get(self.about_url), self.url)
+
+
+class SubjectColumnTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create(username="owner")
+        self.project = ProjectData.objects.create(project_name="Cohort", owner=self.owner, number_of_groups=0)
+
+    def test_building_a_subject_writes_no_columns(self):
+        with self.assertRaises(ValueError):
+            Subject(project=self.project, metadata={"ID": "S1", "Age": "30"})
+        self.assertFalse(SubjectColumn.objects.filter(project=self.project).exists())
+
+        self.assertEqual(self.project.add_subject_columns(["ID", "Age"]), ["ID", "Age"])
+        self.assertEqual(self.project.add_subject_columns(["Age", "Sex"]), ["Sex"])
+        subject = Subject(project=self.project, metadata={"Sex": "F", "ID": "S1"})
+        self.assertEqual(subject.values, ["S1", None, "F"])
+        self.assertEqual(SubjectColumn.objects.filter(project=self.project).count(), 3)
+
+    def test_upload_registers_its_columns(self):
+        self.client.force_login(self.owner)
+        url = reverse("add_subject_data", args=[self.project.id])
+        csv_file = SimpleUploadedFile("subjects.csv", b"ID,Age,Notes\nS1,30,\nS2,41,x\n", content_type="text/csv")
+        self.client.post(url, {"upload_csv": "1", "csv_file": csv_file})
+        self.client.post(url, {"add_subjects": "1", "all_rows": "1", "key_column": ""})
+
+        self.assertEqual(ProjectData.objects.get(id=self.project.id).subject_column_names(), ["ID", "Age", "Notes"])
+        self.assertEqual(
+            sorted(subject.metadata["ID"] for subject in Subject.objects.filter(project=self.project)), ["S1", "S2"]
+        )
+
+
+class SpellCacheTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "spell_cache.sqlite3")
+
+    def test_disk_store_is_bounded(self):
+        cache = SpellCache("index", self.path, max_entries=10, max_disk_entries=100)
+        cache.set_many({f"word{i}": None for i in range(60)})
+        # Used again, so it outlives the words written after it
+        self.assertEqual(SpellCache("index", self.path).get("word0"), (True, None))
+        cache.set_many({f"more{i}": "x" for i in range(60)})
+
+        self.assertLessEqual(cache.disk_entries(), 100)
+        self.assertGreater(cache.stats()["disk_evictions"], 0)
+        reader = SpellCache("index", self.path)
+        self.assertEqual(reader.get("word0"), (True, None))
+        self.assertEqual(reader.get("word1"), (False, None))
+        self.assertEqual(reader.get("more59"), (True, "x"))
+
+    def test_other_namespaces_survive_until_purged(self):
+        SpellCache("old", self.path).set("tryspin", "trypsin")
+        current = SpellCache("new", self.path)
+        current.set("bufer", "buffer")
 
-# Create your tests here.
+        old = SpellCache("old", self.path)
+        self.assertEqual(old.get("tryspin"), (True, "trypsin"))
+        self.assertEqual(current.purge_other_namespaces(), 1)
+        self.assertEqual(SpellCache("old", self.path).get("tryspin"), (False, None))
+        self.assertEqual(SpellCache("new", self.path).get("bufer"), (True, "buffer"))
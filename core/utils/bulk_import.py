@@ -0,0 +1,182 @@
+import hashlib
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+
+from core.models import ProjectData, WorkbookImport
+from core.utils.excel.file_reader import FileReader
+from core.utils.excel.vocabulary import record_confirmed_values
+from core.utils.project_import import save_project_data
+
+WORKBOOK_EXTENSIONS = (".xlsm", ".xlsx")
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_workbook(name: str) -> bool:
+    base = os.path.basename(name)
+    # "~$name.xlsm" are Excel lock files
+    return base.lower().endswith(WORKBOOK_EXTENSIONS) and not base.startswith(("~$", "."))
+
+
+@contextmanager
+def workbook_files(source: str) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Yield [(name, file path)] for every workbook in a directory (recursively) or a zip.
+    Zip members are extracted to a temporary directory for the duration of the block.
+    """
+    if os.path.isdir(source):
+        found = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                path = os.path.join(root, name)
+                if _is_workbook(name):
+                    found.append((os.path.relpath(path, source), path))
+        yield sorted(found)
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive, tempfile.TemporaryDirectory() as directory:
+            found = []
+            for i, member in enumerate(archive.infolist()):
+                if member.is_dir() or not _is_workbook(member.filename):
+                    continue
+                # Extract under a generated name; member names may contain ".." or absolute paths
+                path = os.path.join(directory, f"{i}{os.path.splitext(member.filename)[1]}")
+                with archive.open(member) as src, open(path, "wb") as dst:
+                    while chunk := src.read(1 << 20):
+                        dst.write(chunk)
+                found.append((member.filename, path))
+            yield sorted(found)
+    else:
+        raise ValueError(f"{source} is neither a directory nor a zip file")
+
+
+def parse_workbook(name: str, path: str) -> Dict:
+    """
+    Parse one workbook, inferring the project name and groups from the sheet itself.
+    Runs in a worker process, so it only returns picklable data and never touches the DB.
+    """
+    start = time.perf_counter()
+    result = {"name": name, "success": False, "message": "", "seconds": 0.0}
+    try:
+        reader = FileReader()
+        project_data = reader.read_project_data(path)
+        if not project_data.get_groups():
+            result["message"] = f"No group names in row {reader.group_name_row}"
+        else:
+            resp = reader.get_file_reader_response(project_data, path)
+            result.update(
+                success=resp.success,
+                message=resp.message,
+                project_name=project_data.get_name() or os.path.splitext(os.path.basename(name))[0],
+                groups=project_data.get_groups(),
+                data=resp.data,
+                independent_variables=dict(resp.independent_variables),
+                typos=sum(len(fields) for fields in resp.possible_typos.values()),
+            )
+    except Exception as e:
+        result["message"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def persist_workbook(owner: User, digest: str, result: Dict) -> Optional[ProjectData]:
+    """
+    Save a parsed workbook as a new project together with its WorkbookImport
+    checkpoint, in one transaction. Failures only record the checkpoint.
+    Returns the project, or None when the workbook failed.
+    """
+    if result["success"]:
+        try:
+            return _save_workbook(owner, digest, result)
+        except Exception as e:
+            result.update(success=False, message=f"{type(e).__name__}: {e}")
+
+    WorkbookImport.objects.update_or_create(
+        digest=digest,
+        defaults={"source": result["name"], "status": WorkbookImport.STATUS_FAILED,
+                  "error": result["message"], "project": None},
+    )
+    return None
+
+
+def _save_workbook(owner: User, digest: str, result: Dict) -> ProjectData:
+    with transaction.atomic():
+        groups = [str(group) for group in result["groups"]]
+        project = ProjectData.objects.create(
+            owner=owner,
+            project_name=result["project_name"][:200],
+            number_of_groups=len(groups),
+            group_names="\t".join(groups),
+        )
+        values = save_project_data(project, result["data"], result["independent_variables"])
+        record_confirmed_values(project, values)
+        WorkbookImport.objects.update_or_create(
+            digest=digest,
+            defaults={"source": result["name"], "status": WorkbookImport.STATUS_DONE,
+                      "error": "", "project": project},
+        )
+    return project
+
+
+def import_workbooks(
+    source: str,
+    owner: User,
+    workers: int = 1,
+    report: Callable[[Dict, Optional[ProjectData]], None] = lambda result, project: None
+) -> Dict:
+    """
+    Import every workbook under source (directory or zip) that hasn't been imported yet.
+
+    Workbooks are parsed in a process pool and saved one transaction each as the
+    results come in (SQLite has a single writer anyway), so an interrupted run
+    resumes from its WorkbookImport checkpoints. Workbooks that failed before are
+    retried. report(result, project) is called after each workbook.
+    Returns counts and timings for the run.
+    """
+    stats = {"found": 0, "skipped": 0, "imported": 0, "failed": 0, "seconds": 0.0}
+    start = time.perf_counter()
+
+    with workbook_files(source) as files:
+        stats["found"] = len(files)
+        pending: Dict[str, Tuple[str, str]] = {}
+        for name, path in files:
+            # Identical copies under different names are imported once
+            pending.setdefault(file_digest(path), (name, path))
+        done = set(
+            WorkbookImport.objects.filter(digest__in=list(pending), status=WorkbookImport.STATUS_DONE)
+            .values_list("digest", flat=True)
+        )
+        stats["skipped"] = len(files) - len(pending) + len(done)
+        todo = [(digest, name, path) for digest, (name, path) in pending.items() if digest not in done]
+
+        def handle(digest, result):
+            project = persist_workbook(owner, digest, result)
+            stats["imported" if project else "failed"] += 1
+            report(result, project)
+
+        if workers <= 1 or len(todo) <= 1:
+            for digest, name, path in todo:
+                handle(digest, parse_workbook(name, path))
+        else:
+            # Forked workers must not share the parent's DB connection
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(parse_workbook, name, path): digest for digest, name, path in todo}
+                for future in as_completed(futures):
+                    handle(futures[future], future.result())
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
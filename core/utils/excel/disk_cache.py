@@ -0,0 +1,178 @@
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+
+class DiskCache:
+    """
+    Bounded on-disk LRU of byte blobs, shared by every process on the host.
+
+    Each entry is a file under `directory`; a small SQLite index next to them
+    tracks sizes and last use, evicts the least recently used files once the
+    total passes max_bytes, and keeps hit/miss counters across processes.
+    Like SpellCache, any I/O or SQLite error just turns into a cache miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, "index.sqlite3")
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+        self._available = True
+
+    # ----------------- Lookups -----------------
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get_path(self, key: str) -> Optional[str]:
+        """Path of a cached entry (marked as just used), or None on a miss."""
+        connection = self._connect()
+        if connection is None:
+            return None
+        path = self.path(key)
+        try:
+            if not os.path.exists(path):
+                # Evicted by another process, or the file was removed by hand
+                connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count("misses")
+                return None
+            connection.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._count("hits")
+        except sqlite3.Error:
+            return None
+        return path
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        connection = self._connect()
+        if connection is None:
+            return
+        path = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see half an entry
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, size, last_used) VALUES (?, ?, ?)",
+                (key, len(data), time.time())
+            )
+            self._evict(connection)
+        except (OSError, sqlite3.Error):
+            pass
+
+    def delete(self, key: str) -> None:
+        connection = self._connect()
+        if connection is None:
+            return
+        try:
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            os.remove(self.path(key))
+        except (OSError, sqlite3.Error):
+            pass
+
+    def clear(self) -> int:
+        """Drop every entry; returns how many were removed."""
+        connection = self._connect()
+        if connection is None:
+            return 0
+        try:
+            keys = [key for (key,) in connection.execute("SELECT key FROM entries")]
+            connection.execute("DELETE FROM entries")
+        except sqlite3.Error:
+            return 0
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+        return len(keys)
+
+    def stats(self) -> Dict:
+        connection = self._connect()
+        if connection is None:
+            return {"available": False}
+        try:
+            entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            counters = dict(connection.execute("SELECT name, value FROM counters"))
+        except sqlite3.Error:
+            return {"available": False}
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "available": True,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+
+    # ----------------- Internals -----------------
+    def _count(self, name: str, n: int = 1) -> None:
+        try:
+            self._connection.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, n)
+            )
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in connection.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+            total -= size
+            evicted += 1
+        self._count("evictions", evicted)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if not self._available:
+            return None
+        # sqlite connections must not be shared across a fork
+        if self._connection is not None and self._connection_pid == os.getpid():
+            return self._connection
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            connection = sqlite3.connect(self.index_path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+        except (OSError, sqlite3.Error):
+            self._available = False
+            return None
+        self._connection = connection
+        self._connection_pid = os.getpid()
+        return connection
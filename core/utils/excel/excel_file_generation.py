@@ -1,21 +1,57 @@
 import copy
 import datetime
+import io
 import os
-import shutil
+from typing import Dict, List, Optional, Tuple
 
 from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Protection, Border, Side
+from openpyxl.styles import PatternFill, Font, Protection, Border, Side, NamedStyle
 from openpyxl.worksheet.datavalidation import DataValidation
 
 from core.utils.excel.project_data import FileReaderProjectData
+from core.utils.excel.sheet_grid import SheetGrid
+from core.utils.excel.xml_patch import TemplatePatcher
+
+TEMPLATE_FILE = "metadataTemplate6.xlsm"
+
+# {template path: raw .xlsm bytes}, read once per process
+_template_bytes: Dict[str, bytes] = {}
+
+# {template path: {row: label}}, see ExcelFileGenerator.template_labels
+_template_labels: Dict[str, Dict[int, object]] = {}
+
+# {(template path, sections, dropdowns): TemplatePatcher}, built once per process
+_patchers: Dict[tuple, TemplatePatcher] = {}
+
+ENGINE_OPENPYXL = "openpyxl"
+ENGINE_XML = "xml"
+
+# Bump whenever generated workbooks change; cached workbooks of older versions are ignored
+GENERATOR_VERSION = 1
+
+
+def template_bytes(path: str) -> bytes:
+    """
+    The template's zip bytes, kept in memory so generating a workbook never
+    touches the disk. (openpyxl workbooks holding a VBA archive can't be
+    deep-copied, so the bytes are cached and parsed per workbook instead.)
+    """
+    data = _template_bytes.get(path)
+    if data is None:
+        with open(path, "rb") as f:
+            data = _template_bytes[path] = f.read()
+    return data
 
 
 class ExcelFileGenerator:
 
-    def __init__(self):
+    def __init__(self, engine: str = ENGINE_OPENPYXL):
+        if engine not in (ENGINE_OPENPYXL, ENGINE_XML):
+            raise ValueError(f"Unknown engine: {engine}")
+        # openpyxl loads and re-saves the whole workbook; xml patches the DataEntry sheet in place
+        self.engine = engine
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.input_directory_path = os.path.join(base_dir, "excel_templates")
-        self.output_directory_path = os.path.join(base_dir, "output_files")
         self.sample_id_range = [(10, 19)]
         self.sample_prep_range = [(26, 38)]
         self.lc_param_range = [(45, 61)]
@@ -23,50 +59,102 @@ class ExcelFileGenerator:
         self.custom_ranges = [(20, 24), (39, 43), (62, 66), (85, 89)]
         self.black_ranges = [(9, 9), (25, 25), (44, 44), (67, 67)]
 
-    def make_a_copy(self, input_file: str, name=None) -> str:
+    def output_filename(self, name=None, extension: str = "xlsm") -> str:
+        """Download name for a generated workbook: "<name>-<timestamp>.<extension>"."""
         date = datetime.datetime.now().replace(microsecond=0).isoformat().replace(":", "-")
+        return (date if name is None else name + "-" + date) + "." + extension
 
-        old_file_path = os.path.join(self.input_directory_path, input_file)
-        file_type = old_file_path.split(".")[-1]
-        new_file_path = (
-                            os.path.join(self.output_directory_path, date)
-                            if name is None
-                            else os.path.join(self.output_directory_path, name + "-" + date)
-                        ) + "." + file_type
-
-        shutil.copy2(old_file_path, new_file_path)
+    def template_path(self) -> str:
+        return os.path.join(self.input_directory_path, TEMPLATE_FILE)
 
-        return new_file_path
+    def make_new_workbook_from_template(
+        self,
+        project_data: FileReaderProjectData,
+        values: Optional[Dict[int, Dict[int, object]]] = None
+    ) -> io.BytesIO:
+        """
+        Fill the template for a project and return the .xlsm in memory, rewound and ready to stream.
+        values: {row: {col: value}} written onto DataEntry as well (e.g. a stored project's data)
+        """
+        template_path = self.template_path()
+        if self.engine == ENGINE_XML:
+            return io.BytesIO(
+                self.get_patcher(template_path).render(project_data.get_name(), project_data.get_groups(), values)
+            )
 
-    def make_new_file_from_template_with_openpyxl(self, project_data: FileReaderProjectData, output_name=None) -> str:
-        INPUT_FILE = "metadataTemplate6.xlsm"
-        file = self.make_a_copy(INPUT_FILE, output_name)
-        wb = load_workbook(file, keep_vba=True)
+        wb = load_workbook(io.BytesIO(template_bytes(template_path)), keep_vba=True)
         ws = wb["DataEntry"]
 
         self.add_dropdowns(ws)
 
         self.add_project_data(ws, project_data)
 
-        wb.save(file)
-        return file
+        if values:
+            self.add_values(ws, values)
 
-    def add_dropdowns(self, ws) -> None:
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+    def get_patcher(self, template_path: str) -> TemplatePatcher:
+        key = (template_path, tuple(map(tuple, self.section_ranges())), tuple(self.dropdowns()))
+        patcher = _patchers.get(key)
+        if patcher is None:
+            patcher = _patchers[key] = TemplatePatcher(
+                template_bytes(template_path), "DataEntry", self.section_ranges(), self.dropdowns()
+            )
+        return patcher
+
+    def dropdowns(self) -> List[Tuple[str, str]]:
+        """[(cell, list formula)]: the preset dropdown above each section, fed from the Source sheet."""
         dropdowns = [
             (self.sample_id_range[0][0], 1),
             (self.sample_prep_range[0][0], 18),
             (self.lc_param_range[0][0], 38),
             (self.ms_param_range[0][0], 62),
         ]
+        return [(f"A{start_row + 1}", f"=Source!$C${source_row}:$N${source_row}") for start_row, source_row in dropdowns]
+
+    def label_sections(self) -> List[Tuple[str, Tuple[int, int], Tuple[int, int]]]:
+        """[(category, template label rows, custom label rows)], in sheet order."""
+        return [
+            ("Sample ID", self.sample_id_range[0], self.custom_ranges[0]),
+            ("Sample Prep", self.sample_prep_range[0], self.custom_ranges[1]),
+            ("LC Param", self.lc_param_range[0], self.custom_ranges[2]),
+            ("MS Param", self.ms_param_range[0], self.custom_ranges[3]),
+        ]
 
-        for start_row, source_row in dropdowns:
+    def template_labels(self) -> Dict[int, object]:
+        """{row: column B label} of the template's label rows (None for blank ones)."""
+        path = self.template_path()
+        labels = _template_labels.get(path)
+        if labels is None:
+            rows = [row for _, *ranges in self.label_sections() for start, end in ranges for row in range(start, end + 1)]
+            grid = SheetGrid.from_workbook(io.BytesIO(template_bytes(path)), "DataEntry", rows, min_col=2, max_col=2)
+            labels = _template_labels[path] = {row: grid.value(row, 2) for row in rows}
+        return labels
+
+    def section_ranges(self) -> List[List[Tuple[int, int]]]:
+        """Row ranges styled per group column; each takes the fill of column C on its first row."""
+        return [self.sample_id_range, self.sample_prep_range, self.black_ranges,
+                self.lc_param_range, self.ms_param_range, self.custom_ranges]
+
+    def add_dropdowns(self, ws) -> None:
+        for cell, formula in self.dropdowns():
             dv = DataValidation(
                 type="list",
-                formula1=f"=Source!$C${source_row}:$N${source_row}",
+                formula1=formula,
                 allow_blank=True,
             )
             ws.add_data_validation(dv)
-            dv.add(f"A{start_row + 1}")
+            dv.add(cell)
+
+    def add_values(self, ws, values: Dict[int, Dict[int, object]]) -> None:
+        """Write {row: {col: value}} in one pass over the grid; cell styles are left alone."""
+        for row, row_values in values.items():
+            for col, value in row_values.items():
+                ws.cell(row=row, column=col).value = value
 
     def add_project_data(self, ws, project_data: FileReaderProjectData) -> None:
         """
@@ -89,8 +177,7 @@ class ExcelFileGenerator:
         # Get the groups from Project Data
         groups = project_data.get_groups()
 
-        section_ranges = [self.sample_id_range, self.sample_prep_range, self.black_ranges,
-                          self.lc_param_range, self.ms_param_range, self.custom_ranges]
+        section_ranges = self.section_ranges()
 
         thin_border = Border(
             left=Side(style='thin', color='000000'),
@@ -99,21 +186,46 @@ class ExcelFileGenerator:
             bottom=Side(style='thin', color='000000')
         )
 
+        title_font = Font(bold=True, size=18)
+        title_fill = PatternFill(start_color="BDD7EE", end_color="BDD7EE", fill_type="solid")
+        unlocked = Protection(locked=False)
+
+        # One named style per (cell's template style, section), shared by every cell that
+        # needs it, instead of new Fill/Border/Protection objects on each of ~85 cells per group
+        shared_styles: Dict[tuple, str] = {}
+
+        def shared_style(cell, key, **overrides) -> str:
+            style_key = (cell.style_id, key)
+            name = shared_styles.get(style_key)
+            if name is None:
+                parts = {
+                    "font": cell.font, "fill": cell.fill, "border": cell.border,
+                    "alignment": cell.alignment, "protection": cell.protection,
+                }
+                parts.update(overrides)
+                name = shared_styles[style_key] = f"Group {key} {len(shared_styles) + 1}"
+                ws.parent.add_named_style(NamedStyle(
+                    name=name,
+                    number_format=cell.number_format,
+                    **{part_name: copy.copy(part) for part_name, part in parts.items()}
+                ))
+            # Assigned by name: openpyxl compares NamedStyle objects field by field
+            return name
+
         def make_group_title(c):
             group_name_cell = ws.cell(row=8, column=c)
             group_name_cell.value = groups[c - 3]
-            group_name_cell.font = Font(bold=True, size=18)
-            group_name_cell.fill = PatternFill(start_color="BDD7EE", end_color="BDD7EE", fill_type="solid")
+            group_name_cell.style = shared_style(group_name_cell, "Title", font=title_font, fill=title_fill)
+
+        # Each section takes the fill of column C on its first row
+        section_fills = [(section_range, ws.cell(section_range[0][0], 3).fill) for section_range in section_ranges]
 
         for group in range(len(groups)):
             col = 3 + group
             make_group_title(col)
-            for section_range in section_ranges:
-                cur_fill = ws.cell(section_range[0][0], 3).fill
+            for index, (section_range, cur_fill) in enumerate(section_fills):
                 for chunk in section_range:
                     start, end = chunk
                     for row in range(start, end + 1):
                         cell = ws.cell(row=row, column=col)
-                        cell.fill = copy.copy(cur_fill)
-                        cell.border = thin_border
-                        cell.protection = Protection(locked=False)
+                        cell.style = shared_style(cell, index, fill=cur_fill, border=thin_border, protection=unlocked)
@@ -1,135 +1,209 @@
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from os.path import devnull
-from typing import Dict, Tuple, List
-from openpyxl.worksheet.worksheet import Worksheet
+from typing import AbstractSet, Callable, Dict, Iterable, Optional, Tuple, List
 from .file_reader_response import FileReaderResponse
 from .project_data import FileReaderProjectData
-from spellchecker import SpellChecker
-from openpyxl import load_workbook
+from .sheet_data import SheetData
+from .sheet_grid import SheetGrid
+from .spell_cache import SpellCache
+from .spell_index import SymSpellIndex, index_fingerprint
 import re
 
+from openpyxl.utils import get_column_letter
+
+# Bump whenever FileReader's output changes; cached parse results of older versions are ignored
+READER_VERSION = 2
 
-def tuple_to_str(tup: Tuple[int, int]) -> str:
-    ntl = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    resp = ntl[tup[1] - 1]
-    resp += str(tup[0])
-    return resp
 
+def tuple_to_str(tup: Tuple[int, int]) -> str:
+    """(row, col) -> "C10"; columns past Z continue AA, AB, ..."""
+    return get_column_letter(tup[1]) + str(tup[0])
 
-SPELL = SpellChecker()
 
 # ADD TERMS TO DICTIONARY THAT YOU DON'T WANT SPELL-CHECKED
 TECH_TERMS = {"MS1", "MS2", "AGC", "RF", "LCM", "N/A", "DDA", "Homo", "sapiens",
               "HeLa", "tryptic", "ng", "pipetting", "Lys-C", "mM", "mm", "aliquoted",
               "DDA"}
 
-checked = defaultdict(str)
+# Memory-mapped symmetric-delete index, opened on first use; see get_spell_index()
+_spell_index: Optional[SymSpellIndex] = None
+
+# {word: correction}, bounded per process and shared between workers on disk
+SPELL_CACHE = SpellCache(namespace=index_fingerprint(TECH_TERMS))
+
+
+def get_spell_index() -> SymSpellIndex:
+    """
+    The shared spell index, mapped the first time a word actually needs correcting.
+    The file is rebuilt automatically when TECH_TERMS or the dictionary change; every
+    process maps the same file read-only, so its pages live once in the OS page cache.
+    """
+    global _spell_index
+    if _spell_index is None:
+        _spell_index = SymSpellIndex.load_or_build(TECH_TERMS)
+    return _spell_index
 
 
-def spell_check(word: str):
+def spelling_tokens(word, vocabulary: AbstractSet[str] = frozenset()) -> List[str]:
+    """
+    The tokens of a cell value that actually need spell checking.
+    vocabulary: lowercase tokens learned from confirmed projects, skipped like TECH_TERMS
+    """
     if not word:
-        return None
+        return []
 
     word = str(word).strip()
 
-    if word in checked:
-        return checked[word]
-
     # Keep only letters, numbers, and spaces
     cleaned = re.sub(r'[^A-Za-z0-9 ]+', ' ', word)
-    words = cleaned.split()
-
-    corrected_words = []
 
-    for w in words:
+    tokens = []
+    for w in cleaned.split():
         # Skip empty strings, numbers, and known technical terms
         if not w or w in TECH_TERMS:
             continue
         if any(char.isdigit() for char in w):
             continue
+        if w.lower() in vocabulary:
+            continue
+        tokens.append(w)
+    return tokens
 
-        cor = SPELL.correction(w)
-        if cor and cor != w:
-            corrected_words.append(cor)
 
-    if not corrected_words:
-        return None
+def _correct_chunk(words: List[str]) -> List[Optional[str]]:
+    """Process pool entry point; workers map the same index file as the parent."""
+    index = get_spell_index()
+    return [index.correction(w) for w in words]
 
-    checked[word] = " ".join(corrected_words)
-    return " ".join(corrected_words)
+
+def correct_words(words: Iterable[str], workers: int = 1, chunk_size: int = 250) -> Dict[str, Optional[str]]:
+    """
+    Resolve corrections for a set of distinct words in one batch.
+    Cached words are answered from SPELL_CACHE; the rest are corrected, across a
+    process pool when workers > 1, and written back to the cache together.
+    Returns: {word: correction or None}
+    """
+    corrections, missing = SPELL_CACHE.get_many(set(words))
+
+    if missing:
+        if workers > 1 and len(missing) > chunk_size:
+            chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = [cor for chunk in pool.map(_correct_chunk, chunks) for cor in chunk]
+        else:
+            results = _correct_chunk(missing)
+
+        computed = {w: (cor if cor != w else None) for w, cor in zip(missing, results)}
+        SPELL_CACHE.set_many(computed)
+        corrections.update(computed)
+
+    return corrections
+
+
+def find_typos(
+    value_locations: Dict[object, List[Tuple[int, int]]],
+    typo_correction_location: Dict[str, Dict[str, List[str]]],
+    workers: int = 1,
+    vocabulary: AbstractSet[str] = frozenset()
+) -> None:
+    """
+    value_locations: {cell value: [(row, col) found]} for every cell of the workbook
+    typo_correction_location: {Possible Typo: {Suggested Correction: [locations found]}}
+
+    Corrections are resolved once per distinct token, not once per cell.
+    """
+    value_tokens = {val: spelling_tokens(val, vocabulary) for val in value_locations}
+    corrections = correct_words(
+        {token for tokens in value_tokens.values() for token in tokens}, workers=workers
+    )
+
+    for val, locations in value_locations.items():
+        corrected_words = [corrections[t] for t in value_tokens[val] if corrections[t]]
+        if corrected_words:
+            typo_correction_location[val][" ".join(corrected_words)].extend(map(tuple_to_str, locations))
 
 
 def add_to_labels(
     labels: Dict[str, Tuple[str, Tuple[int, int]]],
     ran: Tuple[int, int],
     category: str,
-    ws: Worksheet
+    grid: SheetGrid
 ):
     start, end = ran
     for i in range(start, end + 1):
-        cell = ws.cell(i, 2)
-        if cell is None:
-            continue
-        labels[cell.value] = (category, (i, 2))
+        labels[grid.value(i, 2)] = (category, (i, 2))
 
 
-def get_category_label_value(
-    labels: Dict[str, Tuple[str, Tuple[int, int]]],
+def read_group_values(
+    sheet: SheetData,
     group_col: int,
-    ws: Worksheet,
-    typo_correction_location: Dict[str, Dict[str, List[str]]]
-) -> Dict[str, Dict[str, str]]:
+    grid: SheetGrid,
+    value_locations: Dict[object, List[Tuple[int, int]]]
+) -> List:
     """
-    labels: {label: (category, (row, col))}
-    typo_correction_location: {Possible Typo: {Suggested Correction: [locations found]}}
-    Returns: {category: {label: value}}
+    Returns: one value per sheet label, in label order
+    value_locations: {cell value: [(row, col) found]}, collected for the batch spell check
     """
-    cat_lab_val: Dict[str, Dict[str, str]] = defaultdict(dict)
+    values = []
+    for row in sheet.rows:
+        val = grid.value(row, group_col)
 
-    for label, (category, location) in labels.items():
-        row = location[0]
-        val = ws.cell(row, group_col).value
+        if val:
+            value_locations[val].append((row, group_col))
 
-        cor = spell_check(val)
-        if cor is not None:
-            typo_correction_location[val][cor].append(tuple_to_str((row, group_col)))
+        values.append(val)
 
-        cat_lab_val[category][label] = val
+    return values
 
-    return cat_lab_val
 
+def get_independent_variables(sheet: SheetData) -> Dict[str, List[str]]:
+    # Only keep labels with more than one unique value across groups
+    return sheet.independent_variables()
 
-# {Group: {Category: {Label: Value}}}
-
-
-def get_independent_variables(
-    group_category_label_value: Dict[str, Dict[str, Dict[str, str]]]
-) -> Dict[str, List[str]]:
-    # {Label: set of all values across groups}
-    labels = defaultdict(set)
-
-    for group in group_category_label_value:
-        for cat in group_category_label_value[group]:
-            for label, value in group_category_label_value[group][cat].items():
-                labels[label].add(value)
-
-    # Only keep labels with more than one unique value
-    ind_vars = defaultdict(list)
-    for label, values in labels.items():
-        if len(values) > 1:
-            ind_vars[label].extend(values)
-
-    return ind_vars
 
+def _no_progress(percent: int, stage: str) -> None:
+    pass
 
 
 class FileReader:
-    def __init__(self):
+    def __init__(
+        self,
+        spell_workers: int = 1,
+        vocabulary: AbstractSet[str] = frozenset(),
+        progress: Callable[[int, str], None] = _no_progress
+    ):
+        # Processes used to spell check very large sheets
+        self.spell_workers = spell_workers
+        # Learned lab tokens (lowercase) that are never reported as typos
+        self.vocabulary = vocabulary
+        # progress(percent, stage), called as the file is read (e.g. by a ParseJob worker)
+        self.progress = progress
+        self.group_name_row = 8
         self.sample_id_range = (10, 24)
         self.sample_prep_range = (26, 43)
         self.lc_param_range = (45, 66)
         self.ms_param_range = (68, 89)
 
+    def read_project_data(self, file_path: str, owner: str = "") -> FileReaderProjectData:
+        """
+        Project name (A1) and groups (group name row, from column C up to the first
+        blank) of a filled-in workbook, for sheets that have no project to check against.
+        """
+        grid = SheetGrid.from_workbook(file_path, "DataEntry", {1, self.group_name_row}, min_col=1)
+        groups = []
+        for value in grid.row_values(self.group_name_row)[2:]:
+            if value is None or str(value).strip() == "":
+                break
+            groups.append(value)
+        name = grid.value(1, 1)
+        return FileReaderProjectData(
+            name=str(name).strip() if name is not None else "",
+            owner=owner,
+            description="",
+            groups=groups
+        )
+
     def get_file_reader_response(
         self,
         project_data: FileReaderProjectData,
@@ -138,71 +212,79 @@ class FileReader:
         success = True
         message = "Data Read Successfully!"
 
-        # {Data_Tag: [Values]}
-        independent_variables: Dict[str, List[str]] = defaultdict(list)
-        # {Group: {Category: {Label: Value}}}
-        data: Dict[str, Dict[str, Dict[str, str]]] = defaultdict(lambda: defaultdict(dict))
-        # {Possible Typo: {Suggested Correction: [locations found]}}
-        possible_typos: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
-
         resp = FileReaderResponse(
             success=success,
             message=message,
-            project_data=project_data,
-            independent_variables=independent_variables,
-            data=data,
-            possible_typos=possible_typos
+            project_data=project_data
         )
 
+        expected_groups = project_data.get_groups()
+        sections = [
+            (self.sample_id_range, "Sample ID"),
+            (self.sample_prep_range, "Sample Prep"),
+            (self.lc_param_range, "LC Param"),
+            (self.ms_param_range, "MS Param")
+        ]
+
+        # Only the group header row and the section rows are ever read
+        rows = {self.group_name_row}
+        for (start, end), _ in sections:
+            rows.update(range(start, end + 1))
+
+        self.progress(5, "Reading workbook")
         try:
-            wb = load_workbook(file_path, read_only=True)
-            ws = wb["DataEntry"]
+            grid = SheetGrid.from_workbook(
+                file_path, "DataEntry", rows, min_col=2, max_col=2 + len(expected_groups)
+            )
         except Exception as e:
             resp.success = False
             resp.message = f"Failed To Read This File Due To Exception: {e}"
             return resp
 
-        expected_groups = project_data.get_groups()
-
         # Labels == {label: (category, (row, col))}
         labels: Dict[str, Tuple[str, Tuple[int, int]]] = {}
 
-        for ran, category in [
-            (self.sample_id_range, "Sample ID"),
-            (self.sample_prep_range, "Sample Prep"),
-            (self.lc_param_range, "LC Param"),
-            (self.ms_param_range, "MS Param")
-        ]:
-            add_to_labels(labels, ran, category, ws)
+        for ran, category in sections:
+            add_to_labels(labels, ran, category, grid)
 
-        # {Group: {Category: {Label: Value}}}
-        group_category_label_value: Dict[str, Dict[str, Dict[str, str]]] = defaultdict(lambda: defaultdict(dict))
+        # Shared label index + groups x labels value matrix
+        sheet = SheetData.from_label_index(labels)
 
         # {Possible Typo: {Suggested Correction: [locations found]}}
         typo_correction_location: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
 
+        # {Cell Value: [(row, col) found]}
+        value_locations: Dict[object, List[Tuple[int, int]]] = defaultdict(list)
+
+        self.progress(20, "Reading groups")
         for group_index, expected in enumerate(expected_groups):
             group_col = group_index + 3
-            read_group = ws.cell(8, group_col).value
+            read_group = grid.value(self.group_name_row, group_col)
 
             if expected != read_group:
                 resp.success = False
                 resp.message = (
                     f"Uploaded Sheet Groups Didn't Correspond "
-                    f"To Expected Groups (at[{8},{group_col}])\n"
+                    f"To Expected Groups (at[{self.group_name_row},{group_col}])\n"
                     f"EXPECTED: {expected} != GOT: {read_group}"
                 )
                 return resp
 
-            group_category_label_value[read_group] = get_category_label_value(
-                labels, group_col, ws, typo_correction_location
-            )
+            sheet.add_group(read_group, read_group_values(sheet, group_col, grid, value_locations))
+            self.progress(20 + 30 * (group_index + 1) // len(expected_groups), "Reading groups")
+
+        self.progress(50, "Spell checking")
+        find_typos(
+            value_locations, typo_correction_location,
+            workers=self.spell_workers, vocabulary=self.vocabulary
+        )
 
+        self.progress(90, "Finding independent variables")
         # {Data_Tag: [Values]}
-        ind_vars = get_independent_variables(group_category_label_value)
+        ind_vars = get_independent_variables(sheet)
 
         # Attach processed data to response
-        resp.data = group_category_label_value
+        resp.data = sheet
         resp.possible_typos = typo_correction_location
         resp.independent_variables = ind_vars
 
@@ -1,6 +1,7 @@
 from collections import defaultdict
 from typing import Dict, List
 from .project_data import FileReaderProjectData
+from .sheet_data import SheetData
 
 
 class FileReaderResponse:
@@ -10,7 +11,7 @@ class FileReaderResponse:
             message: str,
             project_data: FileReaderProjectData,
             independent_variables: Dict[str, List[str]] = None,
-            data: Dict[str, Dict[str, Dict[str, str]]] = None,
+            data: SheetData = None,
             possible_typos: Dict[str, Dict[str, List[str]]] = None
     ):
         self.success = success
@@ -20,8 +21,8 @@ class FileReaderResponse:
         # {Data_Tag: [Values]}
         self.independent_variables: Dict[str, List[str]] = independent_variables or defaultdict(list)
 
-        # {Group: {Category: {Label: Value}}}
-        self.data: Dict[str, Dict[str, Dict[str, str]]] = data or defaultdict(lambda: defaultdict(dict))
+        # Label index + groups x labels value matrix ({Group: {Category: {Label: Value}}} via to_nested())
+        self.data: SheetData = data if data is not None else SheetData([], [], [])
 
         # {Possible Typo: {Suggested Correction: [locations found]}}
         self.possible_typos: Dict[str, Dict[str, List[str]]] = possible_typos or defaultdict(lambda: defaultdict(list))
@@ -36,7 +37,7 @@ class FileReaderResponse:
     def get_project_data(self) -> FileReaderProjectData:
         return self.project_data
 
-    def get_data(self) -> Dict[str, Dict[str, Dict[str, str]]]:
+    def get_data(self) -> SheetData:
         return self.data
 
     def get_independent_variables(self) -> Dict[str, List[str]]:
@@ -45,6 +46,21 @@ class FileReaderResponse:
     def get_possible_typos(self) -> Dict[str, Dict[str, List[str]]]:
         return self.possible_typos
 
+    def to_json_dict(self) -> Dict:
+        """
+        The preview payload sent to the browser and kept until the upload is confirmed.
+        Built directly from plain lists/dicts; dates are left to DjangoJSONEncoder.
+        """
+        return {
+            "success": self.was_successful(),
+            "message": self.get_message(),
+            "data": self.data.to_json(),
+            "independent_variables": dict(self.independent_variables),
+            "typos": {typo: dict(corrections) for typo, corrections in self.possible_typos.items()},
+            "project_name": self.project_data.get_name(),
+            "groups": self.project_data.get_groups()
+        }
+
     def __str__(self):
         return (
             f"FOR PROJECT={self.project_data.get_name()}\n"
@@ -52,6 +68,7 @@ class FileReaderResponse:
             f"SUCCESS={self.success}\n"
             f"MESSAGE={self.message}\n"
             f"INDEPENDENT_VARS={dict(self.independent_variables)}\n"
-            f"DATA={ {k: dict(v) for k, v in self.data.items()} }\n"
+            f"DATA={self.data.to_nested()}\n"
             f"POSSIBLE_TYPOS={ {k: dict(v) for k, v in self.possible_typos.items()} }"
         )
+
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+from typing import AbstractSet, Dict, Optional
+
+from django.core.files.uploadhandler import FileUploadHandler
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .disk_cache import DiskCache
+from .file_reader import READER_VERSION, TECH_TERMS
+from .project_data import FileReaderProjectData
+from .spell_index import CACHE_DIRECTORY, index_fingerprint
+
+PARSE_CACHE_DIRECTORY = os.path.join(CACHE_DIRECTORY, "parse_results")
+PARSE_CACHE_MAX_BYTES = 256 * 2 ** 20
+
+# {cache key: JSON preview payload}, see parse_cache_key()
+PARSE_CACHE = DiskCache(PARSE_CACHE_DIRECTORY, PARSE_CACHE_MAX_BYTES)
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Hashes every uploaded file (sha256) as its chunks arrive and passes the data
+    on untouched, so the next handler still decides where the upload is stored.
+    digests: {form field name: hex digest}
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests: Dict[str, str] = {}
+        self._hash = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._hash.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self._hash.hexdigest()
+        return None
+
+
+def parse_cache_key(
+    file_digest: str,
+    project_data: FileReaderProjectData,
+    vocabulary: AbstractSet[str]
+) -> str:
+    """
+    Everything the preview payload depends on: the file contents, the expected
+    groups (and project name echoed back), the reader and spell index versions
+    and the learned vocabulary the typos were checked against.
+    """
+    parts = [
+        str(READER_VERSION),
+        index_fingerprint(TECH_TERMS),
+        file_digest,
+        project_data.get_name(),
+        "\t".join(project_data.get_groups()),
+        "\t".join(sorted(vocabulary)),
+    ]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def cached_parse(key: str) -> Optional[Dict]:
+    data = PARSE_CACHE.get(key)
+    if data is None:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        PARSE_CACHE.delete(key)
+        return None
+
+
+def store_parse(key: str, payload: Dict) -> None:
+    PARSE_CACHE.set(key, json.dumps(payload, cls=DjangoJSONEncoder).encode("utf-8"))
+
+
+def invalidate_parse_cache() -> int:
+    """
+    Drop every cached preview (the parse_cache command). Vocabulary and spell index
+    changes don't need it: both are part of parse_cache_key, so previews cached
+    before them are never hit again and age out of the LRU.
+    """
+    return PARSE_CACHE.clear()
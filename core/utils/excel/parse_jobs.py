@@ -0,0 +1,174 @@
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.models import ParseJob, ProjectData
+from .file_reader import FileReader
+from .parse_cache import cached_parse, parse_cache_key, store_parse
+from .project_data import FileReaderProjectData
+from .sheet_data import SheetData
+from .vocabulary import known_vocabulary
+
+# Progress is written to the DB at most once per this many percent
+PROGRESS_STEP = 5
+
+# A running job whose worker hasn't finished it after this long is handed out again
+STALE_AFTER = timedelta(minutes=10)
+
+# Finished jobs hold the preview until it is confirmed; unconfirmed ones are purged after this
+JOB_TTL = timedelta(hours=24)
+
+
+def project_reader_data(project: ProjectData, user) -> FileReaderProjectData:
+    return FileReaderProjectData(
+        name=project.project_name,
+        owner=user.username,
+        description=project.description,
+        groups=project.group_names.split("\t")
+    )
+
+
+def enqueue_parse(project: ProjectData, user, uploaded_file, file_digest: Optional[str] = None) -> ParseJob:
+    """
+    Queue the upload for run_parse_worker.
+    file_digest: sha256 of the upload (see HashingUploadHandler); when the same file
+    was already parsed for the same groups and vocabulary, the job is created finished.
+    """
+    job = ParseJob(project=project, requested_by=user, stage="Queued")
+
+    if file_digest:
+        job.cache_key = parse_cache_key(
+            file_digest, project_reader_data(project, user), known_vocabulary(project)
+        )
+        cached = cached_parse(job.cache_key)
+        if cached is not None:
+            job.status = ParseJob.STATUS_DONE
+            job.progress = 100
+            job.stage = "Done (cached)"
+            job.result = cached
+            job.finished_at = timezone.now()
+            job.save()
+            return job
+
+    job.file.save(f"{project.id}_{uploaded_file.name}", uploaded_file, save=False)
+    job.save()
+    return job
+
+
+def claim_next_job(stale_after: timedelta = STALE_AFTER) -> Optional[ParseJob]:
+    """
+    Atomically take the oldest queued job (or one abandoned by a dead worker).
+    The conditional UPDATE means two workers can never claim the same job.
+    """
+    now = timezone.now()
+    ParseJob.objects.filter(status=ParseJob.STATUS_RUNNING, started_at__lt=now - stale_after).update(
+        status=ParseJob.STATUS_QUEUED, stage="Requeued"
+    )
+
+    candidates = ParseJob.objects.filter(status=ParseJob.STATUS_QUEUED).order_by("created_at", "id")
+    for job_id in candidates.values_list("id", flat=True)[:10]:
+        claimed = ParseJob.objects.filter(id=job_id, status=ParseJob.STATUS_QUEUED).update(
+            status=ParseJob.STATUS_RUNNING, started_at=now, progress=0, stage="Starting"
+        )
+        if claimed:
+            return ParseJob.objects.select_related("project", "requested_by").get(id=job_id)
+    return None
+
+
+def _progress_writer(job: ParseJob):
+    last = {"percent": -PROGRESS_STEP, "stage": None}
+
+    def progress(percent: int, stage: str) -> None:
+        if percent - last["percent"] < PROGRESS_STEP and stage == last["stage"]:
+            return
+        last.update(percent=percent, stage=stage)
+        ParseJob.objects.filter(id=job.id).update(progress=percent, stage=stage)
+
+    return progress
+
+
+def run_job(job: ParseJob, spell_workers: int = 1) -> ParseJob:
+    """
+    Parse a claimed job's workbook and store the preview payload (or the error).
+    spell_workers: processes used to correct the distinct tokens of very large sheets
+    """
+    project = job.project
+    project_data = project_reader_data(project, job.requested_by)
+
+    try:
+        reader = FileReader(
+            spell_workers=spell_workers, vocabulary=known_vocabulary(project), progress=_progress_writer(job)
+        )
+        response = reader.get_file_reader_response(project_data, job.file.path)
+        job.result = response.to_json_dict()
+        job.status = ParseJob.STATUS_DONE
+        job.stage = "Done"
+        if job.cache_key:
+            store_parse(job.cache_key, job.result)
+    except Exception as e:
+        job.status = ParseJob.STATUS_FAILED
+        job.error = f"Failed To Read This File Due To Exception: {e}"
+        job.stage = "Failed"
+    finally:
+        # The upload is only needed until it has been parsed
+        if job.file:
+            job.file.delete(save=False)
+
+    job.progress = 100
+    job.finished_at = timezone.now()
+    job.save(update_fields=["result", "status", "error", "stage", "progress", "finished_at", "file"])
+    return job
+
+
+def run_next_job(spell_workers: int = 1) -> Optional[ParseJob]:
+    close_old_connections()
+    job = claim_next_job()
+    if job is not None:
+        run_job(job, spell_workers)
+    return job
+
+
+def job_status(job: ParseJob) -> Dict:
+    """JSON payload of the status endpoint."""
+    status = {
+        "job_id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "stage": job.stage,
+        "finished": job.is_finished(),
+    }
+    if job.status == ParseJob.STATUS_DONE:
+        status["result"] = job.result
+    elif job.status == ParseJob.STATUS_FAILED:
+        status["message"] = job.error
+    return status
+
+
+def confirmed_preview(job_id: Optional[int], user, project: ProjectData) -> Optional[Tuple[SheetData, Dict]]:
+    """
+    (data, independent_variables) of a finished preview, read straight out of the
+    stored JSON so the typos and the rest of the payload are never loaded.
+    """
+    if not job_id:
+        return None
+    preview = (
+        ParseJob.objects
+        .filter(id=job_id, project=project, requested_by=user, status=ParseJob.STATUS_DONE)
+        .values_list("result__data", "result__independent_variables")
+        .first()
+    )
+    if preview is None or not preview[0]:
+        return None
+    data, independent_variables = preview
+    return SheetData.from_json(data), independent_variables or {}
+
+
+def purge_old_jobs(ttl: timedelta = JOB_TTL) -> int:
+    """Delete jobs (and any upload still on disk) created more than ttl ago; returns the count."""
+    old = ParseJob.objects.filter(created_at__lt=timezone.now() - ttl).exclude(status=ParseJob.STATUS_RUNNING)
+    for job in old.exclude(file=""):
+        job.file.delete(save=False)
+    deleted, _ = old.delete()
+    return deleted
@@ -0,0 +1,138 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class SheetData:
+    """
+    Parsed DataEntry values: one label index shared by every group plus a
+    groups x labels value matrix.
+
+    labels[i] sits in categories[i] on sheet row rows[i], and values[g][i] is
+    group g's value for it. Each label string is stored once for the whole
+    sheet instead of once per group, the object pickles as-is, and to_json()
+    is a flat copy of those lists rather than a walk over nested dicts.
+    """
+
+    __slots__ = ("groups", "labels", "categories", "rows", "values", "_label_index")
+
+    def __init__(
+        self,
+        labels: List,
+        categories: List[str],
+        rows: List[int],
+        groups: Optional[List[str]] = None,
+        values: Optional[List[List]] = None
+    ):
+        self.labels = labels
+        self.categories = categories
+        self.rows = rows
+        self.groups: List[str] = groups if groups is not None else []
+        # values[group index][label index]
+        self.values: List[List] = values if values is not None else []
+        self._label_index: Dict[object, int] = {label: i for i, label in enumerate(labels)}
+
+    @classmethod
+    def from_label_index(cls, labels: Dict[object, Tuple[str, Tuple[int, int]]]) -> "SheetData":
+        """labels: {label: (category, (row, col))}, as FileReader collects them."""
+        return cls(
+            labels=list(labels),
+            categories=[category for category, _ in labels.values()],
+            rows=[location[0] for _, location in labels.values()],
+        )
+
+    @classmethod
+    def from_nested(cls, data: Dict[str, Dict[str, Dict[object, object]]]) -> "SheetData":
+        """Build from {Group: {Category: {Label: Value}}}; every group must have the same labels."""
+        sheet = None
+        for group, categories in data.items():
+            if sheet is None:
+                pairs = [(category, label) for category, labels in categories.items() for label in labels]
+                sheet = cls(
+                    labels=[label for _, label in pairs],
+                    categories=[category for category, _ in pairs],
+                    rows=[0] * len(pairs),
+                )
+            values = [None] * len(sheet.labels)
+            for category, labels in categories.items():
+                for label, value in labels.items():
+                    values[sheet._label_index[label]] = value
+            sheet.add_group(group, values)
+        return sheet if sheet is not None else cls([], [], [])
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "SheetData":
+        """Inverse of to_json()."""
+        return cls(
+            labels=[label for _, label, _ in data["labels"]],
+            categories=[category for category, _, _ in data["labels"]],
+            rows=[row for _, _, row in data["labels"]],
+            groups=list(data["groups"]),
+            values=[list(values) for values in data["values"]],
+        )
+
+    # ----------------- Building -----------------
+    def add_group(self, group: str, values: List) -> None:
+        """values: one per label, in label order."""
+        if len(values) != len(self.labels):
+            raise ValueError(f"Group {group} has {len(values)} values for {len(self.labels)} labels")
+        self.groups.append(group)
+        self.values.append(values)
+
+    # ----------------- Accessors -----------------
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def value(self, group: str, label):
+        return self.values[self.groups.index(group)][self._label_index[label]]
+
+    def category_of(self, label) -> str:
+        return self.categories[self._label_index[label]]
+
+    def group_values(self, group: str) -> Dict[str, Dict[object, object]]:
+        """{Category: {Label: Value}} for one group."""
+        nested: Dict[str, Dict[object, object]] = {}
+        for category, label, value in zip(self.categories, self.labels, self.values[self.groups.index(group)]):
+            nested.setdefault(category, {})[label] = value
+        return nested
+
+    def to_nested(self) -> Dict[str, Dict[str, Dict[object, object]]]:
+        """{Group: {Category: {Label: Value}}}, the layout FileReader used to return."""
+        return {group: self.group_values(group) for group in self.groups}
+
+    def cells(self) -> Iterator[Tuple[str, str, object, object]]:
+        """(group, category, label, value) for every cell, group by group."""
+        for group, values in zip(self.groups, self.values):
+            yield from zip([group] * len(values), self.categories, self.labels, values)
+
+    def distinct_values(self) -> List[List]:
+        """Distinct values of each label column across groups, in first-seen order."""
+        # zip(*values) transposes the matrix in one pass, so each label is a flat column
+        return [list(dict.fromkeys(column)) for column in zip(*self.values)]
+
+    def independent_variables(self) -> Dict[object, List]:
+        """{Label: [distinct values]} for labels whose value differs between groups."""
+        return {
+            label: distinct
+            for label, distinct in zip(self.labels, self.distinct_values())
+            if len(distinct) > 1
+        }
+
+    # ----------------- Serialization -----------------
+    def to_json(self) -> Dict:
+        """
+        {"groups": [...], "labels": [[category, label, row], ...], "values": [[...per label], ...per group]}
+        Values are left as read (numbers, dates, ...) for DjangoJSONEncoder.
+        """
+        return {
+            "groups": self.groups,
+            "labels": [list(t) for t in zip(self.categories, self.labels, self.rows)],
+            "values": self.values,
+        }
+
+    def __getstate__(self):
+        return self.labels, self.categories, self.rows, self.groups, self.values
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __repr__(self):
+        return f"SheetData({len(self.groups)} groups x {len(self.labels)} labels)"
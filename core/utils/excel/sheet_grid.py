@@ -0,0 +1,288 @@
+import posixpath
+import zipfile
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from xml.etree.ElementTree import iterparse
+
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+ROW_TAG = SHEET_NS + "row"
+CELL_TAG = SHEET_NS + "c"
+VALUE_TAG = SHEET_NS + "v"
+FORMULA_TAG = SHEET_NS + "f"
+INLINE_TAG = SHEET_NS + "is"
+TEXT_TAG = SHEET_NS + "t"
+PHONETIC_TAG = SHEET_NS + "rPh"
+SI_TAG = SHEET_NS + "si"
+
+
+def column_index(letters: str) -> int:
+    """'A' -> 1, 'Z' -> 26, 'AA' -> 27"""
+    index = 0
+    for char in letters:
+        index = index * 26 + (ord(char) - 64)
+    return index
+
+
+def split_reference(ref: str) -> Tuple[int, int]:
+    """'C10' -> (10, 3)"""
+    for i, char in enumerate(ref):
+        if char.isdigit():
+            return int(ref[i:]), column_index(ref[:i])
+    raise ValueError(f"Invalid cell reference: {ref}")
+
+
+def _rich_text(node) -> str:
+    """Concatenate every <t> run of a <si>/<is> node, skipping phonetic runs."""
+    parts = []
+    for child in node:
+        if child.tag == TEXT_TAG:
+            parts.append(child.text or "")
+        elif child.tag != PHONETIC_TAG:
+            parts.extend(t.text or "" for t in child.iter(TEXT_TAG))
+    return "".join(parts)
+
+
+class SheetGrid:
+    """
+    Compact, read-only view of a rectangular slice of one worksheet.
+
+    The sheet XML is streamed once straight out of the .xlsx/.xlsm zip and only
+    the requested rows between min_col and max_col are kept, so later lookups are
+    plain list indexing instead of openpyxl's read-only random access (which
+    rescans the sheet XML on every ws.cell() call).
+    Values are converted the same way openpyxl does (shared strings, numbers,
+    booleans, dates, formulas).
+    """
+
+    __slots__ = ("min_col", "max_col", "_rows")
+
+    def __init__(self, min_col: int, max_col: Optional[int], rows: Dict[int, List]):
+        self.min_col = min_col
+        self.max_col = max_col
+        # {row: [values from min_col onwards]}
+        self._rows = rows
+
+    def value(self, row: int, col: int):
+        values = self._rows.get(row)
+        if values is None:
+            return None
+        index = col - self.min_col
+        if 0 <= index < len(values):
+            return values[index]
+        return None
+
+    def row_values(self, row: int) -> List:
+        """All kept values of a row, starting at min_col."""
+        return list(self._rows.get(row, ()))
+
+    @classmethod
+    def from_workbook(
+        cls,
+        file,
+        sheet_name: str,
+        rows: Iterable[int],
+        min_col: int = 1,
+        max_col: Optional[int] = None
+    ) -> "SheetGrid":
+        """
+        file: path or file-like object of the workbook
+        rows: the row numbers to keep
+        min_col/max_col: inclusive column bounds to keep (max_col=None keeps the whole row)
+        """
+        wanted_rows: Set[int] = set(rows)
+        last_row = max(wanted_rows) if wanted_rows else 0
+
+        with zipfile.ZipFile(file) as archive:
+            parts = _workbook_parts(archive)
+            if sheet_name not in parts["sheets"]:
+                raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+            # {row: {col: (type, raw value, style id)}}
+            raw: Dict[int, Dict[int, Tuple[Optional[str], Optional[str], int]]] = {}
+            shared_indexes: Set[int] = set()
+
+            with archive.open(parts["sheets"][sheet_name]) as sheet_xml:
+                _read_sheet(sheet_xml, wanted_rows, last_row, min_col, max_col, raw, shared_indexes)
+
+            shared_strings: Dict[int, str] = {}
+            if shared_indexes and parts["shared_strings"] in archive.namelist():
+                with archive.open(parts["shared_strings"]) as sst_xml:
+                    shared_strings = _read_shared_strings(sst_xml, shared_indexes)
+
+            date_styles: Dict[int, bool] = {}
+            if parts["styles"] in archive.namelist():
+                with archive.open(parts["styles"]) as styles_xml:
+                    date_styles = _read_date_styles(styles_xml)
+
+        epoch = CALENDAR_MAC_1904 if parts["date1904"] else CALENDAR_WINDOWS_1900
+
+        grid_rows: Dict[int, List] = {}
+        for row, cells in raw.items():
+            width = (max(cells) if max_col is None else max_col) - min_col + 1
+            values = [None] * max(width, 0)
+            for col, (data_type, text, style) in cells.items():
+                values[col - min_col] = _convert(data_type, text, style, shared_strings, date_styles, epoch)
+            grid_rows[row] = values
+
+        return cls(min_col, max_col, grid_rows)
+
+
+def _workbook_parts(archive: zipfile.ZipFile) -> Dict:
+    """Resolve sheet names, shared strings and styles to their zip member paths."""
+    targets: Dict[str, str] = {}
+    shared_strings = "xl/sharedStrings.xml"
+    styles = "xl/styles.xml"
+
+    with archive.open("xl/_rels/workbook.xml.rels") as rels_xml:
+        for _, rel in iterparse(rels_xml):
+            if rel.tag != PKG_REL_NS + "Relationship":
+                continue
+            target = rel.get("Target", "")
+            target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+            targets[rel.get("Id")] = target
+            rel_type = rel.get("Type", "")
+            if rel_type.endswith("/sharedStrings"):
+                shared_strings = target
+            elif rel_type.endswith("/styles"):
+                styles = target
+
+    sheets: Dict[str, str] = {}
+    date1904 = False
+    with archive.open("xl/workbook.xml") as workbook_xml:
+        for _, node in iterparse(workbook_xml):
+            if node.tag == SHEET_NS + "sheet":
+                sheets[node.get("name")] = targets.get(node.get(REL_NS + "id"))
+            elif node.tag == SHEET_NS + "workbookPr":
+                date1904 = node.get("date1904") in ("1", "true")
+
+    return {"sheets": sheets, "shared_strings": shared_strings, "styles": styles, "date1904": date1904}
+
+
+def _read_sheet(sheet_xml, wanted_rows, last_row, min_col, max_col, raw, shared_indexes) -> None:
+    sheet_data = None
+    shared_formulas: Dict[str, Tuple[str, str]] = {}
+    row_number = 0
+
+    for event, node in iterparse(sheet_xml, events=("start", "end")):
+        if event == "start":
+            if node.tag == SHEET_NS + "sheetData":
+                sheet_data = node
+            continue
+        if node.tag != ROW_TAG:
+            continue
+
+        row_number = int(node.get("r", row_number + 1))
+        if row_number > last_row:
+            break
+
+        keep_row = row_number in wanted_rows
+        cells = {}
+        col = 0
+        for cell in node.iter(CELL_TAG):
+            ref = cell.get("r")
+            if ref:
+                col = split_reference(ref)[1]
+            else:
+                col += 1
+                ref = f"{get_column_letter(col)}{row_number}"
+            formula = cell.find(FORMULA_TAG)
+            # Shared formula masters can live outside the rows and columns we keep
+            if formula is not None and formula.get("t") == "shared" and formula.text:
+                shared_formulas[formula.get("si")] = (formula.text, ref)
+            if not keep_row or col < min_col or (max_col is not None and col > max_col):
+                continue
+            cells[col] = _raw_cell(cell, formula, ref, shared_formulas, shared_indexes)
+        if cells:
+            raw[row_number] = cells
+
+        node.clear()
+        if sheet_data is not None:
+            sheet_data.remove(node)
+
+
+def _raw_cell(cell, formula, ref, shared_formulas, shared_indexes):
+    data_type = cell.get("t", "n")
+    style = int(cell.get("s", 0))
+
+    if formula is not None:
+        text = formula.text
+        if text is None and formula.get("t") == "shared" and formula.get("si") in shared_formulas:
+            master_text, master_ref = shared_formulas[formula.get("si")]
+            text = Translator("=" + master_text, origin=master_ref).translate_formula(ref)[1:]
+        if text is not None:
+            return "f", text, style
+
+    if data_type == "inlineStr":
+        inline = cell.find(INLINE_TAG)
+        return "str", None if inline is None else _rich_text(inline), style
+
+    value = cell.find(VALUE_TAG)
+    text = None if value is None else value.text
+    if data_type == "s" and text is not None:
+        shared_indexes.add(int(text))
+    return data_type, text, style
+
+
+def _read_shared_strings(sst_xml, wanted: Set[int]) -> Dict[int, str]:
+    strings: Dict[int, str] = {}
+    last = max(wanted)
+    index = 0
+    for _, node in iterparse(sst_xml):
+        if node.tag != SI_TAG:
+            continue
+        if index in wanted:
+            strings[index] = _rich_text(node)
+        node.clear()
+        if index >= last:
+            break
+        index += 1
+    return strings
+
+
+def _read_date_styles(styles_xml) -> Dict[int, bool]:
+    """{cell style id: True for dates, False for timedeltas} for date-formatted styles only."""
+    custom_formats: Dict[int, str] = {}
+    xf_formats: List[int] = []
+    in_cell_xfs = False
+
+    for event, node in iterparse(styles_xml, events=("start", "end")):
+        if node.tag == SHEET_NS + "cellXfs":
+            in_cell_xfs = event == "start"
+        elif event == "end" and node.tag == SHEET_NS + "numFmt":
+            custom_formats[int(node.get("numFmtId"))] = node.get("formatCode")
+        elif event == "end" and node.tag == SHEET_NS + "xf" and in_cell_xfs:
+            xf_formats.append(int(node.get("numFmtId", 0)))
+
+    date_styles: Dict[int, bool] = {}
+    for style_id, format_id in enumerate(xf_formats):
+        code = custom_formats.get(format_id, BUILTIN_FORMATS.get(format_id))
+        if code and is_date_format(code):
+            date_styles[style_id] = not is_timedelta_format(code)
+    return date_styles
+
+
+def _convert(data_type, text, style, shared_strings, date_styles, epoch):
+    if text is None:
+        return None
+    if data_type == "f":
+        return "=" + text
+    if data_type == "s":
+        return shared_strings.get(int(text))
+    if data_type in ("str", "inlineStr", "e"):
+        return text
+    if data_type == "b":
+        return bool(int(text))
+    if data_type == "d":
+        return from_ISO8601(text)
+
+    number = float(text) if "." in text or "E" in text or "e" in text else int(text)
+    if style in date_styles:
+        return from_excel(number, epoch, timedelta=not date_styles[style])
+    return number
@@ -0,0 +1,240 @@
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .spell_index import CACHE_DIRECTORY
+
+SPELL_CACHE_PATH = os.path.join(CACHE_DIRECTORY, "spell_cache.sqlite3")
+SPELL_CACHE_SIZE = 20000
+# Rows kept in the shared SQLite file, across namespaces; least recently used go first
+SPELL_CACHE_DISK_ENTRIES = 500000
+
+# Stored for words that were checked and need no correction
+NO_CORRECTION = ""
+
+
+class SpellCache:
+    """
+    Two-level cache of spell-check results: {word: correction or "no correction"}.
+
+    A bounded in-process LRU sits in front of a SQLite file that every worker
+    process shares, so a word is only ever corrected once per spell index
+    (namespace) no matter which worker sees it first. Like DiskCache, the file is
+    bounded: past max_disk_entries rows the least recently used are evicted.
+    If the SQLite file can't be used the cache keeps working in memory only.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        path: str = SPELL_CACHE_PATH,
+        max_entries: int = SPELL_CACHE_SIZE,
+        max_disk_entries: int = SPELL_CACHE_DISK_ENTRIES
+    ):
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+        self._disk_available = True
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    # ----------------- Lookups -----------------
+    def get(self, word: str) -> Tuple[bool, Optional[str]]:
+        """Return (found, correction); correction is None when the word needs none."""
+        if word in self._memory:
+            self._memory.move_to_end(word)
+            self.hits += 1
+            return True, self._memory[word] or None
+
+        stored = self._disk_get(word)
+        if stored is not None:
+            self._remember(word, stored)
+            self.hits += 1
+            self.disk_hits += 1
+            return True, stored or None
+
+        self.misses += 1
+        return False, None
+
+    def get_many(self, words: Iterable[str]) -> Tuple[Dict[str, Optional[str]], List[str]]:
+        """Return ({word: correction or None} for cached words, [words not cached])."""
+        found: Dict[str, Optional[str]] = {}
+        pending: List[str] = []
+        for word in words:
+            if word in self._memory:
+                self._memory.move_to_end(word)
+                self.hits += 1
+                found[word] = self._memory[word] or None
+            else:
+                pending.append(word)
+
+        stored = self._disk_get_many(pending)
+        missing = []
+        for word in pending:
+            if word in stored:
+                self._remember(word, stored[word])
+                self.hits += 1
+                self.disk_hits += 1
+                found[word] = stored[word] or None
+            else:
+                self.misses += 1
+                missing.append(word)
+        return found, missing
+
+    def set(self, word: str, correction: Optional[str]) -> None:
+        self.set_many({word: correction})
+
+    def set_many(self, corrections: Dict[str, Optional[str]]) -> None:
+        items = [(word, correction or NO_CORRECTION) for word, correction in corrections.items()]
+        for word, stored in items:
+            self._remember(word, stored)
+        self._disk_set(items)
+
+    def stats(self) -> Dict[str, int]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "memory_entries": len(self._memory),
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def disk_entries(self) -> int:
+        connection = self._connect()
+        if connection is None:
+            return 0
+        row = connection.execute(
+            "SELECT COUNT(*) FROM corrections WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        return row[0]
+
+    def clear(self) -> None:
+        """Drop every cached result, in memory and on disk."""
+        self._memory.clear()
+        connection = self._connect()
+        if connection is not None:
+            connection.execute("DELETE FROM corrections")
+
+    def purge_other_namespaces(self) -> int:
+        """
+        Drop results cached for other spell indexes; returns how many. Run when the index
+        is rebuilt (build_spell_index), not per worker: results of an index still in use
+        elsewhere would be lost, and leftovers age out through eviction anyway.
+        """
+        connection = self._connect()
+        if connection is None:
+            return 0
+        try:
+            return connection.execute("DELETE FROM corrections WHERE namespace != ?", (self.namespace,)).rowcount
+        except sqlite3.Error:
+            return 0
+
+    # ----------------- Internals -----------------
+    def _remember(self, word: str, stored: str) -> None:
+        self._memory[word] = stored
+        self._memory.move_to_end(word)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if not self._disk_available:
+            return None
+        # sqlite connections must not be shared across a fork
+        if self._connection is not None and self._connection_pid == os.getpid():
+            return self._connection
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS corrections ("
+                "namespace TEXT NOT NULL, word TEXT NOT NULL, correction TEXT NOT NULL, "
+                "last_used REAL NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (namespace, word)) WITHOUT ROWID"
+            )
+            # Files written before the cache was bounded have no last_used column
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(corrections)")}
+            if "last_used" not in columns:
+                connection.execute("ALTER TABLE corrections ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            connection.execute("CREATE INDEX IF NOT EXISTS corrections_last_used ON corrections (last_used)")
+        except sqlite3.Error:
+            self._disk_available = False
+            return None
+        self._connection = connection
+        self._connection_pid = os.getpid()
+        return connection
+
+    def _disk_get(self, word: str) -> Optional[str]:
+        return self._disk_get_many([word]).get(word)
+
+    def _disk_get_many(self, words: List[str], batch_size: int = 500) -> Dict[str, str]:
+        connection = self._connect()
+        if connection is None or not words:
+            return {}
+        stored: Dict[str, str] = {}
+        now = time.time()
+        try:
+            for i in range(0, len(words), batch_size):
+                batch = words[i:i + batch_size]
+                placeholders = ", ".join("?" * len(batch))
+                found = connection.execute(
+                    f"SELECT word, correction FROM corrections WHERE namespace = ? AND word IN ({placeholders})",
+                    [self.namespace, *batch]
+                ).fetchall()
+                if found:
+                    # Marked as just used, one statement per batch
+                    connection.execute(
+                        f"UPDATE corrections SET last_used = ? WHERE namespace = ? "
+                        f"AND word IN ({', '.join('?' * len(found))})",
+                        [now, self.namespace, *(word for word, _ in found)]
+                    )
+                stored.update(found)
+        except sqlite3.Error:
+            pass
+        return stored
+
+    def _disk_set(self, items: List[Tuple[str, str]]) -> None:
+        connection = self._connect()
+        if connection is None or not items:
+            return
+        try:
+            now = time.time()
+            connection.execute("BEGIN")
+            connection.executemany(
+                "INSERT OR REPLACE INTO corrections (namespace, word, correction, last_used) VALUES (?, ?, ?, ?)",
+                [(self.namespace, word, stored, now) for word, stored in items]
+            )
+            self._evict(connection)
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        total = connection.execute("SELECT COUNT(*) FROM corrections").fetchone()[0]
+        if total <= self.max_disk_entries:
+            return
+        # Down to 90% of the cap, so a full cache doesn't evict on every write
+        excess = total - self.max_disk_entries * 9 // 10
+        evicted = connection.execute(
+            "DELETE FROM corrections WHERE (namespace, word) IN "
+            "(SELECT namespace, word FROM corrections ORDER BY last_used LIMIT ?)",
+            (excess,)
+        ).rowcount
+        self.disk_evictions += evicted
@@ -0,0 +1,339 @@
+import hashlib
+import json
+import mmap
+import os
+import string
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from importlib.metadata import PackageNotFoundError, version
+from typing import Dict, Iterable, Optional, Set
+
+INDEX_VERSION = 3
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+INDEX_PATH = os.path.join(CACHE_DIRECTORY, "spell_index.bin")
+
+# File layout: MAGIC, uint64 header length, JSON header, then 8-byte aligned sections
+MAGIC = b"SYMSPELL"
+SECTIONS = ("word_offsets", "counts", "word_hashes", "deletes", "word_blob")
+
+
+def dictionary_version() -> str:
+    try:
+        return version("pyspellchecker")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def index_fingerprint(skip_terms: Iterable[str]) -> str:
+    """Changes whenever the dictionary, TECH_TERMS or the index layout change."""
+    parts = [str(INDEX_VERSION), str(MAX_DISTANCE), str(PREFIX_LENGTH), dictionary_version()]
+    parts.extend(sorted(skip_terms))
+    return hashlib.sha256("\t".join(parts).encode("utf-8")).hexdigest()
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """Every string reachable from word with up to `distance` deletions (word included)."""
+    result = {word}
+    edge = {word}
+    for _ in range(distance):
+        next_edge = set()
+        for item in edge:
+            for i in range(len(item)):
+                next_edge.add(item[:i] + item[i + 1:])
+        next_edge -= result
+        result |= next_edge
+        edge = next_edge
+    return result
+
+
+def _bucket(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True when b is exactly one insert/delete/replace/adjacent transpose away from a."""
+    if a == b:
+        return False
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > 1:
+        return False
+    prefix = 0
+    while prefix < min(len_a, len_b) and a[prefix] == b[prefix]:
+        prefix += 1
+    if len_a == len_b:
+        if a[prefix + 1:] == b[prefix + 1:]:
+            return True
+        return (
+            prefix + 1 < len_a
+            and a[prefix] == b[prefix + 1]
+            and a[prefix + 1] == b[prefix]
+            and a[prefix + 2:] == b[prefix + 2:]
+        )
+    if len_a > len_b:
+        return a[prefix + 1:] == b[prefix:]
+    return a[prefix:] == b[prefix + 1:]
+
+
+def damerau_levenshtein(a: str, b: str) -> int:
+    """
+    Unrestricted Damerau-Levenshtein distance (Lowrance-Wagner), i.e. the fewest
+    insert/delete/replace/adjacent-transpose operations, which is exactly how
+    pyspellchecker chains its edit_distance_1 steps.
+    """
+    len_a, len_b = len(a), len(b)
+    infinity = len_a + len_b
+    last_row: Dict[str, int] = {}
+    rows = [[infinity] * (len_b + 2) for _ in range(len_a + 2)]
+    for i in range(len_a + 1):
+        rows[i + 1][1] = i
+    for j in range(len_b + 1):
+        rows[1][j + 1] = j
+
+    for i in range(1, len_a + 1):
+        last_match_col = 0
+        for j in range(1, len_b + 1):
+            k = last_row.get(b[j - 1], 0)
+            last_col = last_match_col
+            if a[i - 1] == b[j - 1]:
+                cost = 0
+                last_match_col = j
+            else:
+                cost = 1
+            rows[i + 1][j + 1] = min(
+                rows[i][j] + cost,
+                rows[i + 1][j] + 1,
+                rows[i][j + 1] + 1,
+                rows[k][last_col] + (i - k - 1) + 1 + (j - last_col - 1),
+            )
+        last_row[a[i - 1]] = i
+    return rows[len_a + 1][len_b + 1]
+
+
+class SymSpellIndex:
+    """
+    Symmetric-delete correction index over the pyspellchecker frequency dictionary.
+
+    Every dictionary word's prefix is expanded into its deletes once, at build time,
+    and stored as a sorted array of (crc32(delete) << 32 | word id). A lookup only
+    generates the deletes of the misspelled word (at most 29 for the default
+    prefix) and bisects into that array, instead of generating the hundreds of
+    thousands of edit-distance-2 strings SpellChecker.correction does.
+
+    The compiled index is a single read-only file of flat arrays (word offsets,
+    frequencies, sorted word and delete hashes, UTF-8 word blob) that is memory
+    mapped rather than unpickled, so every worker process shares one copy through
+    the OS page cache and nothing is decoded until a word is actually looked up.
+
+    correction() returns the same answer as SpellChecker.correction: the most
+    frequent known word at edit distance 1, else at edit distance 2, else None.
+    Frequency ties are broken alphabetically (pyspellchecker breaks them by set order).
+    Skip terms are treated as known words, so they are returned unchanged.
+    """
+
+    def __init__(self, buffer, header: Dict, sections: Dict[str, memoryview]):
+        self._buffer = buffer
+        self.fingerprint: str = header["fingerprint"]
+        self.skip_terms: Set[str] = set(header["skip_terms"])
+        # Skip terms (TECH_TERMS) count as correctly spelled, whatever their case
+        self._skipped: Set[str] = {term.lower() for term in self.skip_terms}
+        self.longest_word_length: int = header["longest_word_length"]
+        self.word_count: int = header["word_count"]
+
+        self.word_offsets = sections["word_offsets"]
+        self.counts = sections["counts"]
+        self.word_hashes = sections["word_hashes"]
+        self.deletes = sections["deletes"]
+        self.word_blob = sections["word_blob"]
+
+    # ----------------- Building / Loading -----------------
+    @staticmethod
+    def build(frequencies: Dict[str, int], skip_terms: Iterable[str], path: str = INDEX_PATH) -> None:
+        """Compile the index file for a {word: frequency} dictionary."""
+        skip_terms = set(skip_terms)
+        words = sorted(w for w in frequencies if _should_check(w, 0))
+
+        blob = bytearray()
+        offsets = array("I", [0])
+        for word in words:
+            blob += word.encode("utf-8")
+            offsets.append(len(blob))
+
+        keys = []
+        for word_id, word in enumerate(words):
+            for deleted in _deletes(word[:PREFIX_LENGTH], MAX_DISTANCE):
+                keys.append(_bucket(deleted) << 32 | word_id)
+        keys.sort()
+
+        arrays = {
+            "word_offsets": offsets,
+            "counts": array("Q", (frequencies[w] for w in words)),
+            "word_hashes": array("Q", sorted(_bucket(w) << 32 | i for i, w in enumerate(words))),
+            "deletes": array("Q", keys),
+            "word_blob": array("B", bytes(blob)),
+        }
+        if sys.byteorder != "little":
+            for values in arrays.values():
+                values.byteswap()
+
+        header = {
+            "version": INDEX_VERSION,
+            "fingerprint": index_fingerprint(skip_terms),
+            "skip_terms": sorted(skip_terms),
+            "longest_word_length": max((len(w) for w in words), default=0),
+            "word_count": len(words),
+            "sections": {},
+        }
+        # Section offsets are relative to the end of the header, so they don't depend on its length
+        position = 0
+        for name in SECTIONS:
+            size = len(arrays[name]) * arrays[name].itemsize
+            header["sections"][name] = [position, size, arrays[name].typecode]
+            position += size + (-size % 8)
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        header_bytes += b" " * (-(len(MAGIC) + 8 + len(header_bytes)) % 8)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrently starting workers never map half a file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+            for name in SECTIONS:
+                data = arrays[name].tobytes()
+                f.write(data + b"\0" * (-len(data) % 8))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def build_from_spellchecker(cls, skip_terms: Iterable[str], path: str = INDEX_PATH) -> None:
+        # Only the build step ever decompresses the pyspellchecker dictionary
+        from spellchecker import SpellChecker
+
+        cls.build(SpellChecker().word_frequency.dictionary, skip_terms, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "SymSpellIndex":
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a spell index")
+        header_length = struct.unpack_from("<Q", buffer, len(MAGIC))[0]
+        data_start = len(MAGIC) + 8 + header_length
+        header = json.loads(bytes(buffer[len(MAGIC) + 8:data_start]))
+        if header.get("version") != INDEX_VERSION or sys.byteorder != "little":
+            raise ValueError(f"{path} was built for a different index layout")
+
+        view = memoryview(buffer)
+        sections = {}
+        for name, (offset, size, typecode) in header["sections"].items():
+            sections[name] = view[data_start + offset:data_start + offset + size].cast(typecode)
+        return cls(buffer, header, sections)
+
+    @classmethod
+    def load_or_build(cls, skip_terms: Iterable[str], path: str = INDEX_PATH) -> "SymSpellIndex":
+        """Map the compiled index, rebuilding it first when missing or stale."""
+        skip_terms = set(skip_terms)
+        if os.path.exists(path):
+            try:
+                index = cls.load(path)
+                if index.fingerprint == index_fingerprint(skip_terms):
+                    return index
+            except (OSError, ValueError, KeyError):
+                pass
+        cls.build_from_spellchecker(skip_terms, path)
+        return cls.load(path)
+
+    # ----------------- Lookups -----------------
+    def word(self, word_id: int) -> str:
+        return bytes(self.word_blob[self.word_offsets[word_id]:self.word_offsets[word_id + 1]]).decode("utf-8")
+
+    def word_id(self, word: str) -> Optional[int]:
+        """Id of a lowercase dictionary word, or None."""
+        bucket = _bucket(word)
+        position = bisect_left(self.word_hashes, bucket << 32)
+        while position < self.word_count and self.word_hashes[position] >> 32 == bucket:
+            word_id = self.word_hashes[position] & 0xFFFFFFFF
+            if self.word(word_id) == word:
+                return word_id
+            position += 1
+        return None
+
+    def known(self, word: str) -> bool:
+        lower = word.lower()
+        return lower in self._skipped or self.word_id(lower) is not None
+
+    def frequency(self, word: str) -> int:
+        word_id = self.word_id(word.lower())
+        return 0 if word_id is None else self.counts[word_id]
+
+    def _candidate_ids(self, word: str) -> Optional[Dict[int, str]]:
+        lower = word.lower()
+        one_edit: Dict[int, str] = {}
+        nearby: Dict[int, str] = {}
+        seen: Set[int] = set()
+        for deleted in _deletes(lower[:PREFIX_LENGTH], MAX_DISTANCE):
+            bucket = _bucket(deleted)
+            position = bisect_left(self.deletes, bucket << 32)
+            while position < len(self.deletes) and self.deletes[position] >> 32 == bucket:
+                word_id = self.deletes[position] & 0xFFFFFFFF
+                position += 1
+                if word_id in seen:
+                    continue
+                seen.add(word_id)
+                length = self.word_offsets[word_id + 1] - self.word_offsets[word_id]
+                # Byte length bounds the character length; decode only plausible words
+                if length < len(lower) - MAX_DISTANCE:
+                    continue
+                candidate = self.word(word_id)
+                if abs(len(candidate) - len(lower)) > MAX_DISTANCE:
+                    continue
+                if within_one_edit(lower, candidate):
+                    one_edit[word_id] = candidate
+                elif not one_edit:
+                    nearby[word_id] = candidate
+
+        if one_edit:
+            return one_edit
+        # The full distance is only needed when nothing is a single edit away
+        two_edits = {i: c for i, c in nearby.items() if damerau_levenshtein(lower, c) == 2}
+        return two_edits or None
+
+    def candidates(self, word: str) -> Optional[Set[str]]:
+        """Same contract as SpellChecker.candidates."""
+        lower = word.lower()
+        if self.known(lower) or not _should_check(lower, self.longest_word_length):
+            return {word}
+        found = self._candidate_ids(word)
+        return set(found.values()) if found else None
+
+    def correction(self, word: str) -> Optional[str]:
+        """Same contract as SpellChecker.correction."""
+        lower = word.lower()
+        if self.known(lower) or not _should_check(lower, self.longest_word_length):
+            return word
+        found = self._candidate_ids(word)
+        if not found:
+            return None
+        best = min(found, key=lambda i: (-self.counts[i], found[i]))
+        return found[best]
+
+
+def _should_check(word: str, longest_word_length: int) -> bool:
+    """Mirror of SpellChecker._check_if_should_check."""
+    if len(word) == 1 and word in string.punctuation:
+        return False
+    if longest_word_length and len(word) > longest_word_length + 3:
+        return False
+    if word.lower() in ("nan", "inf", "infinity"):
+        return True
+    try:
+        float(word)
+        return False
+    except ValueError:
+        return True
@@ -0,0 +1,111 @@
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+from django.db import transaction
+from django.db.models import F
+
+from core.models import GroupSubData, ProjectData, VocabularyToken
+from .file_reader import get_spell_index, spelling_tokens
+
+# A token has to be confirmed this many times across all projects before it is
+# trusted everywhere; across one owner's projects (their lab) one confirmation is enough.
+GLOBAL_MIN_COUNT = 3
+
+BATCH_SIZE = 500
+
+
+def count_tokens(values: Iterable) -> Counter:
+    """{lowercase token: occurrences} for the tokens the spell checker doesn't know."""
+    counts: Counter = Counter()
+    index = get_spell_index()
+    for value in values:
+        for token in spelling_tokens(value):
+            if not index.known(token):
+                counts[token.lower()] += 1
+    return counts
+
+
+def known_vocabulary(project: Optional[ProjectData] = None) -> FrozenSet[str]:
+    """
+    Lowercase tokens that skip spell correction for this project (global scope when None).
+    Besides the global scope, every token confirmed in any of the owner's projects counts:
+    uploads are previewed for a freshly created project that has no vocabulary of its own yet.
+    """
+    tokens = set(
+        VocabularyToken.objects
+        .filter(project__isnull=True, count__gte=GLOBAL_MIN_COUNT)
+        .values_list("token", flat=True)
+    )
+    if project is not None:
+        tokens.update(
+            VocabularyToken.objects
+            .filter(project__owner_id=project.owner_id)
+            .values_list("token", flat=True)
+            .distinct()
+        )
+    return frozenset(tokens)
+
+
+def _add_counts(project: Optional[ProjectData], counts: Counter, min_count: int) -> Set[str]:
+    """Increment one scope's counts; returns the tokens that just reached min_count."""
+    scope = VocabularyToken.objects.filter(project=project)
+    tokens = list(counts)
+
+    before: Dict[str, int] = {}
+    for i in range(0, len(tokens), BATCH_SIZE):
+        before.update(scope.filter(token__in=tokens[i:i + BATCH_SIZE]).values_list("token", "count"))
+
+    # ignore_conflicts keeps concurrent confirms from tripping over the same new token
+    VocabularyToken.objects.bulk_create(
+        [VocabularyToken(project=project, token=t, count=0) for t in tokens if t not in before],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+    # One UPDATE per distinct increment instead of one per token
+    by_increment = defaultdict(list)
+    for token, n in counts.items():
+        by_increment[n].append(token)
+    for n, same in by_increment.items():
+        for i in range(0, len(same), BATCH_SIZE):
+            scope.filter(token__in=same[i:i + BATCH_SIZE]).update(count=F("count") + n)
+
+    return {t for t, n in counts.items() if before.get(t, 0) < min_count <= before.get(t, 0) + n}
+
+
+def record_confirmed_values(project: ProjectData, values: Iterable) -> Set[str]:
+    """
+    Learn the tokens of newly confirmed GroupSubData values, in both scopes.
+    Returns the tokens that became known (and so change spell-check results).
+    """
+    counts = count_tokens(values)
+    if not counts:
+        return set()
+    learned = _add_counts(project, counts, 1)
+    learned |= _add_counts(None, counts, GLOBAL_MIN_COUNT)
+    return learned
+
+
+def rebuild_vocabulary(chunk_size: int = 2000) -> int:
+    """Recount every confirmed value from scratch; returns the number of rows written."""
+    project_counts: Dict[int, Counter] = defaultdict(Counter)
+    rows = (
+        GroupSubData.objects
+        .exclude(value__isnull=True)
+        .values_list("group__project_id", "value")
+        .iterator(chunk_size=chunk_size)
+    )
+    for project_id, value in rows:
+        project_counts[project_id].update(count_tokens([value]))
+
+    global_counts: Counter = Counter()
+    entries = []
+    for project_id, counts in project_counts.items():
+        global_counts.update(counts)
+        entries.extend(VocabularyToken(project_id=project_id, token=t, count=n) for t, n in counts.items())
+    entries.extend(VocabularyToken(project=None, token=t, count=n) for t, n in global_counts.items())
+
+    with transaction.atomic():
+        VocabularyToken.objects.all().delete()
+        VocabularyToken.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+    return len(entries)
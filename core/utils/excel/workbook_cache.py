@@ -0,0 +1,60 @@
+import hashlib
+import json
+import os
+from typing import BinaryIO, Dict
+
+from .disk_cache import DiskCache
+from .excel_file_generation import GENERATOR_VERSION, ExcelFileGenerator, template_bytes
+from .project_data import FileReaderProjectData
+from .spell_index import CACHE_DIRECTORY
+
+WORKBOOK_CACHE_DIRECTORY = os.path.join(CACHE_DIRECTORY, "workbooks")
+WORKBOOK_CACHE_MAX_BYTES = 128 * 2 ** 20
+
+# {cache key: generated .xlsm bytes}, see workbook_cache_key()
+WORKBOOK_CACHE = DiskCache(WORKBOOK_CACHE_DIRECTORY, WORKBOOK_CACHE_MAX_BYTES)
+
+# {template path: sha256 of its bytes}
+_template_digests: Dict[str, str] = {}
+
+
+def template_digest(path: str) -> str:
+    digest = _template_digests.get(path)
+    if digest is None:
+        digest = _template_digests[path] = hashlib.sha256(template_bytes(path)).hexdigest()
+    return digest
+
+
+def workbook_cache_key(generator: ExcelFileGenerator, project_data: FileReaderProjectData) -> str:
+    """
+    Everything a generated workbook depends on: the template file, the generator
+    version and engine, and the project name and groups written into it.
+    """
+    parts = [
+        str(GENERATOR_VERSION),
+        generator.engine,
+        template_digest(generator.template_path()),
+        project_data.get_name(),
+        json.dumps(list(project_data.get_groups())),
+    ]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def cached_workbook(generator: ExcelFileGenerator, project_data: FileReaderProjectData) -> BinaryIO:
+    """
+    The generated workbook for this layout as a readable file: straight from the
+    cache when the same name and groups were generated before, otherwise generated
+    (and stored) now. The caller closes it, e.g. by handing it to FileResponse.
+    """
+    key = workbook_cache_key(generator, project_data)
+    path = WORKBOOK_CACHE.get_path(key)
+    if path is not None:
+        try:
+            return open(path, "rb")
+        except OSError:
+            # Evicted by another process between the lookup and the open
+            pass
+
+    workbook = generator.make_new_workbook_from_template(project_data)
+    WORKBOOK_CACHE.set(key, workbook.getvalue())
+    return workbook
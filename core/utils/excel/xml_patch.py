@@ -0,0 +1,357 @@
+import re
+import struct
+import zipfile
+import zlib
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter
+
+from .sheet_grid import _workbook_parts, split_reference
+
+ROW_RE = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+CELL_RE = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+XF_RE = re.compile(r"<xf\b[^>]*?(?:/>|>.*?</xf>)", re.S)
+ATTR_RE = r'\s{}="[^"]*"'
+
+# Worksheet children that must come after <dataValidations> (CT_Worksheet order)
+AFTER_DATA_VALIDATIONS = (
+    "<hyperlinks", "<printOptions", "<pageMargins", "<pageSetup", "<headerFooter", "<rowBreaks", "<colBreaks",
+    "<customProperties", "<cellWatches", "<ignoredErrors", "<smartTags", "<drawing", "<legacyDrawing",
+    "<legacyDrawingHF", "<picture", "<oleObjects", "<controls", "<webPublishItems", "<tableParts", "<extLst",
+    "<mc:AlternateContent",
+)
+
+# What ExcelFileGenerator.add_project_data applies through openpyxl, as style parts
+THIN_BORDER = (
+    '<border><left style="thin"><color rgb="00000000"/></left><right style="thin"><color rgb="00000000"/></right>'
+    '<top style="thin"><color rgb="00000000"/></top><bottom style="thin"><color rgb="00000000"/></bottom>'
+    '<diagonal/></border>'
+)
+TITLE_FONT = '<font><b val="1"/><sz val="18"/></font>'
+TITLE_FILL = (
+    '<fill><patternFill patternType="solid"><fgColor rgb="00BDD7EE"/><bgColor rgb="00BDD7EE"/></patternFill></fill>'
+)
+
+
+def _attr(tag: str, name: str) -> Optional[str]:
+    match = re.search(r'\s{}="([^"]*)"'.format(name), tag)
+    return match.group(1) if match else None
+
+
+def _set_attr(tag: str, name: str, value) -> str:
+    """Set name="value" on an element's start tag (or its attribute string)."""
+    pattern = ATTR_RE.format(name)
+    if re.search(pattern, tag):
+        return re.sub(pattern, f' {name}="{value}"', tag, count=1)
+    end = len(tag) - (2 if tag.endswith("/>") else 1) if tag.startswith("<") else len(tag)
+    return f'{tag[:end]} {name}="{value}"{tag[end:]}'
+
+
+def _append_to_list(xml: str, tag: str, items: Sequence[str]) -> Tuple[str, int]:
+    """Append items to a <tag count="n">...</tag> list part; returns (xml, index of the first new item)."""
+    start = re.search(r"<{}\b[^>]*>".format(tag), xml)
+    end = xml.index(f"</{tag}>", start.end())
+    first = int(_attr(start.group(0), "count") or 0)
+    opening = _set_attr(start.group(0), "count", first + len(items))
+    return xml[:start.start()] + opening + xml[start.end():end] + "".join(items) + xml[end:], first
+
+
+def _patch_xf(xf: str, **attrs) -> str:
+    """Copy of an <xf> with attributes replaced and, when unlocking, a <protection locked="0"/> child."""
+    unlock = attrs.pop("unlock", False)
+    head_end = xf.index(">") + 1
+    head, body = xf[:head_end], xf[head_end:]
+    if head.endswith("/>"):
+        head, body = head[:-2] + ">", "</xf>"
+    for name, value in attrs.items():
+        head = _set_attr(head, name, value)
+    if unlock:
+        body = re.sub(r"<protection\b[^>]*/>", "", body)
+        # <protection> follows <alignment> and precedes <extLst>
+        insert_at = body.index("<extLst") if "<extLst" in body else body.index("</xf>")
+        body = body[:insert_at] + '<protection locked="0"/>' + body[insert_at:]
+    return head + body
+
+
+# ----------------- Raw zip members -----------------
+class _RawMember:
+    """A zip member kept compressed, so it can be written back without inflating it."""
+    __slots__ = ("name", "flags", "method", "dos_time", "dos_date", "crc", "compress_size", "file_size", "data")
+
+    def __init__(self, name, flags, method, dos_time, dos_date, crc, compress_size, file_size, data):
+        self.name = name
+        self.flags = flags
+        self.method = method
+        self.dos_time = dos_time
+        self.dos_date = dos_date
+        self.crc = crc
+        self.compress_size = compress_size
+        self.file_size = file_size
+        self.data = data
+
+    @classmethod
+    def from_archive(cls, template: bytes, info: zipfile.ZipInfo) -> "_RawMember":
+        # Local header: 30 fixed bytes, then the name and extra field, then the data
+        name_length, extra_length = struct.unpack("<HH", template[info.header_offset + 26:info.header_offset + 30])
+        start = info.header_offset + 30 + name_length + extra_length
+        return cls._with_times(info, info.compress_type, info.CRC, info.compress_size, info.file_size,
+                               template[start:start + info.compress_size])
+
+    @classmethod
+    def deflated(cls, info: zipfile.ZipInfo, content: bytes) -> "_RawMember":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        data = compressor.compress(content) + compressor.flush()
+        return cls._with_times(info, zipfile.ZIP_DEFLATED, zlib.crc32(content), len(data), len(content), data)
+
+    @classmethod
+    def _with_times(cls, info, method, crc, compress_size, file_size, data):
+        year, month, day, hour, minute, second = info.date_time
+        dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+        dos_time = hour << 11 | minute << 5 | second // 2
+        # Only the UTF-8 name flag carries over; sizes are always in the local header here
+        flags = info.flag_bits & 0x800
+        return cls(info.filename, flags, method, dos_time, dos_date, crc, compress_size, file_size, data)
+
+    def local_record(self) -> bytes:
+        name = self.name.encode("utf-8")
+        return struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 20, self.flags, self.method, self.dos_time, self.dos_date,
+            self.crc, self.compress_size, self.file_size, len(name), 0
+        ) + name + self.data
+
+    def central_record(self, offset: int) -> bytes:
+        name = self.name.encode("utf-8")
+        return struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50, 20, 20, self.flags, self.method, self.dos_time, self.dos_date,
+            self.crc, self.compress_size, self.file_size, len(name), 0, 0, 0, 0, 0, offset
+        ) + name
+
+
+def _write_zip(records: Iterable[Tuple[_RawMember, bytes]]) -> bytes:
+    """records: (member, its local record bytes) in archive order."""
+    out = BytesIO()
+    central = []
+    for member, local in records:
+        central.append(member.central_record(out.tell()))
+        out.write(local)
+    directory_offset = out.tell()
+    directory = b"".join(central)
+    out.write(directory)
+    out.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(central), len(central),
+                          len(directory), directory_offset, 0))
+    return out.getvalue()
+
+
+# ----------------- Template patcher -----------------
+class TemplatePatcher:
+    """
+    Fills the template's data-entry sheet by editing its XML directly.
+
+    Every zip member except the sheet is copied byte for byte (still compressed),
+    including the VBA project, the Source sheet and the sheet's form controls,
+    which openpyxl drops. The styles part is patched once, when the patcher is
+    built, with one new <xf> per (existing cell style, fill) combination the
+    group columns can need, so a render only rebuilds and deflates the sheet XML.
+
+    section_ranges: [[(start, end), ...], ...]; every row of a section gets the fill
+    of column C on its first row, a thin border and is unlocked, like add_project_data.
+    dropdowns: [(cell, formula)] list validations, like add_dropdowns.
+    """
+
+    def __init__(
+        self,
+        template: bytes,
+        sheet_name: str,
+        section_ranges: List[List[Tuple[int, int]]],
+        dropdowns: List[Tuple[str, str]],
+        title_row: int = 8,
+        first_group_col: int = 3
+    ):
+        self.title_row = title_row
+        self.first_group_col = first_group_col
+        self.dropdowns = dropdowns
+
+        archive = zipfile.ZipFile(BytesIO(template))
+        parts = _workbook_parts(archive)
+        self.sheet_path = parts["sheets"][sheet_name]
+        styles_path = parts["styles"]
+        infos = archive.infolist()
+        self._infos = {info.filename: info for info in infos}
+
+        # ----- sheet XML, split around <sheetData> -----
+        sheet_xml = archive.read(self.sheet_path).decode("utf-8")
+        start = re.search(r"<sheetData\b[^>]*?(/>|>)", sheet_xml)
+        self._head = sheet_xml[:start.start()]
+        if start.group(1) == "/>":
+            body, self._tail = "", sheet_xml[start.end():]
+        else:
+            end = sheet_xml.index("</sheetData>")
+            body, self._tail = sheet_xml[start.end():end], sheet_xml[end + len("</sheetData>"):]
+
+        # {row: (attributes, {col: cell xml})}
+        self._rows: Dict[int, Tuple[str, Dict[int, str]]] = {}
+        self._cell_styles: Dict[Tuple[int, int], int] = {}
+        for row_match in ROW_RE.finditer(body):
+            attrs = row_match.group(1)
+            row = int(_attr(attrs, "r"))
+            cells = {}
+            for cell_match in CELL_RE.finditer(row_match.group(2) or ""):
+                col = split_reference(_attr(cell_match.group(1), "r"))[1]
+                cells[col] = cell_match.group(0)
+                self._cell_styles[(row, col)] = int(_attr(cell_match.group(1), "s") or 0)
+            # spans are only a load hint and would go stale as columns are added
+            self._rows[row] = (re.sub(ATTR_RE.format("spans"), "", attrs), cells)
+        self._last_template_col = max((col for _, col in self._cell_styles), default=1)
+
+        # ----- styles: one patch, shared by every render -----
+        styles_xml = archive.read(styles_path).decode("utf-8")
+        cell_xfs_xml = styles_xml[styles_xml.index("<cellXfs"):styles_xml.index("</cellXfs>")]
+        xfs = XF_RE.findall(cell_xfs_xml[cell_xfs_xml.index(">") + 1:])
+        styles_xml, border_id = _append_to_list(styles_xml, "borders", [THIN_BORDER])
+        styles_xml, title_font_id = _append_to_list(styles_xml, "fonts", [TITLE_FONT])
+        styles_xml, title_fill_id = _append_to_list(styles_xml, "fills", [TITLE_FILL])
+
+        def fill_of(row: int, col: int) -> int:
+            return int(_attr(xfs[self._cell_styles.get((row, col), 0)], "fillId") or 0)
+
+        # {row: fillId} for every section row, from column C of the section's first row
+        self._row_fills: Dict[int, int] = {}
+        for section in section_ranges:
+            fill_id = fill_of(section[0][0], first_group_col)
+            for start_row, end_row in section:
+                for row in range(start_row, end_row + 1):
+                    self._row_fills[row] = fill_id
+
+        # {(base xf, fillId or "title"): new xf index}; base 0 covers cells the template doesn't have
+        new_xfs: List[str] = []
+        self._xf_map: Dict[Tuple[int, object], int] = {}
+
+        def add_xf(key, xf):
+            if key not in self._xf_map:
+                self._xf_map[key] = len(xfs) + len(new_xfs)
+                new_xfs.append(xf)
+
+        for row, fill_id in self._row_fills.items():
+            bases = {0} | {self._cell_styles[(row, col)] for col in self._rows.get(row, ("", {}))[1]
+                           if col >= first_group_col}
+            for base in sorted(bases):
+                add_xf((base, fill_id), _patch_xf(
+                    xfs[base], fillId=fill_id, borderId=border_id,
+                    applyFill=1, applyBorder=1, applyProtection=1, unlock=True
+                ))
+        title_bases = {0} | {self._cell_styles[(title_row, col)] for col in self._rows.get(title_row, ("", {}))[1]
+                             if col >= first_group_col}
+        for base in sorted(title_bases):
+            add_xf((base, "title"), _patch_xf(
+                xfs[base], fontId=title_font_id, fillId=title_fill_id, applyFont=1, applyFill=1
+            ))
+        styles_xml, _ = _append_to_list(styles_xml, "cellXfs", new_xfs)
+
+        # ----- zip members, compressed, in template order -----
+        self._members: List[Tuple[_RawMember, Optional[bytes]]] = []
+        for info in infos:
+            if info.filename == self.sheet_path:
+                self._members.append((None, None))
+                continue
+            if info.filename == styles_path:
+                member = _RawMember.deflated(info, styles_xml.encode("utf-8"))
+            else:
+                member = _RawMember.from_archive(template, info)
+            self._members.append((member, member.local_record()))
+
+    # ----------------- Rendering -----------------
+    def _style(self, row: int, col: int, key) -> int:
+        return self._xf_map[(self._cell_styles.get((row, col), 0), key)]
+
+    @staticmethod
+    def _string_cell(ref: str, style: int, value) -> str:
+        text = escape(str(value))
+        space = ' xml:space="preserve"' if text != text.strip() else ""
+        return f'<c r="{ref}" s="{style}" t="inlineStr"><is><t{space}>{text}</t></is></c>'
+
+    @staticmethod
+    def _restyle(cell: str, style: int) -> str:
+        head_end = cell.index(">") + 1
+        head = cell[:head_end]
+        if head.endswith("/>"):
+            return _set_attr(head, "s", style)
+        return _set_attr(head, "s", style) + cell[head_end:]
+
+    @classmethod
+    def _value_cell(cls, ref: str, style: int, value) -> str:
+        if value is None:
+            return f'<c r="{ref}" s="{style}"/>'
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return f'<c r="{ref}" s="{style}"><v>{value!r}</v></c>'
+        return cls._string_cell(ref, style, value)
+
+    def render_sheet(
+        self,
+        project_name: str,
+        groups: List,
+        values: Optional[Dict[int, Dict[int, object]]] = None
+    ) -> str:
+        """values: {row: {col: value}} written over the template, keeping each cell's (patched) style."""
+        values = values or {}
+        group_cols = range(self.first_group_col, self.first_group_col + len(groups))
+        touched = set(self._row_fills) | {1, self.title_row} | set(values)
+        parts = []
+        for row in sorted(set(self._rows) | touched):
+            attrs, template_cells = self._rows.get(row, (f' r="{row}"', {}))
+            if row not in touched:
+                parts.append(f"<row{attrs}>{''.join(template_cells.values())}</row>" if template_cells
+                             else f"<row{attrs}/>")
+                continue
+
+            cells = dict(template_cells)
+            if row == 1:
+                cells[1] = self._string_cell("A1", self._cell_styles.get((1, 1), 0), project_name)
+            if row == self.title_row:
+                for col, group in zip(group_cols, groups):
+                    ref = f"{get_column_letter(col)}{row}"
+                    cells[col] = self._string_cell(ref, self._style(row, col, "title"), group)
+            if row in self._row_fills:
+                fill_id = self._row_fills[row]
+                for col in group_cols:
+                    style = self._style(row, col, fill_id)
+                    cells[col] = (self._restyle(cells[col], style) if col in cells
+                                  else f'<c r="{get_column_letter(col)}{row}" s="{style}"/>')
+            for col, value in values.get(row, {}).items():
+                style = int(_attr(cells[col][:cells[col].index(">")], "s") or 0) if col in cells else 0
+                cells[col] = self._value_cell(f"{get_column_letter(col)}{row}", style, value)
+            parts.append(f"<row{attrs}>{''.join(cells[col] for col in sorted(cells))}</row>")
+
+        last_col = max(self._last_template_col, self.first_group_col + len(groups) - 1)
+        last_row = max(set(self._rows) | touched)
+        head = re.sub(r'<dimension ref="[^"]*"/>', f'<dimension ref="A1:{get_column_letter(last_col)}{last_row}"/>',
+                      self._head, count=1)
+        return head + "<sheetData>" + "".join(parts) + "</sheetData>" + self._with_validations(self._tail)
+
+    def _with_validations(self, tail: str) -> str:
+        validations = "".join(
+            f'<dataValidation type="list" allowBlank="1" sqref="{cell}">'
+            f'<formula1>{escape(formula.lstrip("="))}</formula1></dataValidation>'
+            for cell, formula in self.dropdowns
+        )
+        existing = re.search(r"<dataValidations\b[^>]*>", tail)
+        if existing:
+            count = int(_attr(existing.group(0), "count") or 0) + len(self.dropdowns)
+            end = tail.index("</dataValidations>")
+            return (tail[:existing.start()] + _set_attr(existing.group(0), "count", count)
+                    + tail[existing.end():end] + validations + tail[end:])
+        block = f'<dataValidations count="{len(self.dropdowns)}">{validations}</dataValidations>'
+        positions = [tail.find(tag) for tag in AFTER_DATA_VALIDATIONS if tail.find(tag) != -1]
+        insert_at = min(positions) if positions else tail.index("</worksheet>")
+        return tail[:insert_at] + block + tail[insert_at:]
+
+    def render(self, project_name: str, groups: List, values: Optional[Dict[int, Dict[int, object]]] = None) -> bytes:
+        """The filled-in workbook's bytes; see render_sheet for values."""
+        sheet = _RawMember.deflated(
+            self._infos[self.sheet_path], self.render_sheet(project_name, groups, values).encode("utf-8")
+        )
+        return _write_zip(
+            (member, local) if member is not None else (sheet, sheet.local_record())
+            for member, local in self._members
+        )
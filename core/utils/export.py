@@ -0,0 +1,147 @@
+import csv
+import io
+from itertools import islice
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from core.models import GroupSubData, ProjectData, Subject
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+# Rows fetched per database round trip, and written per CSV chunk / Parquet row group
+EXPORT_CHUNK_SIZE = 2000
+
+FORMAT_CSV = "csv"
+FORMAT_PARQUET = "parquet"
+
+CONTENT_TYPES = {
+    FORMAT_CSV: "text/csv",
+    FORMAT_PARQUET: "application/vnd.apache.parquet",
+}
+
+
+def export_formats() -> List[str]:
+    """Formats this install can write; Parquet needs pyarrow."""
+    return [FORMAT_CSV, FORMAT_PARQUET] if pyarrow is not None else [FORMAT_CSV]
+
+
+# ----------------- Datasets -----------------
+# Each returns (header, rows): rows is a lazy iterator over the database, one tuple per row
+
+def group_data_rows(project: ProjectData, chunk_size: int = EXPORT_CHUNK_SIZE) -> Tuple[List[str], Iterator[tuple]]:
+    """One row per stored value: group, category, label, value, in entry order."""
+    rows = (
+        GroupSubData.objects.filter(group__project=project)
+        .order_by("group_id", "id")
+        .values_list("group__group_name", "category__name", "label__text", "value")
+        .iterator(chunk_size=chunk_size)
+    )
+    # Blank labels are stored as "null"; see project_import.label_text
+    return ["group", "category", "label", "value"], (
+        (group, category, None if label == "null" else label, value) for group, category, label, value in rows
+    )
+
+
+def subject_rows(project: ProjectData, chunk_size: int = EXPORT_CHUNK_SIZE) -> Tuple[List[str], Iterator[tuple]]:
+    """One row per subject: its id, then its values under the project's subject columns."""
+    columns = project.subject_column_names()
+    padding = (None,) * len(columns)
+    rows = (
+        Subject.objects.filter(project=project)
+        .order_by("id")
+        .values_list("id", "values")
+        .iterator(chunk_size=chunk_size)
+    )
+    # Rows stop at their last value, so shorter ones are padded out to every column
+    return ["id"] + columns, (
+        (subject_id, *(tuple(values or ()) + padding)[:len(columns)]) for subject_id, values in rows
+    )
+
+
+DATASETS = {
+    "groups": group_data_rows,
+    "subjects": subject_rows,
+}
+
+
+# ----------------- Writers -----------------
+# Each yields the file in pieces of about chunk_size rows, holding no more than that in memory
+
+def csv_chunks(header: Sequence[str], rows: Iterable[tuple], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            break
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _DrainedSink(io.RawIOBase):
+    """Write-only file for ParquetWriter whose contents are handed out (and dropped) after each row group."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def parquet_chunks(header: Sequence[str], rows: Iterable[tuple], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Values are written as strings (as they are stored); one row group per chunk."""
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs pyarrow")
+    schema = pyarrow.schema([(name, pyarrow.string()) for name in header])
+    sink = _DrainedSink()
+    rows = iter(rows)
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                break
+            columns = [
+                [None if value is None else str(value) for value in column]
+                for column in zip(*batch)
+            ]
+            writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+            yield sink.drain()
+    # Footer, written on close
+    yield sink.drain()
+
+
+WRITERS = {
+    FORMAT_CSV: csv_chunks,
+    FORMAT_PARQUET: parquet_chunks,
+}
+
+
+def export_chunks(project: ProjectData, dataset: str, file_format: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """The dataset of a project as an iterator of file pieces, for a StreamingHttpResponse."""
+    header, rows = DATASETS[dataset](project, chunk_size)
+    return WRITERS[file_format](header, rows, chunk_size)
@@ -0,0 +1,125 @@
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Prefetch, QuerySet
+
+from core.models import DataCategory, DataLabel, GroupData, GroupSubData, IndependentVariable, ProjectData
+from core.utils.excel.sheet_data import SheetData
+
+BATCH_SIZE = 500
+
+
+def label_text(label) -> str:
+    # Blank label cells have always been stored as "null" (their key once went through JSON)
+    return "null" if label is None else str(label)
+
+
+def _intern(model, field: str, values: Iterable[str], batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """{value: id} for the lookup table rows holding these strings, creating missing ones."""
+    values = list(dict.fromkeys(values))
+    ids: Dict[str, int] = {}
+    for i in range(0, len(values), batch_size):
+        ids.update(model.objects.filter(**{f"{field}__in": values[i:i + batch_size]}).values_list(field, "id"))
+
+    missing = [v for v in values if v not in ids]
+    if missing:
+        # ignore_conflicts: a concurrent import may intern the same string first
+        model.objects.bulk_create([model(**{field: v}) for v in missing], batch_size=batch_size, ignore_conflicts=True)
+        for i in range(0, len(missing), batch_size):
+            ids.update(model.objects.filter(**{f"{field}__in": missing[i:i + batch_size]}).values_list(field, "id"))
+    return ids
+
+
+def intern_categories(names: Iterable[str]) -> Dict[str, int]:
+    return _intern(DataCategory, "name", names)
+
+
+def intern_labels(texts: Iterable[str]) -> Dict[str, int]:
+    return _intern(DataLabel, "text", texts)
+
+
+def save_project_data(
+    project: ProjectData,
+    data: SheetData,
+    independent_variables: Optional[Dict[object, List]] = None,
+    batch_size: int = BATCH_SIZE
+) -> List:
+    """
+    Persist a parsed sheet for a project in one transaction.
+    data: the FileReader result (SheetData.from_nested() adapts {Group: {Category: {Label: Value}}})
+    independent_variables: {Label: [Values]}, saved as IndependentVariable rows when given
+
+    Groups and their values are written with bulk_create, so a sheet costs a
+    handful of INSERT batches (and one commit) instead of one write per cell.
+    Category and label strings are interned into DataCategory / DataLabel.
+    Returns the values written, e.g. for record_confirmed_values.
+    """
+    values = []
+    with transaction.atomic():
+        groups = GroupData.objects.bulk_create(
+            [GroupData(project=project, group_name=group_name) for group_name in data.groups],
+            batch_size=batch_size
+        )
+
+        category_ids = intern_categories(data.categories)
+        label_ids = intern_labels(label_text(label) for label in data.labels)
+        # Column keys are shared by every group
+        keys = [(category_ids[c], label_ids[label_text(l)]) for c, l in zip(data.categories, data.labels)]
+
+        rows = []
+        for group, group_values in zip(groups, data.values):
+            for (category_id, label_id), value in zip(keys, group_values):
+                rows.append(GroupSubData(group=group, category_id=category_id, label_id=label_id, value=value))
+            values.extend(group_values)
+        GroupSubData.objects.bulk_create(rows, batch_size=batch_size)
+
+        if independent_variables:
+            save_independent_variables(project, independent_variables, batch_size)
+    return values
+
+
+def save_independent_variables(
+    project: ProjectData,
+    independent_variables: Dict[object, List],
+    batch_size: int = BATCH_SIZE
+) -> None:
+    """Replace the project's IndependentVariable rows with {Label: [distinct values]}."""
+    with transaction.atomic():
+        label_ids = intern_labels(label_text(label) for label in independent_variables)
+        IndependentVariable.objects.filter(project=project).delete()
+        IndependentVariable.objects.bulk_create(
+            [
+                IndependentVariable(
+                    project=project,
+                    label_id=label_ids[label_text(label)],
+                    values=list(map(str, values)),
+                    distinct_count=len(values),
+                )
+                for label, values in independent_variables.items()
+            ],
+            batch_size=batch_size
+        )
+
+
+def projects_varying(label: str) -> QuerySet:
+    """Projects where label is an independent variable (an index lookup on IndependentVariable.label)."""
+    return ProjectData.objects.filter(independent_variables__label__text=label)
+
+
+def project_with_group_data() -> QuerySet:
+    """
+    ProjectData with group_data and their group_sub_data (category and label joined in)
+    and independent_variables prefetched, so templates walking project.group_data.all
+    run four queries in total.
+    """
+    return ProjectData.objects.prefetch_related(
+        Prefetch(
+            "independent_variables",
+            queryset=IndependentVariable.objects.select_related("label").order_by("id")
+        ),
+        Prefetch("group_data", queryset=GroupData.objects.order_by("id")),
+        Prefetch(
+            "group_data__group_sub_data",
+            queryset=GroupSubData.objects.select_related("category", "label").order_by("id")
+        ),
+    )
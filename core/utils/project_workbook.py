@@ -0,0 +1,86 @@
+from typing import Dict, List, Tuple
+
+from core.models import GroupData, ProjectData
+from core.utils.excel.excel_file_generation import ExcelFileGenerator
+from core.utils.excel.project_data import FileReaderProjectData
+
+
+def stored_group_values(project: ProjectData) -> Tuple[List[str], List[Tuple[int, str, str, object]]]:
+    """
+    (group names, [(group index, category, label, value)]) for a project, from one
+    query: groups LEFT JOIN their GroupSubData, category and label, in entry order.
+    """
+    rows = (
+        GroupData.objects.filter(project=project)
+        .order_by("id", "group_sub_data__id")
+        .values_list(
+            "id", "group_name",
+            "group_sub_data__category__name", "group_sub_data__label__text", "group_sub_data__value"
+        )
+    )
+    groups: List[str] = []
+    cells = []
+    last_group_id = None
+    for group_id, group_name, category, label, value in rows:
+        if group_id != last_group_id:
+            groups.append(group_name)
+            last_group_id = group_id
+        if label is not None:
+            cells.append((len(groups) - 1, category, label, value))
+    return groups, cells
+
+
+def workbook_values(
+    generator: ExcelFileGenerator,
+    groups: List[str],
+    cells: List[Tuple[int, str, str, object]]
+) -> Tuple[Dict[int, Dict[int, object]], List[str]]:
+    """
+    Lay stored values out on the DataEntry grid: {row: {col: value}}.
+
+    Labels found in the template go to their template row. Anything else (labels
+    the lab typed into a section's custom rows, or "null" for blank ones) takes
+    the next free custom row of its category, with the label written in column B.
+    Returns the grid and the labels that didn't fit in their category's custom rows.
+    """
+    template_rows: Dict[Tuple[str, str], int] = {}
+    custom_rows: Dict[str, List[int]] = {}
+    labels = generator.template_labels()
+    for category, (start, end), (custom_start, custom_end) in generator.label_sections():
+        for row in range(start, end + 1):
+            if labels[row] is not None:
+                template_rows.setdefault((category, str(labels[row])), row)
+        custom_rows[category] = list(range(custom_start, custom_end + 1))
+
+    values: Dict[int, Dict[int, object]] = {}
+    label_rows: Dict[Tuple[str, str], int] = {}
+    unplaced: List[str] = []
+    first_col = 3
+    for group_index, category, label, value in cells:
+        key = (category, label)
+        row = label_rows.get(key) or template_rows.get(key)
+        if row is None:
+            free = custom_rows.get(category)
+            if not free:
+                if label not in unplaced:
+                    unplaced.append(label)
+                continue
+            row = free.pop(0)
+            values.setdefault(row, {})[2] = None if label == "null" else label
+        label_rows[key] = row
+        if value is not None:
+            values.setdefault(row, {})[first_col + group_index] = value
+    return values, unplaced
+
+
+def filled_workbook(project: ProjectData, generator: ExcelFileGenerator):
+    """The project's workbook refilled from GroupData/GroupSubData, as a rewound BytesIO."""
+    groups, cells = stored_group_values(project)
+    values, _ = workbook_values(generator, groups, cells)
+    project_data = FileReaderProjectData(
+        name=project.project_name,
+        owner=project.owner.username,
+        description=project.description,
+        groups=groups
+    )
+    return generator.make_new_workbook_from_template(project_data, values)
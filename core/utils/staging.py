@@ -0,0 +1,196 @@
+import csv
+import io
+from datetime import timedelta
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import StagedRow, StagedUpload
+
+# How long an unconfirmed preview is kept
+STAGING_TTL = timedelta(hours=24)
+
+# Rows written / read per batch when staging and promoting row uploads
+STAGING_CHUNK_SIZE = 2000
+
+# Pending rows shown (with checkboxes) in an upload preview
+PREVIEW_ROWS = 1000
+
+
+class RowBitmap:
+    """Set of row numbers packed one bit per row, e.g. the selected or already added rows of an upload."""
+    __slots__ = ("bits",)
+
+    def __init__(self, data: bytes = b""):
+        self.bits = bytearray(data)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[int]) -> "RowBitmap":
+        bitmap = cls()
+        for row in rows:
+            bitmap.add(row)
+        return bitmap
+
+    def add(self, row: int) -> None:
+        index = row >> 3
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index + 1 - len(self.bits)))
+        self.bits[index] |= 1 << (row & 7)
+
+    def update(self, other: "RowBitmap") -> None:
+        if len(other.bits) > len(self.bits):
+            self.bits.extend(bytes(len(other.bits) - len(self.bits)))
+        for index, byte in enumerate(other.bits):
+            self.bits[index] |= byte
+
+    def __contains__(self, row: int) -> bool:
+        index = row >> 3
+        return index < len(self.bits) and bool(self.bits[index] >> (row & 7) & 1)
+
+    def __len__(self) -> int:
+        return int.from_bytes(self.bits, "little").bit_count()
+
+    def __iter__(self) -> Iterator[int]:
+        for index, byte in enumerate(self.bits):
+            while byte:
+                low = byte & -byte
+                yield (index << 3) + low.bit_length() - 1
+                byte ^= low
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.bits.rstrip(b"\0"))
+
+
+def live_upload(staged_id: Optional[str], user, project, kind: str) -> Optional[StagedUpload]:
+    """The staged upload itself (without its rows), or None when it is missing, expired or someone else's."""
+    if not staged_id:
+        return None
+    return StagedUpload.objects.filter(
+        id=staged_id, owner=user, project=project, kind=kind, expires_at__gt=timezone.now()
+    ).first()
+
+
+def stage_rows(user, project, kind: str, rows: Iterable, payload=None, chunk_size: int = STAGING_CHUNK_SIZE) -> StagedUpload:
+    """
+    Stage a row upload: rows are consumed lazily and written as StagedRows in chunks,
+    so only chunk_size rows are ever held in memory. payload(rows written) -> the
+    upload's payload, set once every row has been read. All in one transaction.
+    """
+    rows = iter(rows)
+    with transaction.atomic():
+        staged = StagedUpload.objects.create(
+            owner=user, project=project, kind=kind, payload={}, expires_at=timezone.now() + STAGING_TTL
+        )
+        position = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            StagedRow.objects.bulk_create(
+                [StagedRow(upload=staged, position=position + i, data=data) for i, data in enumerate(chunk)]
+            )
+            position += len(chunk)
+        if payload is not None:
+            staged.payload = payload(position)
+            staged.save(update_fields=["payload"])
+    return staged
+
+
+def stage_csv(user, project, kind: str, file, chunk_size: int = STAGING_CHUNK_SIZE) -> StagedUpload:
+    """
+    Stage an uploaded CSV one row ({column: value}) at a time, decoding the file as it is read.
+    The payload records {"columns": [...], "rows": count}. Raises UnicodeDecodeError / csv.Error.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8", newline=""))
+    return stage_rows(
+        user, project, kind, reader,
+        payload=lambda count: {"columns": reader.fieldnames or [], "rows": count},
+        chunk_size=chunk_size
+    )
+
+
+def pending_rows(staged: StagedUpload, limit: Optional[int] = None, chunk_size: int = STAGING_CHUNK_SIZE) -> Iterator[Tuple[int, object]]:
+    """(position, data) of the rows not added yet, in upload order; reads stop after limit rows."""
+    added = RowBitmap(staged.added)
+    rows = (
+        StagedRow.objects.filter(upload=staged)
+        .order_by("position")
+        .values_list("position", "data")
+        .iterator(chunk_size=chunk_size)
+    )
+    pending = ((position, data) for position, data in rows if position not in added)
+    return pending if limit is None else islice(pending, limit)
+
+
+def _create_batch(model, batch: list, prepare, after_batch) -> int:
+    if prepare is not None:
+        batch = prepare(batch)
+    model.objects.bulk_create(batch)
+    if after_batch is not None:
+        after_batch(batch)
+    return len(batch)
+
+
+def promote_rows(
+    staged: StagedUpload,
+    selected: Optional[RowBitmap],
+    model,
+    make,
+    chunk_size: int = STAGING_CHUNK_SIZE,
+    after_batch: Optional[Callable[[list], None]] = None,
+    prepare: Optional[Callable[[list], list]] = None
+) -> int:
+    """
+    Create model instances make(data) for every selected row (every row when selected
+    is None) not added yet, with batched bulk_create in one transaction, and mark
+    those rows added. prepare(instances) -> the instances to create runs before each
+    batch is written (rows it leaves out still count as added); after_batch(instances)
+    runs after. Both run in the same transaction. Returns how many were created.
+    """
+    rows = StagedRow.objects.filter(upload=staged)
+    if selected is not None:
+        selected_rows: List[int] = list(selected)
+        if not selected_rows:
+            return 0
+        rows = rows.filter(position__gte=selected_rows[0], position__lte=selected_rows[-1])
+
+    with transaction.atomic():
+        # Lock the upload so a double submit can't promote the same rows twice
+        locked = StagedUpload.objects.select_for_update().get(id=staged.id)
+        added = RowBitmap(locked.added)
+        rows = (
+            rows
+            .order_by("position")
+            .values_list("position", "data")
+            .iterator(chunk_size=chunk_size)
+        )
+        promoted = RowBitmap()
+        created = 0
+        batch = []
+        for position, data in rows:
+            if (selected is None or position in selected) and position not in added:
+                batch.append(make(data))
+                promoted.add(position)
+                if len(batch) == chunk_size:
+                    created += _create_batch(model, batch, prepare, after_batch)
+                    batch = []
+        if batch:
+            created += _create_batch(model, batch, prepare, after_batch)
+
+        added.update(promoted)
+        staged.added = locked.added = bytes(added)
+        locked.save(update_fields=["added"])
+    return created
+
+
+def discard_staged(staged_id: Optional[str]) -> None:
+    if staged_id:
+        StagedUpload.objects.filter(id=staged_id).delete()
+
+
+def purge_expired_staging() -> int:
+    """Delete expired previews; returns how many were removed."""
+    deleted, _ = StagedUpload.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,131 @@
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Trim
+
+from core.models import ProjectData, Subject, subject_row_hash
+from core.utils.staging import STAGING_CHUNK_SIZE
+from core.utils.subject_query import column_text
+from core.utils.subject_stats import record_subjects, stat_value
+
+
+def stored_hashes(project: ProjectData, hashes: Iterable[str]) -> Set[str]:
+    """Which of these row hashes the project's subjects already have; one query on the (project, row_hash) index."""
+    hashes = list(set(hashes))
+    if not hashes:
+        return set()
+    return set(Subject.objects.filter(project=project, row_hash__in=hashes).values_list("row_hash", flat=True))
+
+
+def duplicate_rows(project: ProjectData, rows: Iterable[Tuple[int, dict]], chunk_size: int = STAGING_CHUNK_SIZE) -> Set[int]:
+    """
+    Positions of the uploaded rows [(position, {column: value})] that match a subject
+    already in the project or an earlier row among them; one query per chunk of rows.
+    """
+    duplicates = set()
+    seen = set()
+    rows = iter(rows)
+    while True:
+        chunk = [(position, subject_row_hash(data)) for position, data in islice(rows, chunk_size)]
+        if not chunk:
+            break
+        stored = stored_hashes(project, (row_hash for _, row_hash in chunk))
+        for position, row_hash in chunk:
+            if row_hash in stored or row_hash in seen:
+                duplicates.add(position)
+            seen.add(row_hash)
+    return duplicates
+
+
+def _merge(subject: Subject, values: list) -> None:
+    """Lay the non-blank uploaded values over the subject's."""
+    merged = list(subject.values or [])
+    merged += [None] * (len(values) - len(merged))
+    for position, value in enumerate(values):
+        if stat_value(value) is not None:
+            merged[position] = value
+    subject.values = merged
+
+
+class SubjectIngest:
+    """
+    promote_rows prepare hook for subject uploads. Rows already stored in the project
+    (or repeated in the upload) are skipped. With a key column, a row whose key matches
+    stored subjects updates them instead: its non-blank values replace theirs, and rows
+    with the same key in one upload are merged. Counts the rows skipped and applied as updates.
+    """
+
+    def __init__(self, project: ProjectData, key_column: Optional[str] = None):
+        self.project = project
+        self.key_column = key_column
+        self.skipped = 0
+        self.updated = 0
+
+    def __call__(self, subjects: List[Subject]) -> List[Subject]:
+        if self.key_column is not None:
+            subjects = self._upsert(subjects)
+        return self._new(subjects)
+
+    def _new(self, subjects: List[Subject]) -> List[Subject]:
+        stored = stored_hashes(self.project, (subject.row_hash for subject in subjects))
+        fresh = []
+        for subject in subjects:
+            if subject.row_hash in stored:
+                self.skipped += 1
+                continue
+            stored.add(subject.row_hash)
+            fresh.append(subject)
+        return fresh
+
+    def _upsert(self, subjects: List[Subject]) -> List[Subject]:
+        names = self.project.subject_column_names()
+        position = names.index(self.key_column)
+
+        # First row per key, with later rows of the batch merged into it
+        by_key: Dict[str, Subject] = {}
+        kept = []
+        for subject in subjects:
+            values = subject.values or []
+            key = stat_value(values[position]) if position < len(values) else None
+            if key is None:
+                kept.append((None, subject))
+            elif key.strip() in by_key:
+                _merge(by_key[key.strip()], values)
+                self.updated += 1
+            else:
+                by_key[key.strip()] = subject
+                kept.append((key.strip(), subject))
+        for subject in by_key.values():
+            subject.row_hash = subject_row_hash(dict(zip(names, subject.values)))
+        if not by_key:
+            return subjects
+
+        stored = list(
+            Subject.objects.filter(project=self.project)
+            .annotate(key=Trim(column_text(position)))
+            .filter(key__in=list(by_key))
+            .only("id", "values")
+        )
+        before = [subject.values for subject in stored]
+        for subject in stored:
+            _merge(subject, by_key[subject.key].values)
+            subject.row_hash = subject_row_hash(dict(zip(names, subject.values)))
+        record_subjects(self.project, before, sign=-1)
+        record_subjects(self.project, [subject.values for subject in stored])
+        Subject.objects.bulk_update(stored, ["values", "row_hash"])
+
+        matched = {subject.key for subject in stored}
+        self.updated += len(matched)
+        return [subject for key, subject in kept if key not in matched]
+
+
+def remove_duplicate_subjects(project: ProjectData) -> int:
+    """Delete the subjects whose row repeats an earlier subject of the project; returns how many."""
+    earlier = Subject.objects.filter(project=project, row_hash=OuterRef("row_hash"), id__lt=OuterRef("id"))
+    duplicates = Subject.objects.filter(project=project).exclude(row_hash="").filter(Exists(earlier))
+    with transaction.atomic():
+        record_subjects(project, duplicates.values_list("values", flat=True), sign=-1)
+        deleted, _ = duplicates.delete()
+    return deleted
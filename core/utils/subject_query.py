@@ -0,0 +1,212 @@
+import base64
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db.models import Case, Count, FloatField, Max, Q, TextField, Value, When
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Lower, NullIf
+
+from core.models import ProjectData, Subject
+
+TYPE_INTEGER = "integer"
+TYPE_FLOAT = "float"
+TYPE_DATE = "date"
+TYPE_STRING = "string"
+
+NUMERIC_TYPES = {TYPE_INTEGER, TYPE_FLOAT}
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Rows read per round trip while inferring column types
+INFER_CHUNK_SIZE = 2000
+
+_INTEGER = re.compile(r"[-+]?\d+")
+_FLOAT = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?")
+# ISO dates (optionally with a time) sort correctly as text, so they are compared as stored
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?")
+
+# {filter op: Django lookup}
+OPERATORS = {
+    "eq": "exact",
+    "lt": "lt",
+    "lte": "lte",
+    "gt": "gt",
+    "gte": "gte",
+    "contains": "icontains",
+}
+
+# {project id: ((subjects_version, subject count, last subject id, column count), {column: type})}
+_column_types: Dict[int, Tuple[tuple, Dict[str, str]]] = {}
+
+
+def value_type(value) -> Optional[str]:
+    """The narrowest type a single metadata value fits, or None for blanks."""
+    if value is None or isinstance(value, bool):
+        return None if value is None else TYPE_STRING
+    if isinstance(value, int):
+        return TYPE_INTEGER
+    if isinstance(value, float):
+        return TYPE_FLOAT
+    text = str(value).strip()
+    if not text:
+        return None
+    if _INTEGER.fullmatch(text):
+        return TYPE_INTEGER
+    if _FLOAT.fullmatch(text):
+        return TYPE_FLOAT
+    if _DATE.fullmatch(text):
+        return TYPE_DATE
+    return TYPE_STRING
+
+
+def merge_types(current: Optional[str], new: Optional[str]) -> Optional[str]:
+    """Widen a column's type to fit another value: integer -> float; anything mixed -> string."""
+    if current is None or current == new:
+        return new or current
+    if new is None:
+        return current
+    if current in NUMERIC_TYPES and new in NUMERIC_TYPES:
+        return TYPE_FLOAT
+    return TYPE_STRING
+
+
+def infer_column_types(columns: List[str], rows: Iterable[list]) -> Dict[str, str]:
+    """{column: type} over positional subject rows (Subject.values); all-blank columns are strings."""
+    types: List[Optional[str]] = [None] * len(columns)
+    for values in rows:
+        for position, value in enumerate((values or [])[:len(columns)]):
+            types[position] = merge_types(types[position], value_type(value))
+    return {column: column_type or TYPE_STRING for column, column_type in zip(columns, types)}
+
+
+def column_types(project: ProjectData) -> Dict[str, str]:
+    """
+    {column: type} of a project's subject columns, in position order. Inferred in one
+    streamed pass and kept until subjects are written: added, deleted or updated in place
+    (one aggregate query checks that). Count and last id also catch writes that bypass
+    record_subjects, such as bulk_create.
+    """
+    columns = project.subject_column_names()
+    version = (
+        ProjectData.objects.filter(id=project.id)
+        .annotate(count=Count("subjects"), last=Max("subjects__id"))
+        .values_list("subjects_version", "count", "last")
+        .get()
+    ) + (len(columns),)
+    cached = _column_types.get(project.id)
+    if cached is None or cached[0] != version:
+        rows = Subject.objects.filter(project=project).values_list("values", flat=True)
+        cached = _column_types[project.id] = (
+            version, infer_column_types(columns, rows.iterator(chunk_size=INFER_CHUNK_SIZE))
+        )
+    return cached[1]
+
+
+def column_text(position: int):
+    """Expression for the stored value at a position of Subject.values."""
+    return KeyTextTransform(str(position), "values")
+
+
+def typed_value(position: int, column_type: str):
+    """Expression for a subject column as its type: numbers as REAL, strings lowercased, blanks NULL."""
+    text = NullIf(column_text(position), Value(""), output_field=TextField())
+    if column_type in NUMERIC_TYPES:
+        return Cast(text, FloatField())
+    if column_type == TYPE_STRING:
+        return Lower(text)
+    return text
+
+
+def typed_operand(value: str, column_type: str, op: str):
+    if op == "contains":
+        return str(value)
+    if column_type in NUMERIC_TYPES:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{value!r} is not a number")
+    return str(value).lower() if column_type == TYPE_STRING else str(value)
+
+
+def encode_cursor(blank: int, value, subject_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([blank, value, subject_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[int, object, int]:
+    try:
+        blank, value, subject_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(blank), value, int(subject_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def subject_page(
+    project: ProjectData,
+    sort: Optional[str] = None,
+    descending: bool = False,
+    filters: Sequence[Tuple[str, str, str]] = (),
+    after: Optional[str] = None,
+    limit: int = PAGE_SIZE
+) -> dict:
+    """
+    One keyset-paginated page of a project's subjects.
+    sort: column ordered by its typed value (blanks last, ties by id); None orders by id
+    filters: [(column, op, value)], op one of OPERATORS, compared on the typed value
+    after: the "next" cursor of the previous page
+    Returns {"columns": [{"name", "type"}], "rows": [{"id", "values"}], "next": cursor or None}.
+    Raises ValueError for unknown columns or operators and malformed values or cursors.
+    """
+    types = column_types(project)
+    positions = {column: position for position, column in enumerate(types)}
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    subjects = Subject.objects.filter(project=project)
+
+    for index, (column, op, value) in enumerate(filters):
+        if column not in types:
+            raise ValueError(f"Unknown column {column!r}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator {op!r}")
+        alias = f"filter_{index}"
+        # contains matches the stored text; the other operators compare typed values
+        expression = (
+            column_text(positions[column]) if op == "contains" else typed_value(positions[column], types[column])
+        )
+        subjects = subjects.alias(**{alias: expression}).filter(
+            **{f"{alias}__{OPERATORS[op]}": typed_operand(value, types[column], op)}
+        )
+
+    if sort is None:
+        subjects = subjects.annotate(sort_blank=Value(0), sort_value=Value(None, output_field=FloatField())).order_by("id")
+    else:
+        if sort not in types:
+            raise ValueError(f"Unknown column {sort!r}")
+        subjects = subjects.annotate(sort_value=typed_value(positions[sort], types[sort])).annotate(
+            sort_blank=Case(When(sort_value__isnull=True, then=Value(1)), default=Value(0))
+        ).order_by("sort_blank", "-sort_value" if descending else "sort_value", "id")
+
+    if after:
+        blank, value, subject_id = decode_cursor(after)
+        if sort is None:
+            subjects = subjects.filter(id__gt=subject_id)
+        elif blank:
+            subjects = subjects.filter(sort_blank=1, id__gt=subject_id)
+        else:
+            beyond = "sort_value__lt" if descending else "sort_value__gt"
+            subjects = subjects.filter(
+                Q(sort_blank=1) | Q(**{beyond: value}) | Q(sort_value=value, id__gt=subject_id)
+            )
+
+    rows = list(subjects.values_list("id", "values", "sort_blank", "sort_value")[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    padding = [None] * len(types)
+    return {
+        "columns": [{"name": column, "type": column_type} for column, column_type in types.items()],
+        "rows": [
+            {"id": subject_id, "values": ((values or []) + padding)[:len(types)]}
+            for subject_id, values, _, _ in rows
+        ],
+        "next": encode_cursor(*rows[-1][2:], rows[-1][0]) if more else None,
+    }
@@ -0,0 +1,169 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import F
+
+from core.models import ProjectData, Subject, SubjectColumn, SubjectValueCount
+from core.utils.subject_query import NUMERIC_TYPES, value_type
+
+BATCH_SIZE = 500
+
+# Most frequent values returned per column by column_stats
+TOP_VALUES = 10
+
+
+class _ColumnDelta:
+    """What a batch of subjects adds to (or removes from) one column's statistics."""
+    __slots__ = ("nulls", "values", "numbers")
+
+    def __init__(self):
+        self.nulls = 0
+        self.values: Counter = Counter()
+        self.numbers: List[float] = []
+
+
+def stat_value(value) -> Optional[str]:
+    """A subject value as counted: its text, or None for missing and blank values."""
+    if value is None:
+        return None
+    text = str(value)
+    return text if text.strip() else None
+
+
+def _deltas(columns: List[SubjectColumn], rows: Iterable[list]) -> List[_ColumnDelta]:
+    deltas = [_ColumnDelta() for _ in columns]
+    for values in rows:
+        values = values or []
+        for position, delta in enumerate(deltas):
+            text = stat_value(values[position]) if position < len(values) else None
+            if text is None:
+                delta.nulls += 1
+                continue
+            delta.values[text] += 1
+            if value_type(values[position]) in NUMERIC_TYPES:
+                delta.numbers.append(float(text))
+    return deltas
+
+
+def _apply_value_counts(column: SubjectColumn, counts: Counter, sign: int) -> int:
+    """Add (sign=1) or remove (sign=-1) value occurrences; returns the change in distinct values."""
+    scope = SubjectValueCount.objects.filter(column=column)
+    values = list(counts)
+
+    before: Dict[str, int] = {}
+    for i in range(0, len(values), BATCH_SIZE):
+        before.update(scope.filter(value__in=values[i:i + BATCH_SIZE]).values_list("value", "count"))
+
+    if sign > 0:
+        SubjectValueCount.objects.bulk_create(
+            [SubjectValueCount(column=column, value=v, count=0) for v in values if v not in before],
+            batch_size=BATCH_SIZE,
+        )
+
+    # One UPDATE per distinct change instead of one per value
+    by_change = defaultdict(list)
+    for value, n in counts.items():
+        if sign > 0 or value in before:
+            by_change[sign * n].append(value)
+    for change, same in by_change.items():
+        for i in range(0, len(same), BATCH_SIZE):
+            scope.filter(value__in=same[i:i + BATCH_SIZE]).update(count=F("count") + change)
+
+    if sign > 0:
+        return sum(1 for v in values if v not in before)
+    gone, _ = scope.filter(count__lte=0).delete()
+    return -gone
+
+
+def _numeric_range(column: SubjectColumn):
+    """(min, max) over the column's remaining distinct values; O(distinct values), not O(subjects)."""
+    numbers = [
+        float(value) for value in column.value_counts.values_list("value", flat=True)
+        if value_type(value) in NUMERIC_TYPES
+    ]
+    return (min(numbers), max(numbers)) if numbers else (None, None)
+
+
+def record_subjects(project: ProjectData, rows: Iterable[list], sign: int = 1) -> None:
+    """
+    Fold the value lists of subjects being added (sign=1) or deleted (sign=-1) into the
+    project's column statistics, and bump its subjects_version. Call it in the transaction
+    that writes the subjects; an in-place update is a delete of the old values plus an add.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    with transaction.atomic():
+        ProjectData.objects.filter(id=project.id).update(subjects_version=F("subjects_version") + 1)
+        columns = list(SubjectColumn.objects.select_for_update().filter(project=project).order_by("position"))
+        for column, delta in zip(columns, _deltas(columns, rows)):
+            # Clamped so subjects stored before statistics were kept can still be deleted
+            column.null_count = max(0, column.null_count + sign * delta.nulls)
+            column.value_count = max(0, column.value_count + sign * sum(delta.values.values()))
+            if delta.values:
+                column.distinct_count = max(0, column.distinct_count + _apply_value_counts(column, delta.values, sign))
+            if delta.numbers:
+                column.numeric_count = max(0, column.numeric_count + sign * len(delta.numbers))
+                column.numeric_sum += sign * sum(delta.numbers)
+                low, high = min(delta.numbers), max(delta.numbers)
+                if sign > 0:
+                    column.numeric_min = low if column.numeric_min is None else min(column.numeric_min, low)
+                    column.numeric_max = high if column.numeric_max is None else max(column.numeric_max, high)
+                elif column.numeric_count == 0:
+                    column.numeric_sum, column.numeric_min, column.numeric_max = 0.0, None, None
+                elif column.numeric_min is None or low <= column.numeric_min or high >= column.numeric_max:
+                    # An extreme was removed; only then are the remaining values looked at
+                    column.numeric_min, column.numeric_max = _numeric_range(column)
+        SubjectColumn.objects.bulk_update(columns, [
+            "null_count", "value_count", "distinct_count",
+            "numeric_count", "numeric_sum", "numeric_min", "numeric_max",
+        ])
+
+
+def rebuild_subject_stats(project: ProjectData, chunk_size: int = 2000) -> int:
+    """Recompute a project's column statistics from its subjects; returns how many were read."""
+    with transaction.atomic():
+        SubjectValueCount.objects.filter(column__project=project).delete()
+        SubjectColumn.objects.filter(project=project).update(
+            value_count=0, null_count=0, distinct_count=0,
+            numeric_count=0, numeric_sum=0, numeric_min=None, numeric_max=None,
+        )
+        read = 0
+        batch = []
+        for values in Subject.objects.filter(project=project).order_by("id").values_list("values", flat=True).iterator(
+            chunk_size=chunk_size
+        ):
+            batch.append(values)
+            if len(batch) == chunk_size:
+                record_subjects(project, batch)
+                read += len(batch)
+                batch = []
+        record_subjects(project, batch)
+        return read + len(batch)
+
+
+def column_stats(project: ProjectData, top: int = TOP_VALUES) -> List[dict]:
+    """
+    The project's materialized column statistics, read from SubjectColumn and the
+    top of each column's SubjectValueCount index; no subject rows are touched.
+    """
+    stats = []
+    for column in project.subject_columns.order_by("position"):
+        top_values = list(
+            column.value_counts.order_by("-count", "value").values_list("value", "count")[:top]
+        ) if top else []
+        stats.append({
+            "name": column.name,
+            "values": column.value_count,
+            "nulls": column.null_count,
+            "distinct": column.distinct_count,
+            "numeric": {
+                "count": column.numeric_count,
+                "min": column.numeric_min,
+                "max": column.numeric_max,
+                "mean": column.numeric_mean(),
+            } if column.numeric_count else None,
+            "top": [[value, count] for value, count in top_values],
+        })
+    return stats
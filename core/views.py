@@ -1,4 +1,5 @@
-import os
+import csv
+import json
 from collections import defaultdict
 from functools import wraps
 
@@ -6,16 +7,30 @@ from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.csrf import csrf_exempt
-from django.http import FileResponse, JsonResponse, HttpResponseForbidden
+from django.db import transaction
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.http import FileResponse, Http404, JsonResponse, HttpResponseForbidden, StreamingHttpResponse
 
 from .forms import SignUpForm, ProjectDataForm, CSVUploadForm, SubjectSelectionForm, ProjectFileForm, \
     ProjectSettingsForm
 from .models import ProjectData, GroupData, GroupSubData, Subject, ProjectFile, ProjectMembership, \
-    ProjectJoinToken
-from core.utils.excel.excel_file_generation import ExcelFileGenerator
+    ProjectJoinToken, ParseJob, StagedUpload
+from core.utils.excel.excel_file_generation import ENGINE_XML, ExcelFileGenerator
 from core.utils.excel.project_data import FileReaderProjectData as ExcelProjectData
-from .utils.excel.file_reader import FileReader, FileReaderResponse
+from .utils.excel.parse_cache import HashingUploadHandler
+from .utils.excel.parse_jobs import confirmed_preview, enqueue_parse, job_status
+from .utils.excel.vocabulary import record_confirmed_values
+from .utils.excel.workbook_cache import cached_workbook
+from .utils.export import CONTENT_TYPES, DATASETS, export_chunks, export_formats
+from .utils.project_import import project_with_group_data, save_project_data
+from .utils.project_workbook import filled_workbook
+from .utils.subject_dedup import SubjectIngest, duplicate_rows, remove_duplicate_subjects
+from .utils.staging import PREVIEW_ROWS, RowBitmap, discard_staged, live_upload, pending_rows, promote_rows, \
+    stage_csv
+from .utils.subject_query import PAGE_SIZE, column_types, subject_page
+from .utils.subject_stats import column_stats, record_subjects
 
 
 # ----------------- Decorators -----------------
@@ -87,18 +102,17 @@ def start_project(request):
                 description=project_model.description,
                 groups=groups
             )
+            # Same name and groups as an earlier download -> served from the workbook cache
             generator = ExcelFileGenerator()
-            file_path = generator.make_new_file_from_template_with_openpyxl(
-                project_data, output_name=project_model.project_name
-            )
+            workbook = cached_workbook(generator, project_data)
 
             # Store project ID in session for upload confirmation later
             request.session['pending_project_id'] = project_model.id
 
             return FileResponse(
-                open(file_path, "rb"),
+                workbook,
                 as_attachment=True,
-                filename=os.path.basename(file_path)
+                filename=generator.output_filename(project_model.project_name)
             )
 
     else:
@@ -109,7 +123,17 @@ def start_project(request):
 
 # ----------------- Upload Excel Preview -----------------
 @login_required
+@csrf_exempt
 def upload_excel_preview(request):
+    # Hash the workbook while it streams in; upload handlers can only be
+    # changed before the CSRF check reads the body, hence csrf_protect below
+    hasher = HashingUploadHandler(request)
+    request.upload_handlers.insert(0, hasher)
+    return _upload_excel_preview(request, hasher)
+
+
+@csrf_protect
+def _upload_excel_preview(request, hasher):
     if request.method == "POST" and request.FILES.get("file"):
         excel_file = request.FILES["file"]
 
@@ -119,78 +143,92 @@ def upload_excel_preview(request):
             return JsonResponse({"success": False, "message": "No pending project found."})
 
         project_model = get_object_or_404(ProjectData, id=project_id)
-        project_data = ExcelProjectData(
-            name=project_model.project_name,
-            owner=request.user.username,
-            description=project_model.description,
-            groups=project_model.group_names.split("\t")
-        )
 
-        reader = FileReader()
-        response: FileReaderResponse = reader.get_file_reader_response(project_data, excel_file)
+        # Parsing runs in run_parse_worker; the page polls parse_job_status for the result.
+        # A re-upload of an already parsed file comes back finished straight away.
+        job = enqueue_parse(project_model, request.user, excel_file, hasher.digests.get("file"))
+        # The preview itself stays in the ParseJob row; the session only points at it
+        request.session['pending_parse_job_id'] = job.id
 
-        response_dict = {
-            "success": response.was_successful(),
-            "message": response.get_message(),
-            "data": response.get_data(),
-            "independent_variables": response.get_independent_variables(),
-            "typos": response.get_possible_typos(),
-            "project_name": response.get_project_data().get_name(),
-            "groups": response.get_project_data().get_groups()
-        }
-        # Store the file response in session for confirmation
-        response_dict = make_json_safe(response_dict)
-
-        request.session['file_response'] = response_dict
-        return JsonResponse(response_dict)
+        return JsonResponse({
+            "success": True,
+            "status_url": reverse("parse_job_status", args=[job.id]),
+            **job_status(job)
+        }, status=200 if job.is_finished() else 202)
 
     return JsonResponse({"success": False, "message": "No file provided"})
 
 
+# ----------------- Excel Preview Job Status -----------------
+@login_required
+def parse_job_status(request, job_id):
+    job = get_object_or_404(ParseJob, id=job_id, requested_by=request.user)
+    return JsonResponse(job_status(job))
+
+
 # ----------------- Confirm Excel Upload -----------------
 @login_required
 @csrf_exempt
 def upload_excel_confirm(request):
     if request.method == "POST":
         project_id = request.session.get("pending_project_id")
-        file_response = request.session.get("file_response")
-        if not project_id or not file_response:
+        job_id = request.session.get("pending_parse_job_id")
+        project_model = get_object_or_404(ProjectData, id=project_id) if project_id else None
+        preview = confirmed_preview(job_id, request.user, project_model) if project_model else None
+        if not preview:
             return JsonResponse({"success": False, "message": "No pending project or file response found."})
 
-        project_model = get_object_or_404(ProjectData, id=project_id)
-        data = file_response.get("data", {})
-        independent_variables = file_response.get("independent_variables", {})
-
-        # Save each group/category/label/value
-        for group_name, categories in data.items():
-            group_instance = GroupData.objects.create(
-                project=project_model,
-                group_name=group_name
-            )
-            for category_name, labels in categories.items():
-                for label, value in labels.items():
-                    GroupSubData.objects.create(
-                        group=group_instance,
-                        category=category_name,
-                        label=label,
-                        value=value
-                    )
+        data, independent_variables = preview
 
-        if independent_variables:
-            project_model.independent_variable = {
-                str(k): list(map(str, v)) for k, v in independent_variables.items()
-            }
-            project_model.save()
+        # Save every group/category/label/value in one transaction
+        confirmed_values = save_project_data(project_model, data, independent_variables)
+
+        # Confirmed values teach the spell checker this lab's vocabulary; previews cached
+        # against the old one are keyed on it, so they simply stop being hit
+        record_confirmed_values(project_model, confirmed_values)
 
-        # Clear session
+        # Clear session and the consumed preview
+        ParseJob.objects.filter(id=job_id).delete()
         del request.session['pending_project_id']
-        del request.session['file_response']
+        del request.session['pending_parse_job_id']
 
         return JsonResponse({"success": True, "redirect_url": f"/project/{project_model.id}/"})
 
     return JsonResponse({"success": False, "message": "Invalid request"})
 
 
+# ----------------- Download Filled Workbook -----------------
+@project_role_required(["collaborator"])
+@login_required
+def download_project_workbook(request, project_id):
+    project = get_object_or_404(ProjectData.objects.select_related("owner"), id=project_id)
+    # Rebuilt from the stored groups and values (one query), patched straight into the template
+    generator = ExcelFileGenerator(engine=ENGINE_XML)
+    return FileResponse(
+        filled_workbook(project, generator),
+        as_attachment=True,
+        filename=generator.output_filename(project.project_name)
+    )
+
+
+# ----------------- Export Project Data -----------------
+@project_role_required(["collaborator"])
+@login_required
+def export_project_data(request, project_id, dataset, file_format):
+    project = get_object_or_404(ProjectData, id=project_id)
+    if dataset not in DATASETS or file_format not in export_formats():
+        raise Http404(f"No {file_format} export of {dataset}")
+
+    # Rows are read in chunks and written out as they arrive, so memory stays flat for any project size
+    response = StreamingHttpResponse(
+        export_chunks(project, dataset, file_format), content_type=CONTENT_TYPES[file_format]
+    )
+    response["Content-Disposition"] = content_disposition_header(
+        True, f"{project.project_name}-{dataset}.{file_format}"
+    )
+    return response
+
+
 # ----------------- Project Detail -----------------
 @login_required
 def project_detail(request, project_id):
@@ -256,7 +294,8 @@ def delete_file(request, project_id, file_id):
 @login_required
 def subject_data_page(request, project_id):
     project = get_object_or_404(ProjectData, id=project_id)
-    subjects = project.subjects.all()  # now tied directly to project
+    # Rows are fetched page by page from subject_data_query; only the columns are rendered here
+    columns = column_types(project)
 
     is_authorized = (
         request.user == project.owner or
@@ -267,71 +306,129 @@ def subject_data_page(request, project_id):
         ).exists()
     )
 
+    # Materialized per-column statistics for the header; no subject rows are read
+    stats = column_stats(project, top=3)
+
     return render(request, "core/subject_data.html", {
         "project": project,
-        "subjects": subjects,
+        "columns": [
+            {"name": name, "type": column_type, "stats": column_stat}
+            for (name, column_type), column_stat in zip(columns.items(), stats)
+        ],
+        "subject_count": stats[0]["values"] + stats[0]["nulls"] if stats else 0,
         "is_authorized": is_authorized,
+        "export_formats": export_formats(),
     })
 
 
+@project_role_required(["collaborator"])
+@login_required
+def subject_data_stats(request, project_id):
+    """JSON per-column statistics: value, blank and distinct counts, numeric min/max/mean, top values."""
+    project = get_object_or_404(ProjectData, id=project_id)
+    return JsonResponse({"success": True, "columns": column_stats(project)})
+
+
+@project_role_required(["collaborator"])
+@login_required
+def subject_data_query(request, project_id):
+    """
+    JSON page of subjects: ?sort=<column>&desc=1&after=<cursor>&limit=<n>
+    &filters=[["column", "op", "value"], ...] (op: eq, lt, lte, gt, gte, contains)
+    """
+    project = get_object_or_404(ProjectData, id=project_id)
+    try:
+        filters = json.loads(request.GET.get("filters") or "[]")
+        page = subject_page(
+            project,
+            sort=request.GET.get("sort") or None,
+            descending=request.GET.get("desc") == "1",
+            filters=[tuple(f) for f in filters],
+            after=request.GET.get("after") or None,
+            limit=int(request.GET.get("limit") or PAGE_SIZE)
+        )
+    except (TypeError, ValueError) as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=400)
+    return JsonResponse({"success": True, **page})
+
+
 @project_role_required(["collaborator"])
 @login_required
 def add_subject_data(request, project_id):
     project = get_object_or_404(ProjectData, id=project_id)
+    # The session only holds the id of the server-side StagedUpload; its rows live in StagedRow
     session_key = f"subjects_preview_{project_id}"
+    staged_id = request.session.get(session_key)
 
-    # Clear session if first GET visit
+    # Clear staged rows if first GET visit
     if request.method == "GET":
-        request.session.pop(session_key, None)
-        subjects = []
-        selection_form = None
+        discard_staged(request.session.pop(session_key, None))
+        staged = None
     else:
         # Use previously uploaded subjects if available
-        subjects = request.session.get(session_key, [])
+        staged = live_upload(staged_id, request.user, project, StagedUpload.KIND_SUBJECT_CSV)
 
-        # Step 1: Upload CSV
+        # Step 1: Upload CSV, streamed into the staging table in chunks
         if "upload_csv" in request.POST:
             form = CSVUploadForm(request.POST, request.FILES)
             if form.is_valid():
-                file = form.cleaned_data["csv_file"]
-                decoded = file.read().decode("utf-8")
-                import csv, io
-                reader = csv.DictReader(io.StringIO(decoded))
-                subjects = list(reader)
-
-                request.session[session_key] = subjects
-                selection_form = SubjectSelectionForm(subjects=subjects)
-            else:
-                selection_form = None
+                discard_staged(request.session.pop(session_key, None))
+                try:
+                    staged = stage_csv(
+                        request.user, project, StagedUpload.KIND_SUBJECT_CSV, form.cleaned_data["csv_file"]
+                    )
+                except (UnicodeDecodeError, csv.Error) as e:
+                    staged = None
+                    messages.error(request, f"Could not read this CSV: {e}")
+                else:
+                    request.session[session_key] = str(staged.id)
 
         # Step 2: Add selected subjects
-        elif "add_subjects" in request.POST:
-            selection_form = SubjectSelectionForm(request.POST, subjects=subjects)
+        elif "add_subjects" in request.POST and staged is not None:
+            selection_form = SubjectSelectionForm(
+                request.POST, rows=pending_rows(staged, PREVIEW_ROWS), columns=staged.payload["columns"]
+            )
             if selection_form.is_valid():
-                selected_indexes = selection_form.cleaned_data["subjects"]
-                added = 0
-
-                for idx in selected_indexes:
-                    data = subjects[int(idx)]
-                    Subject.objects.create(project=project, metadata=data)
-                    added += 1
+                # "Select all" covers every pending row, including those past the preview
+                selected = None if request.POST.get("all_rows") else RowBitmap.from_rows(
+                    int(idx) for idx in selection_form.cleaned_data["subjects"]
+                )
+                # Rows already in the project are skipped (or, with a key column, update the matching subjects)
+                ingest = SubjectIngest(project, selection_form.cleaned_data["key_column"] or None)
+                with transaction.atomic():
+                    # The upload's columns are registered once, before any Subject is laid out on them
+                    project.add_subject_columns(staged.payload["columns"])
+                    added = promote_rows(
+                        staged, selected, Subject, lambda data: Subject(project=project, metadata=data),
+                        after_batch=lambda subjects: record_subjects(project, [s.values for s in subjects]),
+                        prepare=ingest
+                    )
 
-                # Remove added subjects from preview
-                subjects = [s for i, s in enumerate(subjects) if str(i) not in selected_indexes]
-                request.session[session_key] = subjects
+                # Added rows are flagged in the upload's bitmap; drop it once none are left
+                if len(RowBitmap(staged.added)) >= staged.payload["rows"]:
+                    discard_staged(request.session.pop(session_key, None))
 
                 messages.success(request, f"Successfully added {added} subjects to {project.project_name}.")
+                if ingest.updated:
+                    messages.success(request, f"Updated existing subjects from {ingest.updated} rows.")
+                if ingest.skipped:
+                    messages.info(request, f"Skipped {ingest.skipped} rows already in the project.")
                 return redirect("add_subject_data", project_id=project.id)
 
-        else:
-            # POST but not recognized, still show preview if exists
-            selection_form = None if not subjects else SubjectSelectionForm(subjects=subjects)
-
+    preview = list(pending_rows(staged, PREVIEW_ROWS)) if staged is not None else []
+    # Flagged with one indexed lookup per chunk of rows
+    duplicates = duplicate_rows(project, preview)
+    columns = staged.payload["columns"] if staged is not None else []
     return render(request, "core/add_subject_data.html", {
         "project": project,
         "upload_form": CSVUploadForm(),
-        "selection_form": selection_form,
-        "subjects": subjects,
+        "selection_form": SubjectSelectionForm(rows=preview, columns=columns) if preview else None,
+        "subjects": [
+            {"values": list(data.values()), "duplicate": position in duplicates} for position, data in preview
+        ],
+        "duplicates": len(duplicates),
+        "columns": columns,
+        "pending": staged.payload["rows"] - len(RowBitmap(staged.added)) if staged is not None else 0,
     })
 
 
@@ -349,13 +446,33 @@ def delete_subject(request, project_id, subject_id):
     subject = get_object_or_404(Subject, id=subject_id, project=project)
 
     if request.method == "POST":
-        subject.delete()
+        with transaction.atomic():
+            record_subjects(project, [subject.values], sign=-1)
+            subject.delete()
         messages.success(request, "Subject deleted successfully.")
         return redirect("subject_data", project_id=project.id)
 
     return redirect("subject_data", project_id=project.id)
 
 
+@project_role_required(["collaborator"])
+@login_required
+def delete_duplicate_subjects(request, project_id):
+    project = get_object_or_404(ProjectData, id=project_id)
+
+    is_owner = project.owner == request.user
+    is_collaborator = project.memberships.filter(user=request.user, role="collaborator").exists()
+    if not (is_owner or is_collaborator):
+        return HttpResponseForbidden("You do not have permission to delete subjects.")
+
+    if request.method == "POST":
+        # The first of each set of identical subjects is kept
+        deleted = remove_duplicate_subjects(project)
+        messages.success(request, f"Deleted {deleted} duplicate subject{'s' if deleted != 1 else ''}.")
+
+    return redirect("subject_data", project_id=project.id)
+
+
 # ----------------- Project Settings -----------------
 @project_role_required([])
 @login_required
@@ -437,8 +554,12 @@ def join_project(request, project_id, token):
 # ----------------- About Page -----------------
 @login_required
 def project_about(request, project_id):
-    project = get_object_or_404(ProjectData, id=project_id)
-    return render(request, "core/about.html", {"project": project})
+    project = get_object_or_404(project_with_group_data(), id=project_id)
+    return render(request, "core/about.html", {
+        "project": project,
+        "export_formats": export_formats(),
+        "can_edit": project.can_edit(request.user),
+    })
 
 
 # ----------------- About Page -----------------
@@ -448,24 +569,6 @@ def raw_ms_data(request, project_id):
     return render(request, "core/raw_ms_data.html", {"project": project})
 
 
-# ----------------- Make Json Safe -----------------
-def make_json_safe(obj):
-    """
-    Recursively convert defaultdicts and other non-JSON-safe types
-    into regular dicts/lists/strings so they can be serialized by JsonResponse.
-    """
-    if isinstance(obj, defaultdict):
-        return {k: make_json_safe(v) for k, v in obj.items()}
-    elif isinstance(obj, dict):
-        return {k: make_json_safe(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [make_json_safe(v) for v in obj]
-    elif hasattr(obj, "__dict__"):  # for custom classes (like ProjectData)
-        return make_json_safe(obj.__dict__)
-    else:
-        return obj
-
-
 # ----------------- Tutorial -----------------
 # Number of steps in tutorial
 TOTAL_STEPS = 9